@@ -0,0 +1,3 @@
+"""
+MHRS takip botlarının (PC ve Telegram) ortak çekirdeği.
+"""
@@ -0,0 +1,295 @@
+"""
+olaylar.jsonl dosyalarından çevrimdışı müsaitlik istatistikleri.
+
+    python -m mhrs_core.analiz logs/telegram
+    python -m mhrs_core.analiz logs/pc/olaylar.jsonl.2024-05-01.gz --klinik dahiliye --gun 30 --json
+
+Dosyalar (düz ya da .gz) satır satır okunur; bellekte yalnızca klinik ve
+hekim başına sabit boyutlu sayaçlar tutulur, aylarca log tek geçişte ve
+sabit bellekle çözümlenir.
+
+Klinik başına (ve klinik içinde hekim başına):
+  - sorgu sayısı, hata oranı, sorgu süresi
+  - isabet oranı: yeni slot açılan sorguların oranı
+  - slotların günün hangi saatinde açıldığı (ilk cevapta zaten boş olanlar hariç)
+  - randevu denemeleri, başarı ve gecikme (slotun görüldüğü cevaptan randevu
+    cevabına kadar)
+"""
+import argparse
+import bisect
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from mhrs_core.secim import normal_ad
+
+OLAY_DOSYASI = "olaylar.jsonl"
+
+# Süre dağılımı kovaları (ms); yüzdelikler kova üst sınırıyla yaklaşık verilir
+_KOVALAR = (50, 100, 200, 500, 1000, 2000, 5000, 10_000, 30_000, 60_000)
+
+
+class Dagilim:
+    """Sabit bellekli süre dağılımı: adet, toplam, en az/en çok ve kova sayaçları."""
+
+    __slots__ = ("adet", "toplam", "en_az", "en_cok", "kovalar")
+
+    def __init__(self):
+        self.adet = 0
+        self.toplam = 0
+        self.en_az = None
+        self.en_cok = None
+        self.kovalar = [0] * (len(_KOVALAR) + 1)
+
+    def ekle(self, ms):
+        if ms is None:
+            return
+        self.adet += 1
+        self.toplam += ms
+        self.en_az = ms if self.en_az is None else min(self.en_az, ms)
+        self.en_cok = ms if self.en_cok is None else max(self.en_cok, ms)
+        self.kovalar[bisect.bisect_left(_KOVALAR, ms)] += 1
+
+    def yuzdelik(self, oran: float):
+        if not self.adet:
+            return None
+        hedef = oran * self.adet
+        birikim = 0
+        for i, adet in enumerate(self.kovalar):
+            birikim += adet
+            if birikim >= hedef:
+                return min(_KOVALAR[i], self.en_cok) if i < len(_KOVALAR) else self.en_cok
+        return self.en_cok
+
+    def ozet(self) -> dict:
+        return {
+            "adet": self.adet,
+            "ort": round(self.toplam / self.adet) if self.adet else None,
+            "p50": self.yuzdelik(0.5),
+            "p90": self.yuzdelik(0.9),
+            "en_cok": self.en_cok,
+        }
+
+
+class _Hekim:
+    __slots__ = ("acilan", "saatler", "randevu", "alinan")
+
+    def __init__(self):
+        self.acilan = 0
+        self.saatler = [0] * 24
+        self.randevu = 0
+        self.alinan = 0
+
+
+class _Klinik(_Hekim):
+    __slots__ = ("sorgu", "hatali", "isabet", "sure", "gecikme", "bildirim", "uyarilar", "hekimler")
+
+    def __init__(self):
+        super().__init__()
+        self.sorgu = 0
+        self.hatali = 0
+        self.isabet = 0
+        self.sure = Dagilim()
+        self.gecikme = Dagilim()
+        self.bildirim = 0
+        self.uyarilar = {}
+        self.hekimler = {}
+
+    def hekim(self, ad) -> _Hekim:
+        ad = ad or "?"
+        h = self.hekimler.get(ad)
+        if h is None:
+            h = self.hekimler[ad] = _Hekim()
+        return h
+
+
+class Analiz:
+    def __init__(self, klinik: str | None = None, baslangic: float | None = None):
+        self.klinik_suzgec = normal_ad(klinik) if klinik else None
+        self.baslangic = baslangic
+        self.klinikler = {}
+        self.olay_sayisi = 0
+        self.bozuk = 0
+        self.logins = {"adet": 0, "basarili": 0, "sure": Dagilim()}
+
+    def _klinik(self, ad) -> _Klinik:
+        ad = ad or "?"
+        k = self.klinikler.get(ad)
+        if k is None:
+            k = self.klinikler[ad] = _Klinik()
+        return k
+
+    def ekle(self, o: dict):
+        ts = o.get("ts") or 0
+        if self.baslangic is not None and ts < self.baslangic:
+            return
+        tip = o.get("tip")
+        if tip == "login":
+            self.olay_sayisi += 1
+            self.logins["adet"] += 1
+            self.logins["basarili"] += bool(o.get("basarili"))
+            self.logins["sure"].ekle(o.get("sure_ms"))
+            return
+
+        klinik_adi = o.get("klinik_adi")
+        if self.klinik_suzgec and self.klinik_suzgec not in normal_ad(klinik_adi):
+            return
+        self.olay_sayisi += 1
+        k = self._klinik(klinik_adi)
+
+        if tip == "sorgu":
+            k.sorgu += 1
+            k.sure.ekle(o.get("sure_ms"))
+            if o.get("sinif") != "basari":
+                k.hatali += 1
+            elif o.get("acilan") and not o.get("ilk"):
+                k.isabet += 1
+        elif tip == "uyari":
+            kod = o.get("kod") or "?"
+            k.uyarilar[kod] = k.uyarilar.get(kod, 0) + 1
+        elif tip == "slot":
+            if o.get("ilk"):
+                return
+            saat = datetime.fromtimestamp(ts).hour
+            for sayac in (k, k.hekim(o.get("hekim_adi"))):
+                sayac.acilan += 1
+                sayac.saatler[saat] += 1
+        elif tip == "randevu":
+            h = k.hekim(o.get("hekim_adi"))
+            k.randevu += 1
+            h.randevu += 1
+            if o.get("basarili"):
+                k.alinan += 1
+                h.alinan += 1
+                k.gecikme.ekle(o.get("gecikme_ms"))
+        elif tip == "bildirim":
+            k.bildirim += 1
+            k.gecikme.ekle(o.get("gecikme_ms"))
+
+    def oku(self, yol: str):
+        acici = gzip.open if yol.endswith(".gz") else open
+        with acici(yol, "rt", encoding="utf-8", errors="replace") as f:
+            for satir in f:
+                try:
+                    o = json.loads(satir)
+                except ValueError:
+                    self.bozuk += 1
+                    continue
+                if isinstance(o, dict):
+                    self.ekle(o)
+                else:
+                    self.bozuk += 1
+
+    def sonuc(self) -> dict:
+        return {
+            "olay": self.olay_sayisi,
+            "bozuk_satir": self.bozuk,
+            "login": {**self.logins, "sure": self.logins["sure"].ozet()},
+            "klinikler": {
+                ad: {
+                    "sorgu": k.sorgu,
+                    "hata_orani": _oran(k.hatali, k.sorgu),
+                    "isabet_orani": _oran(k.isabet, k.sorgu),
+                    "sorgu_suresi_ms": k.sure.ozet(),
+                    "acilan_slot": k.acilan,
+                    "saatler": k.saatler,
+                    "uyarilar": k.uyarilar,
+                    "randevu_deneme": k.randevu,
+                    "randevu_alinan": k.alinan,
+                    "bildirim": k.bildirim,
+                    "gecikme_ms": k.gecikme.ozet(),
+                    "hekimler": {
+                        hekim: {"acilan_slot": h.acilan, "saatler": h.saatler,
+                                "randevu_deneme": h.randevu, "randevu_alinan": h.alinan}
+                        for hekim, h in sorted(k.hekimler.items(), key=lambda x: -x[1].acilan)
+                    },
+                }
+                for ad, k in sorted(self.klinikler.items())
+            },
+        }
+
+
+def _oran(pay: int, payda: int) -> float | None:
+    return round(pay / payda, 4) if payda else None
+
+
+def _yuzde(oran) -> str:
+    return "-" if oran is None else f"%{oran * 100:.1f}"
+
+
+def _en_cok_saatler(saatler: list, adet: int = 3) -> str:
+    enler = sorted((s for s in range(24) if saatler[s]), key=lambda s: -saatler[s])[:adet]
+    return ", ".join(f"{s:02d}:00 ({saatler[s]})" for s in enler) or "-"
+
+
+def dosyalari_bul(yollar: list[str]) -> list[str]:
+    """Dizin verilirse içindeki olaylar.jsonl ve arşivleri (eskiden yeniye), dosya verilirse kendisi."""
+    dosyalar = []
+    for yol in yollar:
+        if os.path.isdir(yol):
+            adlar = [
+                os.path.join(kok, ad)
+                for kok, _, dosya_adlari in os.walk(yol)
+                for ad in dosya_adlari
+                if ad.startswith(OLAY_DOSYASI)
+            ]
+            dosyalar.extend(sorted(adlar, key=os.path.getmtime))
+        else:
+            dosyalar.append(yol)
+    return dosyalar
+
+
+def yazdir(sonuc: dict, cikti=sys.stdout):
+    def yaz(s=""):
+        print(s, file=cikti)
+
+    login = sonuc["login"]
+    yaz(f"Olay: {sonuc['olay']} | bozuk satır: {sonuc['bozuk_satir']} | "
+        f"login: {login['basarili']}/{login['adet']} başarılı")
+    for ad, k in sonuc["klinikler"].items():
+        sure, gecikme = k["sorgu_suresi_ms"], k["gecikme_ms"]
+        yaz()
+        yaz(f"🏥 {ad}")
+        yaz(f"   Sorgu: {k['sorgu']} | hata {_yuzde(k['hata_orani'])} | isabet {_yuzde(k['isabet_orani'])} | "
+            f"süre p50 ~{sure['p50']} ms, p90 ~{sure['p90']} ms")
+        if k["uyarilar"]:
+            yaz("   Uyarılar: " + ", ".join(f"{kod} ({adet})" for kod, adet in k["uyarilar"].items()))
+        yaz(f"   Açılan slot: {k['acilan_slot']} | en çok açıldığı saatler: {_en_cok_saatler(k['saatler'])}")
+        if k["randevu_deneme"] or k["bildirim"]:
+            yaz(f"   Randevu: {k['randevu_alinan']}/{k['randevu_deneme']} alındı, {k['bildirim']} bildirim | "
+                f"gecikme p50 ~{gecikme['p50']} ms, en çok {gecikme['en_cok']} ms")
+        for hekim, h in k["hekimler"].items():
+            if not (h["acilan_slot"] or h["randevu_deneme"]):
+                continue
+            satir = f"     • {hekim}: {h['acilan_slot']} slot, {_en_cok_saatler(h['saatler'])}"
+            if h["randevu_deneme"]:
+                satir += f" | randevu {h['randevu_alinan']}/{h['randevu_deneme']}"
+            yaz(satir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MHRS olay loglarından müsaitlik istatistikleri")
+    parser.add_argument("yollar", nargs="+", help="log dizini (ör. logs/telegram) ya da olaylar.jsonl[.gz] dosyaları")
+    parser.add_argument("--klinik", help="sadece adı bu metni içeren klinikler")
+    parser.add_argument("--gun", type=float, help="sadece son N günün olayları")
+    parser.add_argument("--json", action="store_true", help="sonucu JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    baslangic = time.time() - args.gun * 86400 if args.gun else None
+    analiz = Analiz(klinik=args.klinik, baslangic=baslangic)
+    for yol in dosyalari_bul(args.yollar):
+        analiz.oku(yol)
+
+    sonuc = analiz.sonuc()
+    if args.json:
+        json.dump(sonuc, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        yazdir(sonuc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+MHRS uç noktaları, istek gövdeleri ve cevap yardımcıları.
+
+Buradaki fonksiyonlar HTTP katmanından bağımsızdır; hem senkron (PC sihirbazı)
+hem de async (takip döngüsü) istemcilerle kullanılır.
+"""
+import base64
+import json
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from mhrs_core.logs import govde_ozeti
+
+if TYPE_CHECKING:
+    from mhrs_core.slots import Slot
+
+LOGIN_PATH = "/api/vatandas/login"
+HASTA_BILGISI_PATH = "/api/vatandas/vatandas/hasta-bilgisi"
+SLOT_PATH = "/api/kurum-rss/randevu/slot-sorgulama/slot"
+RANDEVU_EKLE_PATH = "/api/kurum/randevu/randevu-ekle"
+
+LOGIN_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Accept-Language": "tr-TR,tr;q=0.9",
+}
+
+VARSAYILAN_GUN_FARKI = 15
+
+
+def ilce_path(plaka) -> str:
+    return f"/api/yonetim/genel/ilce/selectinput/{plaka}"
+
+
+def klinik_path(il_id, ilce_id) -> str:
+    return f"/api/kurum/kurum/kurum-klinik/il/{il_id}/ilce/{ilce_id}/kurum/-1/aksiyon/200/select-input"
+
+
+def kurum_path(il_id, ilce_id, klinik_id) -> str:
+    return f"/api/kurum/kurum/kurum-klinik/il/{il_id}/ilce/{ilce_id}/kurum/-1/klinik/{klinik_id}/ana-kurum/select-input"
+
+
+def hekim_path(kurum_id, klinik_id) -> str:
+    return f"/api/kurum/hekim/hekim-klinik/hekim-select-input/anakurum/{kurum_id}/kurum/-1/klinik/{klinik_id}"
+
+
+def headers(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}", "User-Agent": "Mozilla/5.0"}
+
+
+def strip_html(s: str) -> str:
+    """Basit HTML tag temizleyici (RND4034 mesajındaki font/tagleri atmak için)."""
+    if not isinstance(s, str):
+        return ""
+    no_tags = re.sub(r"<.*?>", "", s)
+    return no_tags.replace("\r", " ").replace("\n", " ").strip()
+
+
+def login_payload(tc: str, sifre: str) -> dict:
+    return {
+        "kullaniciAdi": tc,
+        "parola": sifre,
+        "islemKanali": "VATANDAS_WEB",
+        "girisTipi": "PAROLA",
+    }
+
+
+def jwt_from_login(js) -> str | None:
+    return (js or {}).get("data", {}).get("jwt")
+
+
+def jwt_exp(token: str | None) -> float | None:
+    """JWT'nin `exp` (epoch sn) alanı. İmza doğrulanmaz; çözülemezse None."""
+    try:
+        govde = token.split(".")[1]
+        govde += "=" * (-len(govde) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(govde))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+async def mhrs_login_get_token(http, tc: str, sifre: str, logger=None) -> str | None:
+    """
+    TC/Şifre ile MHRS login olur, JWT döner. Başarısızsa None.
+    http: AsyncMhrsClient
+    """
+    try:
+        res = await http.post("login", LOGIN_PATH, login_payload(tc, sifre), headers=LOGIN_HEADERS)
+        if res.status_code != 200:
+            if logger:
+                logger.error("LOGIN HTTP %s - %s", res.status_code, govde_ozeti(res.text))
+            return None
+        return jwt_from_login(res.json())
+    except Exception as e:
+        if logger:
+            logger.error("LOGIN EXC - %s", e)
+        return None
+
+
+def sorgu_anahtari(takip: dict) -> tuple:
+    """Aynı MHRS slot sorgusunu yapan takipleri tek grupta toplamak için anahtar."""
+    return (
+        str(takip["il_id"]),
+        str(takip["ilce_id"]),
+        str(takip["klinik_id"]),
+        str(takip.get("kurum_id", -1)),
+        str(takip.get("hekim_id", -1)),
+    )
+
+
+def gun_farki(takip: dict) -> int:
+    """Kullanıcının seçtiği aralığın gün farkı (kayan pencere genişliği)."""
+    return _gun_farki(takip.get("baslangic_tarihi"), takip.get("bitis_tarihi"))
+
+
+@lru_cache(maxsize=1024)
+def _gun_farki(orj_bas: str | None, orj_bit: str | None) -> int:
+    # Her turda her abone için çağrılır; strptime pahalı
+    try:
+        if orj_bas and orj_bit:
+            orj_bas_dt = datetime.strptime(orj_bas, "%d.%m.%Y")
+            orj_bit_dt = datetime.strptime(orj_bit, "%d.%m.%Y")
+            return max(0, (orj_bit_dt - orj_bas_dt).days)
+    except ValueError:
+        pass
+    return VARSAYILAN_GUN_FARKI
+
+
+def slot_payload(takip: dict, bas_dt: datetime, gun: int) -> dict:
+    """Kayan pencere (bas_dt .. bas_dt + gun) için slot-sorgulama gövdesi."""
+    bit_dt = bas_dt + timedelta(days=gun)
+    return {
+        "aksiyonId": "200",
+        "baslangicZamani": bas_dt.strftime("%Y-%m-%d 08:00:00"),
+        "bitisZamani": bit_dt.strftime("%Y-%m-%d 23:59:59"),
+        "cinsiyet": "F",  # ihtiyaca göre kullanıcıdan alınabilir
+        "ekRandevu": True,
+        "mhrsHekimId": takip.get("hekim_id", -1),
+        "mhrsIlId": takip["il_id"],
+        "mhrsIlceId": takip["ilce_id"],
+        "mhrsKlinikId": takip["klinik_id"],
+        "mhrsKurumId": takip.get("kurum_id", -1),
+        "muayeneYeriId": -1,
+        "randevuZamaniList": [],
+        "tumRandevular": False,
+    }
+
+
+def ilk_uyari(js) -> tuple | None:
+    """MHRS cevabındaki ilk uyarıyı (kodu, düz metin mesaj) olarak döner."""
+    warnings_list = (js or {}).get("warnings") or []
+    if warnings_list and isinstance(warnings_list, list):
+        w0 = warnings_list[0] or {}
+        return w0.get("kodu", "BILINMIYOR"), strip_html(w0.get("mesaj", ""))
+    return None
+
+
+def hata_kodu(js) -> str:
+    """Eski tip hata listesinden (errors/errorList) ilk kodu döner."""
+    hata_list = (js or {}).get("errors") or (js or {}).get("errorList") or []
+    if hata_list and isinstance(hata_list, list):
+        return (hata_list[0] or {}).get("kodu", "BILINMIYOR")
+    return "BILINMIYOR"
+
+
+def randevu_ekle_payload(slot: "Slot") -> dict:
+    return {
+        "fkSlotId": slot.id,
+        "fkCetvelId": slot.cetvel_id,
+        "muayeneYeriId": slot.muayene_yeri_id,
+        "yenidogan": False,
+        "randevuNotu": "",
+        "baslangicZamani": slot.baslangic_zamani,
+        "bitisZamani": slot.bitis_zamani,
+    }
+
+
+def randevu_bilgisi(slot: "Slot", js) -> dict:
+    """
+    Alınan randevunun gösterilecek bilgileri. Slot'taki değerler varsayılandır;
+    MHRS cevabında hekim/klinik/muayene yeri adı varsa onlar kullanılır.
+    """
+    bilgi = {
+        "dt": slot.baslangic,
+        "klinik_adi": slot.klinik_adi or "Bilinmiyor",
+        "hekim_adi": slot.hekim_adi or "Bilinmiyor",
+        "muayene_yeri": slot.muayene_yeri_adi or slot.muayene_yeri_id or "-",
+    }
+    if not js:
+        return bilgi
+
+    data = js.get("data", {}) or {}
+
+    # Hekim adı → "ad" + "soyad"
+    hekim_info = data.get("hekim") or {}
+    ad = (hekim_info.get("ad") or "").strip()
+    soyad = (hekim_info.get("soyad") or "").strip()
+    full_name = (ad + " " + soyad).strip()
+    if full_name:
+        bilgi["hekim_adi"] = full_name
+
+    klinik_info = data.get("klinik") or {}
+    klinik_adi = (klinik_info.get("mhrsKlinikAdi") or klinik_info.get("kisaAdi") or "").strip()
+    if klinik_adi:
+        bilgi["klinik_adi"] = klinik_adi
+
+    muayene_info = data.get("muayeneYeri") or {}
+    muayene_yeri_adi = (muayene_info.get("adi") or "").strip()
+    if muayene_yeri_adi:
+        bilgi["muayene_yeri"] = muayene_yeri_adi
+
+    return bilgi
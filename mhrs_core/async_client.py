@@ -0,0 +1,161 @@
+"""
+prd.mhrs.gov.tr için asyncio-native HTTP istemcisi (takip döngüsü ve Telegram botu).
+
+asyncio.to_thread yerine httpx.AsyncClient kullanır; istekler event loop'u
+bloklamaz ve varsayılan thread havuzunu tüketmez. Uç noktalar kulvarlara
+ayrılır, her kulvarın kendi eşzamanlılık sınırı vardır; böylece sihirbaz
+adımları (ilçe/klinik listeleri) uzun süren slot sorgularının arkasında
+kuyruğa girmez.
+
+Süreç geneli istemci (async_client) tüm upstream istekler için tek bir bütçe
+uygular: saniyede en fazla RATE_PER_SEC istek, en fazla BURST birikir. Jeton
+tur ya da iş başına değil istek başına harcanır; bir tur slot sorgusu, 401
+sonrası tekrarlar, login ve randevu denemeleriyle birden çok istek atabilir.
+
+httpx ilk istekte import edilir.
+"""
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from mhrs_core import metrikler
+from mhrs_core.client import BASE_URL, DEFAULT_TIMEOUT, TIMEOUTS
+from mhrs_core.scheduler import TokenBucket
+
+if TYPE_CHECKING:
+    import httpx
+
+# uç nokta -> kulvar
+LANES = {
+    "slot": "sorgu",
+    "randevu_ekle": "sorgu",
+    "login": "giris",
+    "hasta_bilgisi": "giris",
+    "ilce": "sihirbaz",
+    "klinik": "sihirbaz",
+    "kurum": "sihirbaz",
+    "hekim": "sihirbaz",
+}
+DEFAULT_LANE = "sorgu"
+
+# kulvar -> aynı anda uçuşta olabilecek istek sayısı
+LANE_LIMITS = {
+    "sorgu": 16,
+    "giris": 4,
+    "sihirbaz": 8,
+}
+
+RATE_PER_SEC = 2.0       # tüm takipler için saniyede en fazla upstream istek
+BURST = 5                # bütçe birikebileceği en fazla jeton
+
+
+class AsyncMhrsClient:
+    """
+    Kulvar bazında sınırlı eşzamanlılıkla çalışan async MHRS istemcisi.
+    butce: her istekten önce jeton alınan TokenBucket; None ise sınırsız.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, lane_limits: dict | None = None, butce: TokenBucket | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.butce = butce
+        self.lane_limits = dict(LANE_LIMITS)
+        if lane_limits:
+            self.lane_limits.update(lane_limits)
+        self._http = None
+        self._sems = {}
+        self._aktif = {lane: 0 for lane in self.lane_limits}
+        self._bekleyen = {lane: 0 for lane in self.lane_limits}
+        self._istekler = {}  # uç nokta -> istek sayısı
+        # Kulvar doluluğu (aktif/limit, sırada bekleyen) kazıma anında okunur
+        metrikler.metrikler.gosterge("mhrs_kulvar_aktif", "Kulvarda uçuşta olan istekler", ("kulvar",),
+                                     lambda: dict(self._aktif))
+        metrikler.metrikler.gosterge("mhrs_kulvar_bekleyen", "Kulvar sırasında bekleyen istekler", ("kulvar",),
+                                     lambda: dict(self._bekleyen))
+        metrikler.metrikler.gosterge("mhrs_kulvar_limit", "Kulvarın eşzamanlılık sınırı", ("kulvar",),
+                                     lambda: dict(self.lane_limits))
+
+    def _client(self) -> "httpx.AsyncClient":
+        # Kulvar sınırlarının toplamı kadar bağlantı: bir kulvar doluyken
+        # diğerleri havuzda bağlantı beklemez.
+        if self._http is None:
+            import httpx
+
+            toplam = sum(self.lane_limits.values())
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=toplam, max_keepalive_connections=toplam),
+            )
+        return self._http
+
+    def _sem(self, lane: str) -> asyncio.Semaphore:
+        sem = self._sems.get(lane)
+        if sem is None:
+            sem = self._sems[lane] = asyncio.Semaphore(self.lane_limits[lane])
+        return sem
+
+    async def request(self, method: str, endpoint: str, path: str, headers: dict | None = None,
+                      payload: dict | None = None) -> "httpx.Response":
+        lane = LANES.get(endpoint, DEFAULT_LANE)
+        connect, read = TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+        self._istekler[endpoint] = self._istekler.get(endpoint, 0) + 1
+
+        self._bekleyen[lane] += 1
+        bas = time.monotonic()
+        try:
+            if self.butce is not None:
+                await self.butce.acquire()
+                metrikler.butce_bekleme.gozlem(time.monotonic() - bas)
+            await self._sem(lane).acquire()
+        finally:
+            self._bekleyen[lane] -= 1
+        metrikler.kulvar_bekleme.gozlem(time.monotonic() - bas, lane)
+
+        self._aktif[lane] += 1
+        bas = time.monotonic()
+        durum = "hata"
+        try:
+            import httpx
+
+            res = await self._client().request(
+                method,
+                path,
+                headers=headers,
+                json=payload,
+                timeout=httpx.Timeout(read, connect=connect),
+            )
+            durum = res.status_code
+            return res
+        finally:
+            self._aktif[lane] -= 1
+            self._sem(lane).release()
+            metrikler.http_sure.gozlem(time.monotonic() - bas, endpoint)
+            metrikler.http_istek.artir(endpoint, durum)
+
+    async def get(self, endpoint: str, path: str, headers: dict | None = None) -> "httpx.Response":
+        return await self.request("GET", endpoint, path, headers=headers)
+
+    async def post(self, endpoint: str, path: str, payload: dict, headers: dict | None = None) -> "httpx.Response":
+        return await self.request("POST", endpoint, path, headers=headers, payload=payload)
+
+    def pool_stats(self) -> dict:
+        """Uç nokta bazında istek sayıları ve kulvar başına aktif/bekleyen istekler."""
+        return {
+            "istekler": dict(self._istekler),
+            "kulvarlar": {
+                lane: {
+                    "limit": limit,
+                    "aktif": self._aktif[lane],
+                    "bekleyen": self._bekleyen[lane],
+                }
+                for lane, limit in self.lane_limits.items()
+            },
+        }
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# Süreç geneli paylaşılan async istemci; tüm upstream isteklerin bütçesi burada
+async_client = AsyncMhrsClient(butce=TokenBucket(RATE_PER_SEC, BURST))
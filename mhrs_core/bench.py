@@ -0,0 +1,452 @@
+"""
+Ayrıştırıcı, zamanlayıcı ve sorgu/randevu yolu için tekrarlanabilir ölçümler.
+
+    python -m mhrs_core.bench                    # hepsi; bench/taban.json ile karşılaştırır
+    python -m mhrs_core.bench ayristirma tur     # sadece seçilen ölçümler
+    python -m mhrs_core.bench --kaydet           # sonuçları yeni taban olarak yazar
+
+Ölçümler:
+  - ayristirma:  binlerce hekim/saat/slot düğümlü sentetik slot-sorgulama
+                 cevabında json.loads, bos_slotlar ve SlotSnapshot
+  - tur:         sahte (ağ yok) cevaplarla takip_dongusu → randevu_sorgula turu;
+                 boş cevap ve boş slotu olmayan tam ağaç
+  - zamanlayici: 10k işli Scheduler'da dağıtım başına CPU ve gecikme
+  - uctan_uca:   yerel sahte MHRS'ye (mhrs_core.stub) karşı slot açıldıktan
+                 sonra sorgudan bildirime / randevuya kadar geçen süre
+  - bellek:      takip başına ayrılan bellek (tracemalloc)
+
+Girdiler sabit tohumla üretilir; süre ölçümlerinde tekrarların en iyisi alınır.
+Taban bir makineye özgüdür: başka makinede önce --kaydet ile taban alınmalıdır.
+Tabana göre TOLERANS'tan fazla kötüleşen ölçüm varsa çıkış kodu 1'dir. Milisaniye
+altı ölçümlerde oran gürültüye çok duyarlıdır (1.0 → 1.2 ms %20'dir); bu yüzden
+her ölçümün ayrıca kendi biriminde bir mutlak eşiği vardır, farkı bunu
+geçmeyen kötüleşme gerileme sayılmaz.
+
+Loglama kurulmaz (olay()/kullanıcı logları yazılmaz); ölçülen, yolun kendisidir.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from mhrs_core import api, metrikler
+from mhrs_core.scheduler import Scheduler
+from mhrs_core.slots import SlotSnapshot, bos_slotlar
+from mhrs_core.stub import MESAI_SAATLERI, SLOT_DAKIKA, MhrsStub, slot_agaci
+from mhrs_core.takip import Bildirici, TakipServisi
+
+BENCH_TABAN = os.path.join("bench", "taban.json")
+TOLERANS = 0.20   # tabandan bu orandan fazla kötüleşme gerileme sayılır
+TOHUM = 0
+
+ARTAN, AZALAN = "+", "-"   # ölçüm için hangi yön iyidir
+
+# ölçüm -> (birim, iyi yön, mutlak eşik: bundan küçük fark gürültü sayılır, birim cinsinden)
+OLCUMLER = {
+    "ayristirma_json_ms": ("ms", AZALAN, 1.0),
+    "ayristirma_slot_sn": ("slot/sn", ARTAN, 0),
+    "ayristirma_bos_slot_sn": ("boş slot/sn", ARTAN, 0),
+    "ayristirma_snapshot_ms": ("ms", AZALAN, 0.25),
+    "tur_bos_cevap_us": ("µs", AZALAN, 50.0),
+    "tur_dolu_agac_ms": ("ms", AZALAN, 0.25),
+    "zamanlayici_ekle_us": ("µs", AZALAN, 0.5),
+    "zamanlayici_dagitim_cpu_us": ("µs", AZALAN, 5.0),
+    "zamanlayici_gecikme_ort_ms": ("ms", AZALAN, 0.5),
+    "uctan_uca_bildirim_p50_ms": ("ms", AZALAN, 0.5),
+    "uctan_uca_bildirim_p90_ms": ("ms", AZALAN, 0.5),
+    "uctan_uca_randevu_p50_ms": ("ms", AZALAN, 0.5),
+    "bellek_takip_bayt": ("bayt", AZALAN, 64),
+    "bellek_ortak_anahtar_takip_bayt": ("bayt", AZALAN, 64),
+}
+
+
+def _en_iyi(fn, tekrar: int) -> float:
+    """fn'i `tekrar` kez çalıştırır, en kısa süreyi (sn) döner."""
+    en_iyi = float("inf")
+    for _ in range(tekrar):
+        gc.collect()
+        bas = time.perf_counter()
+        fn()
+        en_iyi = min(en_iyi, time.perf_counter() - bas)
+    return en_iyi
+
+
+def _yuzdelik(degerler: list, oran: float) -> float:
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(oran * len(sirali)))]
+
+
+def sentetik_cevap(hekim_sayisi: int, gun: int, bos_orani: float, bas: datetime, tohum: int = TOHUM) -> bytes:
+    """hekim × iş günü × mesai saati × 15 dk slotlu slot-sorgulama cevabı (JSON)."""
+    rng = random.Random(tohum)
+    slotlar = []
+    for h in range(hekim_sayisi):
+        hekim = {"mhrsHekimId": 1000 + h, "ad": f"Hekim{h}", "soyad": "Test"}
+        kurum = {"mhrsKurumId": 100 + h % 5, "kurumAdi": f"Kurum {h % 5}"}
+        yer = {"id": 5000 + h, "adi": f"{h}. Poliklinik"}
+        for g in range(1, gun + 1):
+            tarih = bas + timedelta(days=g)
+            if tarih.weekday() >= 5:
+                continue
+            for saat in MESAI_SAATLERI:
+                for dakika in range(0, 60, SLOT_DAKIKA):
+                    dt = tarih.replace(hour=saat, minute=dakika)
+                    slotlar.append({
+                        "hekim": hekim, "kurum": kurum, "muayene_yeri": yer,
+                        "id": int(f"{hekim['mhrsHekimId']}{dt:%y%m%d%H%M}"), "cetvel_id": h,
+                        "baslangic": dt, "bos": rng.random() < bos_orani,
+                    })
+    return json.dumps({"success": True, "data": slot_agaci(slotlar), "warnings": [], "errors": []}).encode()
+
+
+# ===========================
+# Ölçümler
+# ===========================
+def ayristirma(tekrar: int) -> dict:
+    bas = datetime(2030, 1, 7)
+    govde = sentetik_cevap(hekim_sayisi=40, gun=30, bos_orani=0.25, bas=bas)
+    js = json.loads(govde)
+    data = js["data"]
+    slot_sayisi = sum(
+        len(saat["slotList"])
+        for hekim in data[0]["hekimSlotList"]
+        for yer in hekim["muayeneYeriSlotList"]
+        for saat in yer["saatSlotList"]
+    )
+    bos = list(bos_slotlar(data, "Klinik", now=bas))
+
+    json_sn = _en_iyi(lambda: json.loads(govde), tekrar)
+    ayristirma_sn = _en_iyi(lambda: list(bos_slotlar(data, "Klinik", now=bas)), tekrar)
+
+    # Ardışık iki cevap: ikincisinde slotların %1'i kapanmış
+    ikinci = [s for i, s in enumerate(bos) if i % 100]
+
+    def snapshot_turu():
+        snapshot = SlotSnapshot()
+        snapshot.guncelle(bos)
+        snapshot.guncelle(ikinci)
+
+    return {
+        "ayristirma_json_ms": json_sn * 1000,
+        "ayristirma_slot_sn": slot_sayisi / ayristirma_sn,
+        "ayristirma_bos_slot_sn": len(bos) / ayristirma_sn,
+        "ayristirma_snapshot_ms": _en_iyi(snapshot_turu, tekrar) * 1000,
+        "_not": f"{len(govde) // 1024} KB cevap, {slot_sayisi} slot, {len(bos)} boş",
+    }
+
+
+class _Cevap:
+    """httpx.Response yerine: json() her çağrıda gövdeyi yeniden çözer."""
+
+    def __init__(self, status_code: int, govde: bytes):
+        self.status_code = status_code
+        self._govde = govde
+
+    @property
+    def text(self) -> str:
+        return self._govde.decode()
+
+    def json(self):
+        return json.loads(self._govde)
+
+
+class _SahteHttp:
+    def __init__(self, govde: bytes):
+        self.cevap = _Cevap(200, govde)
+
+    async def post(self, endpoint, path, payload, headers=None):
+        return self.cevap
+
+
+def _takip(i: int, il: int = 34, **ek) -> dict:
+    return {
+        "il_id": str(il), "ilce_id": 3400 + i, "klinik_id": 165, "klinik_adi": "Dahiliye (İç Hastalıkları)",
+        "kurum_id": -1, "kurum_adi": "Farketmez", "hekim_id": -1, "hekim_adi": "Farketmez",
+        "otomatik": False, "token": "x.y.z",
+        "baslangic_tarihi": "01.01.2030", "bitis_tarihi": "31.01.2030",
+        "siralama": {"tip": "erken"}, "filtre": None, **ek,
+    }
+
+
+def tur(tekrar: int) -> dict:
+    bos_govde = json.dumps({"success": True, "data": [], "warnings": [], "errors": []}).encode()
+    # Slotların hepsi dolu: ağacın tamamı gezilir ama bildirim yapılmaz (en sık tur)
+    dolu_govde = sentetik_cevap(hekim_sayisi=10, gun=15, bos_orani=0.0, bas=datetime.now())
+
+    async def olc(govde: bytes, anahtar_sayisi: int, tur_sayisi: int) -> float:
+        servis = TakipServisi(Bildirici(), http=_SahteHttp(govde))
+        anahtarlar = []
+        for i in range(anahtar_sayisi):
+            for _ in range(5):
+                servis.takip_ekle(i, f"u{i}", _takip(i))
+            anahtarlar.append(api.sorgu_anahtari(_takip(i)))
+        en_iyi = float("inf")
+        for _ in range(tekrar):
+            gc.collect()
+            bas = time.perf_counter()
+            for _ in range(tur_sayisi):
+                for anahtar in anahtarlar:
+                    await servis.takip_dongusu(anahtar)
+            en_iyi = min(en_iyi, (time.perf_counter() - bas) / (tur_sayisi * anahtar_sayisi))
+        return en_iyi
+
+    async def hepsi():
+        return await olc(bos_govde, 200, 10), await olc(dolu_govde, 20, 2)
+
+    bos_sn, dolu_sn = asyncio.run(hepsi())
+    return {
+        "tur_bos_cevap_us": bos_sn * 1e6,
+        "tur_dolu_agac_ms": dolu_sn * 1000,
+        "_not": f"anahtar başına 5 takip; dolu ağaç {len(dolu_govde) // 1024} KB",
+    }
+
+
+def zamanlayici(tekrar: int, is_sayisi: int = 10_000, sure: float = 3.0) -> dict:
+    async def olc():
+        sched = Scheduler()
+        rng = random.Random(TOHUM)
+
+        async def is_():
+            return rng.uniform(0.5, 1.5)
+
+        # Ekleme: başlatılmamış yeni zamanlayıcılarda, tekrarların en iyisi
+        gecikmeler = [rng.uniform(0, 1) for _ in range(is_sayisi)]
+        ekle = float("inf")
+        for _ in range(tekrar):
+            bos = Scheduler()
+            gc.collect()
+            bas = time.perf_counter()
+            for i, gecikme in enumerate(gecikmeler):
+                bos.schedule(i, is_, delay=gecikme)
+            ekle = min(ekle, (time.perf_counter() - bas) / is_sayisi)
+
+        await sched.start()
+        for i, gecikme in enumerate(gecikmeler):
+            sched.schedule(i, is_, delay=gecikme)
+
+        await asyncio.sleep(1)   # ısınma
+        dagitilan, cpu = sched.dispatched, time.process_time()
+        toplam, adet = metrikler.zamanlayici_gecikme.toplamlar().get((), (0.0, 0))
+        sched.late_max = 0.0
+        await asyncio.sleep(sure)
+        dagitilan, cpu = sched.dispatched - dagitilan, time.process_time() - cpu
+        # Ortalama gecikme pencere içindeki tüm dağıtımlardan (late_avg yalnızca son işleri yansıtır)
+        son_toplam, son_adet = metrikler.zamanlayici_gecikme.toplamlar()[()]
+        gecikme_ort = (son_toplam - toplam) / max(1, son_adet - adet)
+        sonuc = (ekle, cpu / max(1, dagitilan), gecikme_ort, sched.late_max, dagitilan / sure)
+        await sched.stop()
+        return sonuc
+
+    sonuclar = [asyncio.run(olc()) for _ in range(max(1, tekrar // 2))]
+    ekle, cpu, gecikme_ort, gecikme_max, hiz = min(sonuclar, key=lambda s: s[1])
+    # En büyük gecikme işletim sistemi gürültüsüne bağlı; tabanla karşılaştırılmaz, notta verilir
+    return {
+        "zamanlayici_ekle_us": ekle * 1e6,
+        "zamanlayici_dagitim_cpu_us": cpu * 1e6,
+        "zamanlayici_gecikme_ort_ms": gecikme_ort * 1000,
+        "_not": f"{is_sayisi} iş, ~{hiz:.0f} dağıtım/sn, en büyük gecikme {gecikme_max * 1000:.1f} ms",
+    }
+
+
+class _KronometreBildirici(Bildirici):
+    def __init__(self):
+        self.zaman = None
+
+    async def randevu_bulundu(self, user_id, slot):
+        self.zaman = time.perf_counter()
+
+    async def randevu_alindi(self, user_id, bilgi):
+        self.zaman = time.perf_counter()
+
+
+def uctan_uca(tekrar: int, ornek: int = 40) -> dict:
+    from mhrs_core.async_client import AsyncMhrsClient
+
+    async def olc():
+        stub = MhrsStub(baslangic_bos=0, acilma_araligi=0, tohum=TOHUM)
+        sunucu = await stub.baslat(port=0)
+        http = AsyncMhrsClient(f"http://127.0.0.1:{sunucu.sockets[0].getsockname()[1]}")
+        token = await api.mhrs_login_get_token(http, "11111111111", "bench")
+        bildirici = _KronometreBildirici()
+        servis = TakipServisi(bildirici, http=http)
+        sureler = {False: [], True: []}
+        try:
+            for i in range(ornek * 2):
+                otomatik = bool(i % 2)
+                bugun = datetime.now().strftime("%d.%m.%Y")
+                takip = _takip(i, otomatik=otomatik, token=token, baslangic_tarihi=bugun,
+                               bitis_tarihi=(datetime.now() + timedelta(days=15)).strftime("%d.%m.%Y"))
+                servis.takip_ekle(i, f"u{i}", takip)
+                anahtar = api.sorgu_anahtari(takip)
+                await servis.randevu_sorgula(anahtar)   # ilk cevap: boş
+                stub.slot_ac(anahtar)
+                bildirici.zaman = None
+                bas = time.perf_counter()
+                await servis.randevu_sorgula(anahtar)
+                if bildirici.zaman is not None:
+                    sureler[otomatik].append(bildirici.zaman - bas)
+                servis.kullanici_durdur(i)
+        finally:
+            await http.aclose()
+            sunucu.close()
+        return sureler
+
+    en_iyi = None
+    for _ in range(max(1, tekrar // 2)):
+        sureler = asyncio.run(olc())
+        if en_iyi is None or _yuzdelik(sureler[False], 0.5) < _yuzdelik(en_iyi[False], 0.5):
+            en_iyi = sureler
+    return {
+        "uctan_uca_bildirim_p50_ms": _yuzdelik(en_iyi[False], 0.5) * 1000,
+        "uctan_uca_bildirim_p90_ms": _yuzdelik(en_iyi[False], 0.9) * 1000,
+        "uctan_uca_randevu_p50_ms": _yuzdelik(en_iyi[True], 0.5) * 1000,
+        "_not": f"{len(en_iyi[False])} bildirim + {len(en_iyi[True])} randevu örneği, gecikmesiz yerel stub",
+    }
+
+
+def bellek(tekrar: int, adet: int = 10_000) -> dict:
+    async def olc(ortak: int) -> float:
+        servis = TakipServisi(Bildirici(), http=_SahteHttp(b"{}"))
+        takipler = [_takip(i // ortak, tc=f"{10_000_000_000 + i}", sifre="x") for i in range(adet)]
+        gc.collect()
+        tracemalloc.start()
+        once = tracemalloc.get_traced_memory()[0]
+        for i, takip in enumerate(takipler):
+            servis.takip_ekle(i, f"u{i}", takip)
+        gc.collect()
+        sonra = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (sonra - once) / adet
+
+    async def hepsi():
+        return await olc(1), await olc(5)
+
+    tekil, ortak = asyncio.run(hepsi())
+    return {
+        "bellek_takip_bayt": tekil,
+        "bellek_ortak_anahtar_takip_bayt": ortak,
+        "_not": f"{adet} takip (takip dict'i hariç; kayıt, abonelik, zamanlayıcı, oturum)",
+    }
+
+
+OLCUM_GRUPLARI = {
+    "ayristirma": ayristirma,
+    "tur": tur,
+    "zamanlayici": zamanlayici,
+    "uctan_uca": uctan_uca,
+    "bellek": bellek,
+}
+
+
+# ===========================
+# Taban
+# ===========================
+def ortam() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "islemci": platform.processor() or platform.machine(),
+        "cpu": os.cpu_count(),
+    }
+
+
+def tabani_oku(yol: str) -> dict | None:
+    if not os.path.exists(yol):
+        return None
+    with open(yol, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tabani_yaz(yol: str, sonuclar: dict, onceki: dict | None = None):
+    """Sonuçları tabana yazar; ölçülmeyen gruplar önceki tabandan korunur."""
+    olcumler = dict((onceki or {}).get("olcumler", {}))
+    olcumler.update(sonuclar)
+    os.makedirs(os.path.dirname(yol) or ".", exist_ok=True)
+    with open(yol, "w", encoding="utf-8") as f:
+        json.dump({
+            "tarih": datetime.now().isoformat(timespec="seconds"),
+            "ortam": ortam(),
+            "olcumler": {ad: round(deger, 3) for ad, deger in sorted(olcumler.items())},
+        }, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def karsilastir(sonuclar: dict, taban: dict | None, tolerans: float = TOLERANS) -> list:
+    """(ölçüm, değer, taban değeri, değişim oranı, gerileme mi) satırları."""
+    taban_olcumler = (taban or {}).get("olcumler", {})
+    satirlar = []
+    for ad, deger in sonuclar.items():
+        onceki = taban_olcumler.get(ad)
+        if not onceki:
+            satirlar.append((ad, deger, None, None, False))
+            continue
+        _, yon, esik = OLCUMLER[ad]
+        degisim = deger / onceki - 1
+        # Değişim, iyi yöne göre işaretlenir: pozitif = iyileşme
+        iyilesme = degisim if yon == ARTAN else -degisim
+        satirlar.append((ad, deger, onceki, iyilesme, iyilesme < -tolerans and abs(deger - onceki) > esik))
+    return satirlar
+
+
+def yazdir(satirlar: list, notlar: dict, cikti=sys.stdout):
+    def yaz(s=""):
+        print(s, file=cikti)
+
+    yaz(f"{'ölçüm':<34} {'değer':>14} {'taban':>14}  değişim")
+    for ad, deger, onceki, iyilesme, gerileme in satirlar:
+        birim = OLCUMLER[ad][0]
+        taban_metni = f"{onceki:>14,.1f}" if onceki else f"{'-':>14}"
+        degisim = "" if iyilesme is None else f"{iyilesme * 100:+.1f}%"
+        isaret = "  ⚠️ GERİLEME" if gerileme else ""
+        yaz(f"{ad:<34} {deger:>14,.1f} {taban_metni}  {degisim:<8} {birim}{isaret}")
+    for grup, not_ in notlar.items():
+        yaz(f"  {grup}: {not_}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="MHRS takip ölçümleri")
+    parser.add_argument("gruplar", nargs="*", help=f"ölçüm grupları: {', '.join(OLCUM_GRUPLARI)} (boş: hepsi)")
+    parser.add_argument("--taban", default=BENCH_TABAN, help="taban dosyası")
+    parser.add_argument("--kaydet", action="store_true", help="sonuçları taban olarak yaz")
+    parser.add_argument("--tekrar", type=int, default=5, help="süre ölçümlerinde tekrar sayısı")
+    parser.add_argument("--tolerans", type=float, default=TOLERANS, help="gerileme sayılan kötüleşme oranı")
+    parser.add_argument("--json", action="store_true", help="sonuçları JSON olarak yaz")
+    args = parser.parse_args(argv)
+    bilinmeyen = [g for g in args.gruplar if g not in OLCUM_GRUPLARI]
+    if bilinmeyen:
+        parser.error(f"bilinmeyen ölçüm grubu: {', '.join(bilinmeyen)}")
+
+    sonuclar, notlar = {}, {}
+    for grup in args.gruplar or OLCUM_GRUPLARI:
+        print(f"⏱️  {grup}...", file=sys.stderr)
+        olcum = OLCUM_GRUPLARI[grup](args.tekrar)
+        notlar[grup] = olcum.pop("_not", "")
+        sonuclar.update(olcum)
+
+    taban = tabani_oku(args.taban)
+    if taban and taban.get("ortam") != ortam():
+        print(f"⚠️ Taban farklı bir ortamda alınmış: {taban.get('ortam')}", file=sys.stderr)
+    satirlar = karsilastir(sonuclar, taban, args.tolerans)
+
+    if args.json:
+        json.dump({"olcumler": sonuclar, "notlar": notlar}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        yazdir(satirlar, notlar)
+
+    if args.kaydet:
+        tabani_yaz(args.taban, sonuclar, taban)
+        print(f"💾 Taban yazıldı: {args.taban}", file=sys.stderr)
+        return 0
+    return 1 if any(gerileme for *_, gerileme in satirlar) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
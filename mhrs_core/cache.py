@@ -0,0 +1,209 @@
+"""
+Referans verileri (ilçe, klinik, kurum, hekim listeleri) için TTL + LRU önbellek.
+
+Listeler nadiren değişir; bu yüzden hem bellekte hem diskte tutulur ve iki giriş
+noktası da aynı dosyayı kullanır. Süresi dolan kayıt hemen döndürülür ve arka
+planda yenilenir (stale-while-revalidate); kayıt hiç yoksa ya da çok eskiyse
+MHRS'ye senkron gidilir.
+
+Anahtarlar verinin geldiği MHRS adresiyle (kaynak) ön eklenir; gerçek MHRS
+dışındaki adresler (ör. yerel sahte sunucu, bkz. mhrs_core.stub) ayrıca kendi
+dosyalarına yazılır. Sahte sunucunun listeleri gerçeklerin yerine dönmez.
+
+Her kayıt dosyanın tamamını yeniden yazar. Async yolda (aget_or_fetch) bu yazım
+event loop'u tutmasın diye asyncio.to_thread ile bir thread'de yapılır; bellek
+hemen güncellenir, dosyaya kilit altında alınan anlık görüntü yazılır. Sürüm
+numarası sayesinde geç biten eski bir yazım yenisinin üstüne yazamaz.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from mhrs_core.client import BASE_URL, VARSAYILAN_BASE_URL
+from mhrs_core.saat import Saat, gercek_saat
+
+CACHE_PATH = os.path.join("cache", "referans.json")
+TTL_SECONDS = 24 * 60 * 60        # bu süreden sonra arka planda yenilenir
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60  # bu süreden eski kayıt hiç kullanılmaz
+MAX_ENTRIES = 1024
+
+
+def kaynak_yolu(kaynak: str) -> str:
+    """MHRS adresinin önbellek dosyası; gerçek MHRS için CACHE_PATH."""
+    kaynak = kaynak.rstrip("/")
+    if kaynak == VARSAYILAN_BASE_URL:
+        return CACHE_PATH
+    ad = re.sub(r"[^A-Za-z0-9]+", "_", kaynak.split("://", 1)[-1]).strip("_")
+    return os.path.join(os.path.dirname(CACHE_PATH), f"referans-{ad}.json")
+
+
+class RefCache:
+    def __init__(self, path: str | None = None, ttl: float = TTL_SECONDS,
+                 max_age: float = MAX_AGE_SECONDS, max_entries: int = MAX_ENTRIES, kaynak: str = BASE_URL,
+                 saat: Saat = gercek_saat):
+        # path verilmezse kaynağa göre seçilir ve kaynak değişince onunla değişir
+        self._kaynak_yolu = path is None
+        self.kaynak = kaynak.rstrip("/")
+        self.path = kaynak_yolu(self.kaynak) if path is None else path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.saat = saat
+        self._data = OrderedDict()  # anahtar -> (kaydedilme zamanı, değer)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._dosya_lock = threading.Lock()
+        self._surum = 0           # her put'ta artar
+        self._yazilan_surum = 0   # diske en son yazılan görüntünün sürümü
+        self._yenileniyor = set()
+        self.hit = 0
+        self.stale = 0
+        self.miss = 0
+
+    # ----- disk -----
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                kayitlar = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, (ts, value) in sorted(kayitlar.items(), key=lambda kv: kv[1][0]):
+            self._data[key] = (ts, value)
+        self._evict()
+
+    def _save(self, surum: int, path: str, kayitlar: dict):
+        """Anlık görüntüyü yazar; daha yeni bir sürüm zaten yazıldıysa hiçbir şey yapmaz."""
+        with self._dosya_lock:
+            if surum <= self._yazilan_surum:
+                return
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp = f"{path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(kayitlar, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except OSError:
+                return
+            self._yazilan_surum = surum
+
+    def _evict(self):
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    # ----- temel işlemler -----
+    def kaynak_ayarla(self, base_url: str):
+        """Bundan sonraki kayıtların geldiği MHRS adresi; gerekirse önbellek dosyası da değişir."""
+        with self._lock:
+            self.kaynak = base_url.rstrip("/")
+            if self._kaynak_yolu and self.path != kaynak_yolu(self.kaynak):
+                self.path = kaynak_yolu(self.kaynak)
+                self._data.clear()
+                self._loaded = False
+
+    def _tam_anahtar(self, key: str) -> str:
+        return f"{self.kaynak}|{key}"
+
+    def _lookup(self, key: str):
+        """(değer, yenilenmeli_mi) döner; kullanılabilir kayıt yoksa None."""
+        key = self._tam_anahtar(key)
+        with self._lock:
+            self._load()
+            kayit = self._data.get(key)
+            if kayit is None:
+                self.miss += 1
+                return None
+            yas = self.saat.zaman() - kayit[0]
+            if yas >= self.max_age:
+                self.miss += 1
+                return None
+            self._data.move_to_end(key)
+            if yas >= self.ttl:
+                self.stale += 1
+                return kayit[1], True
+            self.hit += 1
+            return kayit[1], False
+
+    def _ekle(self, key: str, value) -> tuple:
+        """Belleği günceller; diske yazılacak (sürüm, yol, görüntü) üçlüsünü döner."""
+        key = self._tam_anahtar(key)
+        with self._lock:
+            self._load()
+            self._data[key] = (self.saat.zaman(), value)
+            self._data.move_to_end(key)
+            self._evict()
+            self._surum += 1
+            return self._surum, self.path, dict(self._data)
+
+    def put(self, key: str, value):
+        self._save(*self._ekle(key, value))
+
+    async def aput(self, key: str, value):
+        """put'un async karşılığı; dosya yazımı event loop dışında yapılır."""
+        await asyncio.to_thread(self._save, *self._ekle(key, value))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hit": self.hit,
+                "stale": self.stale,
+                "miss": self.miss,
+                "boyut": len(self._data),
+            }
+
+    # ----- PC (senkron) -----
+    def get_or_fetch(self, key: str, fetch):
+        """fetch() sadece kayıt yoksa senkron çağrılır; eskimişse arka planda thread ile."""
+        bulunan = self._lookup(key)
+        if bulunan is None:
+            value = fetch()
+            self.put(key, value)
+            return value
+
+        value, yenile = bulunan
+        if yenile and key not in self._yenileniyor:
+            self._yenileniyor.add(key)
+
+            def _yenile():
+                try:
+                    self.put(key, fetch())
+                except Exception:
+                    pass
+                finally:
+                    self._yenileniyor.discard(key)
+
+            threading.Thread(target=_yenile, daemon=True).start()
+        return value
+
+    # ----- Telegram (async) -----
+    async def aget_or_fetch(self, key: str, fetch):
+        """fetch bir coroutine fonksiyonudur; eskimiş kayıt arka plan task'ı ile yenilenir."""
+        bulunan = self._lookup(key)
+        if bulunan is None:
+            value = await fetch()
+            await self.aput(key, value)
+            return value
+
+        value, yenile = bulunan
+        if yenile and key not in self._yenileniyor:
+            self._yenileniyor.add(key)
+
+            async def _yenile():
+                try:
+                    await self.aput(key, await fetch())
+                except Exception:
+                    pass
+                finally:
+                    self._yenileniyor.discard(key)
+
+            asyncio.create_task(_yenile())
+        return value
+
+
+# Her iki giriş noktasının paylaştığı referans önbelleği
+ref_cache = RefCache()
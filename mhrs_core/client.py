@@ -0,0 +1,130 @@
+"""
+prd.mhrs.gov.tr için ortak HTTP istemcisi.
+
+Tek bir requests.Session üzerinden keep-alive bağlantı havuzu tutar; böylece
+her sorgu yeni bir TLS el sıkışması yerine tek bir gidiş-dönüş maliyetindedir.
+Her uç noktanın kendi bağlantı/okuma zaman aşımı vardır.
+
+requests ilk istekte import edilir; import etmek tek başına maliyetsizdir.
+
+Adres MHRS_BASE_URL ortam değişkeniyle değiştirilebilir (ör. yerel sahte
+sunucu için http://127.0.0.1:8080, bkz. mhrs_core.stub).
+"""
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+VARSAYILAN_BASE_URL = "https://prd.mhrs.gov.tr"
+BASE_URL = os.environ.get("MHRS_BASE_URL", "").strip() or VARSAYILAN_BASE_URL
+
+# uç nokta -> (bağlantı, okuma) zaman aşımı, saniye
+TIMEOUTS = {
+    "login": (5, 20),
+    "hasta_bilgisi": (5, 20),
+    "ilce": (5, 25),
+    "klinik": (5, 25),
+    "kurum": (5, 25),
+    "hekim": (5, 25),
+    "slot": (5, 25),
+    "randevu_ekle": (5, 20),
+}
+DEFAULT_TIMEOUT = (5, 25)
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+
+class MhrsClient:
+    """Bağlantı havuzlu MHRS istemcisi. Thread-safe kullanılabilir."""
+
+    def __init__(self, base_url: str = BASE_URL, pool_maxsize: int = POOL_MAXSIZE):
+        self.base_url = base_url.rstrip("/")
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._adapter = None
+        self._lock = threading.Lock()
+        self._istekler = {}  # uç nokta -> istek sayısı
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    self._adapter = HTTPAdapter(
+                        pool_connections=POOL_CONNECTIONS,
+                        pool_maxsize=self.pool_maxsize,
+                        pool_block=False,
+                        max_retries=0,
+                    )
+                    session.mount("https://", self._adapter)
+                    session.mount("http://", self._adapter)
+                    self._session = session
+        return self._session
+
+    def _url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def _say(self, endpoint: str):
+        with self._lock:
+            self._istekler[endpoint] = self._istekler.get(endpoint, 0) + 1
+
+    def get(self, endpoint: str, path: str, headers: dict | None = None) -> "requests.Response":
+        self._say(endpoint)
+        return self.session.get(
+            self._url(path),
+            headers=headers,
+            timeout=TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT),
+        )
+
+    def post(self, endpoint: str, path: str, payload: dict, headers: dict | None = None) -> "requests.Response":
+        self._say(endpoint)
+        return self.session.post(
+            self._url(path),
+            headers=headers,
+            json=payload,
+            timeout=TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT),
+        )
+
+    def pool_stats(self) -> dict:
+        """
+        Havuz istatistikleri:
+          - istekler: uç nokta bazında gönderilen istek sayısı
+          - yeni_baglanti: açılan TCP/TLS bağlantı sayısı
+          - yeniden_kullanim: mevcut bağlantı üzerinden giden istek sayısı
+          - bosta: havuzda bekleyen boşta bağlantı sayısı
+        """
+        yeni = toplam = bosta = 0
+        pools = self._adapter.poolmanager.pools if self._adapter is not None else {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            yeni += pool.num_connections
+            toplam += pool.num_requests
+            if pool.pool is not None:
+                bosta += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        with self._lock:
+            istekler = dict(self._istekler)
+        return {
+            "istekler": istekler,
+            "yeni_baglanti": yeni,
+            "yeniden_kullanim": max(0, toplam - yeni),
+            "bosta": bosta,
+        }
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+# Her iki giriş noktasının paylaştığı süreç geneli istemci
+client = MhrsClient()
@@ -0,0 +1,186 @@
+"""
+MHRS hata cevaplarına göre devre kesici (circuit breaker).
+
+Slot sorgusunun sonucu önce sınıflandırılır (HTTP durum kodu + MHRS uyarı
+kodu), sonra iki devreye işlenir: sorgu anahtarının kendi devresi ve tüm
+anahtarların paylaştığı genel devre. Üst üste yeterince hata gelen devre
+açılır; açıkken sorgu atılmaz, anahtar zamanlayıcıda dinlenir. Açık kalma
+süresi her açılışta ikiye katlanır (tavana kadar). Süre dolunca devre yarı
+açık olur: tek bir deneme sorgusu geçer, başarılıysa devre kapanır,
+değilse daha uzun süre için yeniden açılır.
+
+Böylece MHRS bakımda ya da bizi reddederken boşa giden istek neredeyse sıfıra
+iner; tek bir anahtarın sorunu diğerlerini durdurmaz.
+"""
+import random
+
+from mhrs_core.logs import http_logger
+from mhrs_core.saat import Saat, gercek_saat
+
+# Sonuç sınıfları
+BASARI = "basari"    # 200: slot bulunsun bulunmasın sorgu çalıştı
+OTURUM = "oturum"    # 401: oturum yöneticisinin işi, devreyi etkilemez
+RET = "ret"          # MHRS isteği reddetti (4xx / uyarı kodu)
+SUNUCU = "sunucu"    # 5xx, 429, zaman aşımı, bağlantı hatası
+
+# Cevap kodundan bağımsız sınıflanan MHRS uyarı kodları
+UYARI_SINIFLARI = {
+    "RND4034": RET,
+}
+
+ANAHTAR_ESIK = 3            # anahtar devresi: üst üste bu kadar hatada açılır
+GENEL_ESIK = 5              # genel devre: tüm anahtarlarda üst üste bu kadar hatada açılır
+ANAHTAR_ACIK_TABAN = 2 * 60
+GENEL_ACIK_TABAN = 60
+ACIK_TAVAN = 30 * 60
+YARIM_ACIK_BEKLEME = 30     # deneme sorgusu sürerken diğer anahtarlar bu kadar bekler
+DENEME_ZAMAN_ASIMI = 120    # sonucu gelmeyen deneme sorgusu bu süreden sonra düşmüş sayılır
+
+
+def siniflandir(status_code: int | None, uyari_kodu: str | None = None) -> str:
+    """Slot sorgusu sonucunu devre sınıfına çevirir. status_code None: istek hiç cevap alamadı."""
+    if status_code is None:
+        return SUNUCU
+    if status_code == 401:
+        return OTURUM
+    if uyari_kodu in UYARI_SINIFLARI:
+        return UYARI_SINIFLARI[uyari_kodu]
+    if status_code == 200:
+        return BASARI
+    if status_code == 429 or status_code >= 500:
+        return SUNUCU
+    return RET
+
+
+class Devre:
+    """Tek bir devre: kapali → acik → yarim_acik → (kapali | acik)."""
+
+    __slots__ = ("ad", "esik", "taban", "tavan", "durum", "hata", "acilma", "acik_bitis", "deneme_baslangic")
+
+    def __init__(self, ad: str, esik: int, taban: float, tavan: float = ACIK_TAVAN):
+        self.ad = ad
+        self.esik = esik
+        self.taban = taban
+        self.tavan = tavan
+        self.durum = "kapali"
+        self.hata = 0              # üst üste hata
+        self.acilma = 0            # kapanmadan üst üste açılma (üstel bekleme için)
+        self.acik_bitis = 0.0
+        self.deneme_baslangic = None
+
+    def izin(self, simdi: float) -> float:
+        """İstek atılabilirse 0, değilse beklenecek süre (sn). Yarı açıkta ilk çağıran deneme hakkını alır."""
+        if self.durum == "kapali":
+            return 0.0
+        if self.durum == "acik":
+            if simdi < self.acik_bitis:
+                return self.acik_bitis - simdi
+            self.durum = "yarim_acik"
+            self.deneme_baslangic = None
+        # yarim_acik
+        if self.deneme_baslangic is None or simdi - self.deneme_baslangic > DENEME_ZAMAN_ASIMI:
+            self.deneme_baslangic = simdi
+            return 0.0
+        return YARIM_ACIK_BEKLEME
+
+    def basari(self):
+        if self.durum != "kapali":
+            http_logger.info("DEVRE KAPANDI %s", self.ad)
+        self.durum = "kapali"
+        self.hata = 0
+        self.acilma = 0
+        self.deneme_baslangic = None
+
+    def hata_kaydet(self, simdi: float, sinif: str, rng=random):
+        self.hata += 1
+        if self.durum == "yarim_acik" or (self.durum == "kapali" and self.hata >= self.esik):
+            self.acilma += 1
+            sure = min(self.tavan, self.taban * 2 ** (self.acilma - 1)) * rng.uniform(0.8, 1.2)
+            self.durum = "acik"
+            self.acik_bitis = simdi + sure
+            self.deneme_baslangic = None
+            http_logger.warning(
+                "DEVRE ACILDI %s - %s, %d ust uste hata, %d sn (acilma #%d)", self.ad, sinif, self.hata, sure, self.acilma
+            )
+
+    def deneme_birak(self):
+        """Sonucu devreyi etkilemeyen (ör. 401) deneme sorgusunun hakkını geri verir."""
+        self.deneme_baslangic = None
+
+    def ozet(self, simdi: float) -> dict:
+        return {
+            "durum": self.durum,
+            "hata": self.hata,
+            "acilma": self.acilma,
+            "kalan": round(max(0.0, self.acik_bitis - simdi)) if self.durum == "acik" else 0,
+        }
+
+
+class DevreKesici:
+    """Genel devre + sorgu anahtarı başına devreler. Anahtar devresi sadece hata görülünce oluşur."""
+
+    def __init__(self, anahtar_esik: int = ANAHTAR_ESIK, genel_esik: int = GENEL_ESIK, saat: Saat = gercek_saat):
+        self.saat = saat
+        self.anahtar_esik = anahtar_esik
+        self.genel = Devre("genel", genel_esik, GENEL_ACIK_TABAN)
+        self.anahtarlar = {}
+        self.engellenen = 0   # devre açıkken atılmayan sorgular
+        self.siniflar = {}    # sınıf -> adet
+
+    def izin(self, anahtar) -> float:
+        """Anahtar sorgu atabilirse 0, değilse beklenecek süre (sn)."""
+        simdi = self.saat.monotonik()
+        devre = self.anahtarlar.get(anahtar)
+        bekle = devre.izin(simdi) if devre is not None else 0.0
+        if not bekle:
+            bekle = self.genel.izin(simdi)
+            if bekle and devre is not None:
+                # Genel devre izin vermedi; anahtarın deneme hakkı boşa gitmesin
+                devre.deneme_birak()
+        if bekle:
+            self.engellenen += 1
+        return bekle
+
+    def kaydet(self, anahtar, sinif: str):
+        simdi = self.saat.monotonik()
+        self.siniflar[sinif] = self.siniflar.get(sinif, 0) + 1
+        devre = self.anahtarlar.get(anahtar)
+
+        if sinif == OTURUM:
+            self.genel.deneme_birak()
+            if devre is not None:
+                devre.deneme_birak()
+            return
+
+        if sinif == BASARI:
+            self.genel.basari()
+            if devre is not None:
+                # Kapalı ve temiz devre tutulmaz; anahtar sayısı kadar bellek harcanmaz
+                self.anahtarlar.pop(anahtar, None)
+                devre.basari()
+            return
+
+        if devre is None:
+            devre = self.anahtarlar[anahtar] = Devre("|".join(map(str, anahtar)), self.anahtar_esik, ANAHTAR_ACIK_TABAN)
+        devre.hata_kaydet(simdi, sinif, self.saat.rng)
+        self.genel.hata_kaydet(simdi, sinif, self.saat.rng)
+
+    def birak(self, anahtar):
+        self.anahtarlar.pop(anahtar, None)
+
+    def durum(self, anahtar) -> str:
+        """Anahtarı etkileyen en kötü devre durumu."""
+        devre = self.anahtarlar.get(anahtar)
+        for d in (self.genel, devre):
+            if d is not None and d.durum != "kapali":
+                return d.durum
+        return "kapali"
+
+    def stats(self) -> dict:
+        simdi = self.saat.monotonik()
+        return {
+            "genel": self.genel.ozet(simdi),
+            "anahtarlar": {d.ad: d.ozet(simdi) for d in self.anahtarlar.values()},
+            "engellenen": self.engellenen,
+            "siniflar": dict(self.siniflar),
+        }
@@ -0,0 +1,193 @@
+"""
+Takip başına slot filtreleri: gün, saat aralığı, istenmeyen hekimler.
+
+Sihirbazlarda tek satırlık küçük bir dil ile girilir:
+
+    gün: hafta içi; saat: 09-12; hariç: Ahmet Yılmaz, Ayşe
+
+Takipte JSON'a uygun bir sözlük olarak saklanır ve bir kez SlotFiltresi'ne
+derlenir (aynı filtre için derleme önbellekten gelir). Slot ağacı
+çözümlenirken uygulanır: istenmeyen hekimin alt ağacına hiç inilmez, uymayan
+saatler için Slot kaydı oluşturulmaz.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
+
+from mhrs_core.secim import normal_ad, saat_araligi_coz
+
+if TYPE_CHECKING:
+    from mhrs_core.slots import Slot
+
+FILTRE_ORNEGI = "gün: hafta içi; saat: 09-12; hariç: Ahmet Yılmaz, Ayşe"
+
+_ASCII = str.maketrans("çğışöüÇĞİŞÖÜI", "cgisoucgisoui")
+
+GUN_ADLARI = {
+    "pzt": 0, "pazartesi": 0,
+    "sal": 1, "sali": 1,
+    "car": 2, "carsamba": 2,
+    "per": 3, "persembe": 3,
+    "cum": 4, "cuma": 4,
+    "cmt": 5, "cumartesi": 5,
+    "paz": 6, "pazar": 6,
+}
+GUN_KISALTMALARI = ("Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz")
+GUN_GRUPLARI = {
+    "hafta ici": (0, 1, 2, 3, 4),
+    "hafta sonu": (5, 6),
+}
+
+
+def _ascii(s: str) -> str:
+    return " ".join(s.translate(_ASCII).lower().split())
+
+
+def _gunleri_coz(deger: str) -> list[int]:
+    gunler = set()
+    for parca in deger.split(","):
+        parca = _ascii(parca)
+        if not parca:
+            continue
+        if parca in GUN_GRUPLARI:
+            gunler.update(GUN_GRUPLARI[parca])
+        elif "-" in parca:
+            bas, _, bit = parca.partition("-")
+            bas, bit = GUN_ADLARI[bas.strip()], GUN_ADLARI[bit.strip()]
+            if bas > bit:
+                raise ValueError(f"Geçersiz gün aralığı: {parca}")
+            gunler.update(range(bas, bit + 1))
+        else:
+            gunler.add(GUN_ADLARI[parca])
+    if not gunler:
+        raise ValueError("Gün listesi boş")
+    return sorted(gunler)
+
+
+def filtre_coz(metin: str) -> dict | None:
+    """
+    Sihirbazdan gelen filtre metnini takipte saklanacak sözlüğe çevirir.
+    Boş ya da '-' ise None (filtre yok). Geçersizse ValueError.
+    """
+    metin = (metin or "").strip()
+    if metin in ("", "-"):
+        return None
+
+    filtre = {}
+    for kosul in metin.split(";"):
+        if not kosul.strip():
+            continue
+        anahtar, ayrac, deger = kosul.partition(":")
+        if not ayrac:
+            raise ValueError(f"Koşul 'anahtar: değer' şeklinde olmalı: {kosul.strip()}")
+        anahtar = _ascii(anahtar)
+        try:
+            if anahtar == "gun":
+                filtre["gunler"] = _gunleri_coz(deger)
+            elif anahtar == "saat":
+                filtre["saat"] = list(saat_araligi_coz(deger))
+            elif anahtar == "haric":
+                adlar = [a.strip() for a in deger.split(",") if a.strip()]
+                if not adlar:
+                    raise ValueError("Hariç tutulacak hekim listesi boş")
+                filtre["haric_hekimler"] = adlar
+            else:
+                raise ValueError(f"Bilinmeyen filtre: {anahtar}")
+        except KeyError as e:
+            raise ValueError(f"Bilinmeyen gün: {e.args[0]}") from None
+    return filtre or None
+
+
+def filtre_aciklama(filtre: dict | None) -> str:
+    if not filtre:
+        return "Filtre yok"
+    parcalar = []
+    if "gunler" in filtre:
+        parcalar.append("Gün: " + ",".join(GUN_KISALTMALARI[g] for g in filtre["gunler"]))
+    if "saat" in filtre:
+        bas, bit = filtre["saat"]
+        parcalar.append(f"Saat: {bas:02d}:00-{bit:02d}:00")
+    if "haric_hekimler" in filtre:
+        parcalar.append("Hariç: " + ", ".join(filtre["haric_hekimler"]))
+    return " | ".join(parcalar)
+
+
+class SlotFiltresi:
+    """
+    Derlenmiş filtre. `hekim(adi)` hekim başına bir kez, `zaman(dt)` slot
+    başına çağrılır; None olan kısım kontrol edilmez.
+    """
+
+    __slots__ = ("hekim", "zaman")
+
+    def __init__(self, hekim: Callable[[str], bool] | None, zaman: Callable[[datetime], bool] | None):
+        self.hekim = hekim
+        self.zaman = zaman
+
+    def __call__(self, slot: "Slot") -> bool:
+        return (self.hekim is None or self.hekim(slot.hekim_adi)) and (
+            self.zaman is None or self.zaman(slot.baslangic)
+        )
+
+
+@lru_cache(maxsize=256)
+def _derle(gunler: tuple | None, saat: tuple | None, haric: tuple | None) -> SlotFiltresi:
+    if haric:
+        aranan = tuple(normal_ad(h) for h in haric)
+
+        def hekim(adi: str) -> bool:
+            adi = normal_ad(adi)
+            return not any(h in adi for h in aranan)
+    else:
+        hekim = None
+
+    maske = sum(1 << g for g in gunler) if gunler else 0
+    bas, bit = saat or (0, 24)
+    if gunler and saat:
+        def zaman(dt: datetime) -> bool:
+            return bool(maske >> dt.weekday() & 1) and bas <= dt.hour < bit
+    elif gunler:
+        def zaman(dt: datetime) -> bool:
+            return bool(maske >> dt.weekday() & 1)
+    elif saat:
+        def zaman(dt: datetime) -> bool:
+            return bas <= dt.hour < bit
+    else:
+        zaman = None
+
+    return SlotFiltresi(hekim, zaman)
+
+
+def filtre_derle(filtre: dict | None) -> SlotFiltresi | None:
+    """Takipteki filtre sözlüğünü derler; filtre yoksa None. Aynı filtre tekrar derlenmez."""
+    if not filtre:
+        return None
+    gunler = filtre.get("gunler")
+    saat = filtre.get("saat")
+    haric = filtre.get("haric_hekimler")
+    return _derle(
+        tuple(gunler) if gunler else None,
+        tuple(saat) if saat else None,
+        tuple(haric) if haric else None,
+    )
+
+
+def filtre_birlesimi(filtreler) -> SlotFiltresi | None:
+    """
+    Aynı sorguyu paylaşan abonelerin filtrelerinden çözümleme sırasında
+    kullanılacak ortak filtre. Herhangi bir abonenin kabul edeceği her slotu
+    geçirir (hekim ve zaman kısımları ayrı ayrı birleştirildiği için biraz
+    fazlasını da geçirebilir; abone filtresi ayrıca uygulanır).
+    Filtresiz bir abone varsa None.
+    """
+    filtreler = list(filtreler)
+    if not filtreler or any(f is None for f in filtreler):
+        return None
+    if len(filtreler) == 1:
+        return filtreler[0]
+
+    hekimler = [f.hekim for f in filtreler]
+    zamanlar = [f.zaman for f in filtreler]
+    hekim = None if any(h is None for h in hekimler) else (lambda adi: any(h(adi) for h in hekimler))
+    zaman = None if any(z is None for z in zamanlar) else (lambda dt: any(z(dt) for z in zamanlar))
+    return SlotFiltresi(hekim, zaman)
@@ -0,0 +1,259 @@
+"""
+Kullanıcıya giden bildirimlerin kuyruğu.
+
+Takip yolu mesaj gönderimini beklemez: ekle() mesajı kuyruğa bırakıp hemen
+döner, gönderimi arka plandaki dağıtıcı yapar. Yavaş bir mesajlaşma API'si ya
+da ani bir bildirim yığını sorgu turlarını durdurmaz.
+
+Sınırlar (Telegram: genelde ~30 mesaj/sn, sohbet başına ~1 mesaj/sn):
+  - genel: saniyede `hiz` mesaj (jeton kovası, bkz. scheduler.TokenBucket)
+  - sohbet başına: iki mesaj arasında en az `sohbet_araligi` sn
+  - flood kontrolü (429 / RetryAfter): söylenen süre boyunca gönderim durur,
+    mesaj kaybolmaz; süre dolunca ilk o gider
+
+Öncelik: YUKSEK (randevu bulundu / alındı) > NORMAL > DUSUK (durum mesajları).
+Birleştirme:
+  - aynı sohbette aynı `anahtar`lı bekleyen mesajın yerine yenisi geçer
+    (ör. "oturum düştü" gitmeden "oturum yenilendi" gelirse yalnızca o gider)
+  - sırası gelen sohbette bekleyen DUSUK mesajlar tek mesajda gider
+Sohbet başına en fazla SOHBET_KUYRUK_MAX mesaj bekler; taşarsa en düşük
+öncelikli en eski mesaj düşer. Geçici hatalar GONDERIM_DENEME_MAX kez denenir,
+kalıcı hatalar (ör. kullanıcı botu engellemiş) denenmeden düşer.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable
+
+from mhrs_core import metrikler
+from mhrs_core.scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+YUKSEK, NORMAL, DUSUK = 0, 1, 2
+
+GENEL_HIZ = 25.0           # mesaj/sn; Telegram sınırının biraz altı
+GENEL_BURST = 25
+SOHBET_ARALIGI = 1.0       # sn; aynı sohbete iki mesaj arası
+SOHBET_KUYRUK_MAX = 20     # sohbet başına bekleyen mesaj
+ESZAMANLI_GONDERIM = 8     # aynı anda süren gönderim
+GONDERIM_DENEME_MAX = 3
+KAPANIS_BOSALTMA = 5.0     # sn; kapanışta bekleyenlerin gönderilmesi için
+BUDAMA_MIN = 1024          # sohbet beklemeleri bu sayıya varınca süresi geçenler silinir
+
+
+class _Mesaj:
+    __slots__ = ("oncelik", "metin", "anahtar", "kwargs", "seq", "deneme")
+
+    def __init__(self, oncelik, metin, anahtar, kwargs, seq):
+        self.oncelik = oncelik
+        self.metin = metin
+        self.anahtar = anahtar
+        self.kwargs = kwargs
+        self.seq = seq
+        self.deneme = 0
+
+    def sira(self):
+        return self.oncelik, self.seq
+
+
+class GidenKutusu:
+    """
+    gonder: async (chat_id, metin, **kwargs); asıl gönderimi yapar.
+    bekleme_suresi: hatadan flood kontrolü bekleme süresini (sn) çıkarır; değilse None.
+    kalici_mi: hata tekrar denemeye değmiyorsa True.
+    """
+
+    def __init__(
+        self,
+        gonder: Callable[..., Awaitable],
+        bekleme_suresi: Callable[[Exception], float | None] | None = None,
+        kalici_mi: Callable[[Exception], bool] | None = None,
+        hiz: float = GENEL_HIZ,
+        burst: int = GENEL_BURST,
+        sohbet_araligi: float = SOHBET_ARALIGI,
+    ):
+        self.gonder = gonder
+        self.bekleme_suresi = bekleme_suresi or (lambda e: None)
+        self.kalici_mi = kalici_mi or (lambda e: False)
+        self.bucket = TokenBucket(hiz, burst)
+        self.sohbet_araligi = sohbet_araligi
+        self._bekleyen = {}     # chat_id -> [_Mesaj]
+        self._uygun = {}        # chat_id -> loop.time(); bu andan önce o sohbete gönderilmez
+        self._budama_siniri = BUDAMA_MIN
+        self._genel_uygun = 0.0
+        self._mesgul = set()    # gönderimi süren sohbetler
+        self._seq = itertools.count()
+        self._gorev = None
+        self._gonderimler = set()
+        self._sem = None
+        self._uyandir = None
+        self._bos = None
+        self.sayilar = {"gonderildi": 0, "birlestirildi": 0, "tekrar": 0, "dusuruldu": 0}
+
+        metrikler.metrikler.gosterge("mhrs_giden_bekleyen", "Gönderilmeyi bekleyen bildirimler", oku=lambda: len(self))
+
+    def __len__(self) -> int:
+        return sum(len(k) for k in self._bekleyen.values())
+
+    def _say(self, sonuc: str, adet: int = 1):
+        self.sayilar[sonuc] += adet
+        metrikler.giden_mesaj.artir(sonuc, miktar=adet)
+
+    def ekle(self, chat_id, metin: str, oncelik: int = NORMAL, anahtar=None, **kwargs):
+        """Mesajı kuyruğa bırakır; beklemez."""
+        kuyruk = self._bekleyen.setdefault(chat_id, [])
+        if anahtar is not None:
+            for i, m in enumerate(kuyruk):
+                if m.anahtar == anahtar:
+                    del kuyruk[i]
+                    self._say("birlestirildi")
+                    break
+        kuyruk.append(_Mesaj(oncelik, metin, anahtar, kwargs, next(self._seq)))
+        if len(kuyruk) > SOHBET_KUYRUK_MAX:
+            kuyruk.remove(max(kuyruk, key=lambda m: (m.oncelik, -m.seq)))
+            self._say("dusuruldu")
+        if self._uyandir is not None:
+            self._bos.clear()
+            self._uyandir.set()
+
+    async def start(self):
+        if self._gorev is not None:
+            return
+        self._sem = asyncio.Semaphore(ESZAMANLI_GONDERIM)
+        self._uyandir = asyncio.Event()
+        self._bos = asyncio.Event()
+        if not self._bekleyen:
+            self._bos.set()
+        self._gorev = asyncio.create_task(self._dagit())
+
+    async def stop(self, sure: float = KAPANIS_BOSALTMA):
+        """Bekleyenleri en fazla `sure` sn gönderir, sonra durur."""
+        if self._gorev is None:
+            return
+        try:
+            await asyncio.wait_for(self._bos.wait(), timeout=sure)
+        except asyncio.TimeoutError:
+            pass
+        gorevler = [self._gorev, *self._gonderimler]
+        for g in gorevler:
+            g.cancel()
+        await asyncio.gather(*gorevler, return_exceptions=True)
+        self._gorev = None
+        if len(self):
+            logger.warning("%d bildirim gönderilemeden kapanıldı", len(self))
+
+    def _buda(self, simdi: float):
+        """Süresi geçmiş sohbet beklemelerini siler (olmayan kayıtla aynı anlamdadır)."""
+        for chat_id in [c for c, t in self._uygun.items() if t <= simdi]:
+            del self._uygun[chat_id]
+        # Bir sonraki budama kalanların iki katında: mesaj başına sabit maliyet
+        self._budama_siniri = max(BUDAMA_MIN, 2 * len(self._uygun))
+
+    def _sec(self, simdi: float):
+        """Şimdi gönderilebilecek en öncelikli mesaj ve (yoksa) en erken uygun zaman."""
+        if len(self._uygun) >= self._budama_siniri:
+            self._buda(simdi)
+        secim, en_erken = None, None
+        for chat_id, kuyruk in self._bekleyen.items():
+            if chat_id in self._mesgul:
+                continue
+            uygun = self._uygun.get(chat_id, 0.0)
+            if uygun > simdi:
+                en_erken = uygun if en_erken is None else min(en_erken, uygun)
+                continue
+            m = min(kuyruk, key=_Mesaj.sira)
+            if secim is None or m.sira() < secim[1].sira():
+                secim = (chat_id, m)
+        return secim, en_erken
+
+    def _al(self, chat_id, m: _Mesaj) -> _Mesaj:
+        kuyruk = self._bekleyen[chat_id]
+        if m.oncelik == DUSUK:
+            birlesen = [x for x in kuyruk if x.oncelik == DUSUK and x.kwargs == m.kwargs]
+            for x in birlesen:
+                kuyruk.remove(x)
+            if len(birlesen) > 1:
+                self._say("birlestirildi", len(birlesen) - 1)
+                m = _Mesaj(DUSUK, "\n".join(x.metin for x in birlesen), None, m.kwargs, birlesen[0].seq)
+        else:
+            kuyruk.remove(m)
+        if not kuyruk:
+            del self._bekleyen[chat_id]
+        return m
+
+    def _geri_koy(self, chat_id, m: _Mesaj):
+        self._bekleyen.setdefault(chat_id, []).insert(0, m)
+
+    async def _dagit(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            simdi = loop.time()
+            secim, uyanma = None, self._genel_uygun
+            if self._genel_uygun <= simdi:
+                secim, uyanma = self._sec(simdi)
+            if secim is None:
+                # wait_for değil: 3.11'de uyandırma ile stop() aynı tura denk gelirse iptali yutar
+                self._uyandir.clear()
+                zamanlayici = None if uyanma is None else loop.call_later(max(0.0, uyanma - simdi), self._uyandir.set)
+                try:
+                    await self._uyandir.wait()
+                finally:
+                    if zamanlayici is not None:
+                        zamanlayici.cancel()
+                continue
+
+            await self._sem.acquire()
+            await self.bucket.acquire()
+            # Beklerken kuyruk değişmiş olabilir (birleştirme, flood kontrolü): yeniden seç
+            simdi = loop.time()
+            secim = self._sec(simdi)[0] if self._genel_uygun <= simdi else None
+            if secim is None:
+                self._sem.release()
+                continue
+            chat_id, m = secim
+            m = self._al(chat_id, m)
+            self._mesgul.add(chat_id)
+            gorev = asyncio.create_task(self._gonder(chat_id, m))
+            self._gonderimler.add(gorev)
+            gorev.add_done_callback(self._gonderimler.discard)
+
+    async def _gonder(self, chat_id, m: _Mesaj):
+        loop = asyncio.get_running_loop()
+        try:
+            await self.gonder(chat_id, m.metin, **m.kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._hata(chat_id, m, e, loop.time())
+        else:
+            self._say("gonderildi")
+            self._uygun[chat_id] = loop.time() + self.sohbet_araligi
+        finally:
+            self._mesgul.discard(chat_id)
+            self._sem.release()
+            if not self._bekleyen and not self._mesgul:
+                self._bos.set()
+            self._uyandir.set()
+
+    def _hata(self, chat_id, m: _Mesaj, e: Exception, simdi: float):
+        bekle = self.bekleme_suresi(e)
+        if bekle is not None:
+            # Flood kontrolü sohbete değil bota uygulanabilir: her yerde dur
+            logger.warning("Bildirim flood kontrolüne takıldı (%s): %.0f sn bekleniyor", chat_id, bekle)
+            self._uygun[chat_id] = simdi + bekle
+            self._genel_uygun = max(self._genel_uygun, simdi + bekle)
+            self._geri_koy(chat_id, m)
+            self._say("tekrar")
+            return
+        m.deneme += 1
+        if self.kalici_mi(e) or m.deneme >= GONDERIM_DENEME_MAX:
+            logger.warning("Bildirim gönderilemedi (%s, %d. deneme): %s", chat_id, m.deneme, e)
+            self._say("dusuruldu")
+            return
+        self._uygun[chat_id] = simdi + self.sohbet_araligi * 2 ** m.deneme
+        self._geri_koy(chat_id, m)
+        self._say("tekrar")
+
+    def stats(self) -> dict:
+        return {"bekleyen": len(self), "sohbet": len(self._bekleyen), "gonderimde": len(self._mesgul), **self.sayilar}
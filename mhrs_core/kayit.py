@@ -0,0 +1,72 @@
+"""
+Aktif takiplerin bellekteki kaydı.
+
+Her takip eklenirken sabit bir takip numarası alır; silme ve "takip hâlâ
+aktif mi?" kontrolü bu numara üzerinden sözlükle yapılır (takip sayısından
+bağımsız, O(1)). Aynı içerikli iki takip de birbirinden ayrılır. Kayıtlar
+kullanıcıya ve sorgu anahtarına göre ayrıca indekslenir; indeksler eklenme
+sırasını korur.
+
+Numara süreç boyunca geçerlidir; store'daki kalıcı `id` ile karıştırılmaz.
+"""
+import itertools
+from typing import NamedTuple
+
+
+class Kayit(NamedTuple):
+    no: int
+    user_id: int
+    username: str
+    anahtar: tuple
+    takip: dict
+
+
+class TakipKaydi:
+    def __init__(self):
+        self._sayac = itertools.count(1)
+        self._kayitlar = {}        # no -> Kayit
+        self._kullanicilar = {}    # user_id -> {no: None}
+        self._anahtarlar = {}      # anahtar -> {no: None}
+
+    def ekle(self, user_id, username: str, anahtar: tuple, takip: dict) -> Kayit:
+        kayit = Kayit(next(self._sayac), user_id, username, anahtar, takip)
+        self._kayitlar[kayit.no] = kayit
+        self._kullanicilar.setdefault(user_id, {})[kayit.no] = None
+        self._anahtarlar.setdefault(anahtar, {})[kayit.no] = None
+        return kayit
+
+    def sil(self, no: int) -> Kayit | None:
+        """Kaydı ve indekslerini siler; kayıt zaten yoksa None."""
+        kayit = self._kayitlar.pop(no, None)
+        if kayit is None:
+            return None
+        for indeks, deger in ((self._kullanicilar, kayit.user_id), (self._anahtarlar, kayit.anahtar)):
+            nolar = indeks[deger]
+            del nolar[no]
+            if not nolar:
+                del indeks[deger]
+        return kayit
+
+    def get(self, no: int) -> Kayit | None:
+        return self._kayitlar.get(no)
+
+    def kullanici(self, user_id) -> list[Kayit]:
+        return [self._kayitlar[no] for no in self._kullanicilar.get(user_id, ())]
+
+    def anahtar(self, anahtar: tuple) -> list[Kayit]:
+        return [self._kayitlar[no] for no in self._anahtarlar.get(anahtar, ())]
+
+    def kullanici_var_mi(self, user_id) -> bool:
+        return user_id in self._kullanicilar
+
+    def anahtar_var_mi(self, anahtar: tuple) -> bool:
+        return anahtar in self._anahtarlar
+
+    def __contains__(self, no) -> bool:
+        return no in self._kayitlar
+
+    def __len__(self) -> int:
+        return len(self._kayitlar)
+
+    def __iter__(self):
+        return iter(list(self._kayitlar.values()))
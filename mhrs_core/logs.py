@@ -0,0 +1,263 @@
+"""
+Ortak log ayarları.
+
+Logger'lar import anında tanımlanır ama dosyalar setup_logging() çağrılana
+(ve ilk kayıt yazılana) kadar açılmaz. Her giriş noktası kendi dizinine yazar:
+
+    logs/<uygulama>/kullanici.log   kullanıcı olayları
+    logs/<uygulama>/http.log        HTTP / servis ayrıntıları
+    logs/<uygulama>/olaylar.jsonl   yapısal olaylar, satır başına bir JSON (olay())
+
+Dosyalar gece yarısı (ya da LOG_MAX_BAYT aşılınca) döner; kapanan dosya
+gzip'lenir (kullanici.log.2024-05-01.gz) ve en fazla LOG_SAKLAMA_ADET arşiv
+tutulur. Sıkıştırma da yazıcı thread'inde yapılır.
+
+Kayıtlar event loop içinde diske yazılmaz: logger'lar sadece bir kuyruğa
+bırakır, dosya/konsol yazımını arka plandaki tek bir QueueListener thread'i
+yapar. Hata fırtınasında loop'u korumak için:
+  - Kuyruk sınırlıdır; doluysa kayıt beklemeden düşürülür (sayılır).
+  - Aynı uyarı/hata TEKRAR_PENCERESI içinde tekrar ederse yazılmaz; bir
+    sonraki yazımda (ya da kapanışta) kaç kez tekrarlandığı eklenir.
+  - Çok uzun mesajlar kısaltılır; HTTP cevap gövdeleri için govde_ozeti().
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+LOG_DIR = "logs"
+
+LOG_KUYRUK_BOYUTU = 10_000
+LOG_MESAJ_MAX = 2000      # karakter; daha uzun mesajlar kısaltılır
+LOG_GOVDE_MAX = 300       # karakter; loglanan HTTP cevap gövdeleri
+TEKRAR_PENCERESI = 60     # sn; aynı uyarı/hata bu süre içinde bir kez yazılır
+TEKRAR_ANAHTAR_MAX = 1000
+LOG_MAX_BAYT = 20 * 1024 * 1024   # gün bitmeden bu boyuta ulaşan dosya da döner
+LOG_SAKLAMA_ADET = 30             # dosya başına tutulan en fazla arşiv
+
+user_logger = logging.getLogger("user_logger")
+user_logger.propagate = False
+
+http_logger = logging.getLogger("http_logger")
+http_logger.propagate = False
+
+# Sorgu / uyarı / login / randevu olayları; çözümlemesi için bkz. mhrs_core.analiz
+olay_logger = logging.getLogger("olay_logger")
+olay_logger.propagate = False
+
+_kuruldu = False
+_dizin = LOG_DIR
+_dinleyici = None
+_kuyruk_handler = None
+
+
+def kisalt(metin: str, sinir: int) -> str:
+    if len(metin) <= sinir:
+        return metin
+    return f"{metin[:sinir]}… (+{len(metin) - sinir} karakter)"
+
+
+def govde_ozeti(metin: str | None, sinir: int = LOG_GOVDE_MAX) -> str:
+    """HTTP cevap gövdesini loga uygun hale getirir: tek satır, en fazla `sinir` karakter."""
+    if not metin:
+        return ""
+    return kisalt(" ".join(metin.split()), sinir)
+
+
+def olay(tip: str, **alanlar):
+    """
+    Yapısal olay yazar: {"ts": epoch sn, "tip": tip, ...alanlar}. Loglama
+    kurulmadıysa hiçbir şey yapmaz (JSON'a da çevrilmez).
+    """
+    if not olay_logger.isEnabledFor(logging.INFO):
+        return
+    olay_logger.info(json.dumps({"ts": round(time.time(), 3), "tip": tip, **alanlar}, ensure_ascii=False, default=str))
+
+
+class _TekrarBastirici:
+    """Aynı (logger, seviye, mesaj) kaydını pencere içinde bir kez geçirir, gerisini sayar."""
+
+    def __init__(self, pencere: float = TEKRAR_PENCERESI):
+        self.pencere = pencere
+        self._son = {}          # anahtar -> [ilk yazım zamanı, bastırılan, son bastırılan kayıt]
+        self.bastirilan = 0
+
+    def suz(self, record: logging.LogRecord) -> logging.LogRecord | None:
+        anahtar = (record.name, record.levelno, record.getMessage())
+        onceki = self._son.get(anahtar)
+        if onceki is not None and record.created - onceki[0] < self.pencere:
+            onceki[1] += 1
+            onceki[2] = record
+            self.bastirilan += 1
+            return None
+
+        if onceki is not None and onceki[1]:
+            record.msg = f"{record.getMessage()} (önceki {self.pencere} sn'de {onceki[1]} kez tekrarlandı)"
+            record.args = None
+        self._son[anahtar] = [record.created, 0, None]
+        if len(self._son) > TEKRAR_ANAHTAR_MAX:
+            self._temizle(record.created)
+        return record
+
+    def _temizle(self, simdi: float):
+        # Penceresi geçmiş ve bastırılanı olmayan kayıtlar unutulur
+        for anahtar, (ilk, adet, _) in list(self._son.items()):
+            if not adet and simdi - ilk >= self.pencere:
+                del self._son[anahtar]
+
+    def bekleyenler(self):
+        """Kapanışta: tekrarları henüz yazılmamış kayıtları sayısıyla birlikte üretir."""
+        for ilk, adet, son in self._son.values():
+            if adet:
+                son.msg = f"{son.getMessage()} ({adet} kez tekrarlandı)"
+                son.args = None
+                yield son
+        self._son.clear()
+
+
+class _KuyrukHandler(QueueHandler):
+    """Kayıtları beklemeden kuyruğa bırakır; tekrarları bastırır, uzun mesajları kısaltır."""
+
+    def __init__(self, kuyruk: queue.Queue):
+        super().__init__(kuyruk)
+        self.tekrar = _TekrarBastirici()
+        self.dusurulen = 0
+
+    def emit(self, record: logging.LogRecord):
+        if record.levelno >= logging.WARNING:
+            record = self.tekrar.suz(record)
+            if record is None:
+                return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        # Olay satırları kısaltılmaz; yarım JSON çözümlenemez
+        if record.name != olay_logger.name and len(record.msg) > LOG_MESAJ_MAX:
+            record.msg = record.message = kisalt(record.msg, LOG_MESAJ_MAX)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dusurulen += 1
+
+    def bosalt(self):
+        for record in self.tekrar.bekleyenler():
+            self.enqueue(self.prepare(record))
+
+
+class _DonenDosyaHandler(TimedRotatingFileHandler):
+    """Gece yarısı ve boyut sınırında döner; kapanan dosyayı gzip'ler, eski arşivleri siler."""
+
+    def __init__(self, yol: str, max_bayt: int = LOG_MAX_BAYT, saklama: int = LOG_SAKLAMA_ADET):
+        # backupCount=0: arşivler .gz olduğu için silme burada yapılır
+        super().__init__(yol, when="midnight", backupCount=0, encoding="utf-8", delay=True)
+        self.max_bayt = max_bayt
+        self.saklama = saklama
+        self.namer = self._arsiv_adi
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        return bool(self.max_bayt) and self.stream is not None and self.stream.tell() >= self.max_bayt
+
+    @staticmethod
+    def _arsiv_adi(ad: str) -> str:
+        # Aynı gün boyut yüzünden birden çok kez dönerse: .gz, .1.gz, .2.gz ...
+        aday, sira = f"{ad}.gz", 0
+        while os.path.exists(aday):
+            sira += 1
+            aday = f"{ad}.{sira}.gz"
+        return aday
+
+    def rotate(self, kaynak: str, hedef: str):
+        if not os.path.exists(kaynak):
+            return
+        with open(kaynak, "rb") as giris, gzip.open(hedef, "wb") as cikis:
+            shutil.copyfileobj(giris, cikis)
+        os.remove(kaynak)
+        self._eski_arsivleri_sil()
+
+    def _eski_arsivleri_sil(self):
+        dizin, ad = os.path.split(self.baseFilename)
+        arsivler = [
+            os.path.join(dizin, f) for f in os.listdir(dizin) if f.startswith(ad + ".") and f.endswith(".gz")
+        ]
+        arsivler.sort(key=os.path.getmtime)
+        for yol in arsivler[:max(0, len(arsivler) - self.saklama)]:
+            try:
+                os.remove(yol)
+            except OSError:
+                pass
+
+
+def setup_logging(uygulama: str):
+    """
+    Konsol + dosya log'larını kurar; dosyalar logs/<uygulama>/ altına yazılır
+    (ör. "telegram", "pc"). Birden çok çağrı zararsızdır.
+    """
+    global _kuruldu, _dizin, _dinleyici, _kuyruk_handler
+    if _kuruldu:
+        return
+    _kuruldu = True
+
+    dizin = _dizin = os.path.join(LOG_DIR, uygulama)
+    os.makedirs(dizin, exist_ok=True)
+
+    # Konsola INFO akıtır (kendi dosyası olan logger'lar hariç)
+    konsol = logging.StreamHandler()
+    konsol.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    konsol.addFilter(lambda r: r.name not in (user_logger.name, http_logger.name, olay_logger.name))
+
+    user_handler = _DonenDosyaHandler(os.path.join(dizin, "kullanici.log"))
+    user_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    user_handler.addFilter(logging.Filter(user_logger.name))
+
+    http_handler = _DonenDosyaHandler(os.path.join(dizin, "http.log"))
+    http_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    http_handler.addFilter(logging.Filter(http_logger.name))
+
+    olay_handler = _DonenDosyaHandler(os.path.join(dizin, "olaylar.jsonl"))
+    olay_handler.setFormatter(logging.Formatter("%(message)s"))
+    olay_handler.addFilter(logging.Filter(olay_logger.name))
+
+    _kuyruk_handler = _KuyrukHandler(queue.Queue(LOG_KUYRUK_BOYUTU))
+    _dinleyici = QueueListener(_kuyruk_handler.queue, konsol, user_handler, http_handler, olay_handler)
+    _dinleyici.start()
+    atexit.register(stop_logging)
+
+    for logger in (logging.getLogger(), user_logger, http_logger, olay_logger):
+        logger.setLevel(logging.INFO)
+        logger.addHandler(_kuyruk_handler)
+
+
+def log_dizini() -> str:
+    """Giriş noktasının log dizini (setup_logging'den önce LOG_DIR)."""
+    return _dizin
+
+
+def stop_logging():
+    """Bastırılmış tekrarları yazar, kuyrukta kalanları diske bitirip yazıcı thread'i durdurur."""
+    global _dinleyici
+    if _dinleyici is None:
+        return
+    _kuyruk_handler.bosalt()
+    _dinleyici.stop()
+    _dinleyici = None
+
+
+def log_stats() -> dict:
+    if _kuyruk_handler is None:
+        return {}
+    return {
+        "kuyrukta": _kuyruk_handler.queue.qsize(),
+        "dusurulen": _kuyruk_handler.dusurulen,
+        "bastirilan_tekrar": _kuyruk_handler.tekrar.bastirilan,
+    }
@@ -0,0 +1,215 @@
+"""
+Çalışma anı metrikleri ve Prometheus metin formatında yerel HTTP ucu.
+
+    curl http://127.0.0.1:9108/metrics
+
+Ek bağımlılık yok: sayaçlar, göstergeler ve histogramlar burada tutulur ve
+text exposition formatına (0.0.4) çevrilir. Ölçüm yapan kod süreç geneli
+`metrikler` kaydındaki metrikleri kullanır; anlık değerler (aktif takip,
+kulvar doluluğu vb.) kazıma sırasında çağrılan fonksiyonlarla okunur.
+
+Sunucu sadece metrik_sunucusu_baslat() çağrılınca açılır ve varsayılan olarak
+yalnızca 127.0.0.1'i dinler.
+"""
+import asyncio
+import bisect
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+METRIK_HOST = "127.0.0.1"
+
+# sn
+HTTP_KOVALARI = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+GECIKME_KOVALARI = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def _deger(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _kacis(s) -> str:
+    return str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiketler(adlar: tuple, degerler: tuple, ek: str = "") -> str:
+    parcalar = [f'{ad}="{_kacis(d)}"' for ad, d in zip(adlar, degerler)]
+    if ek:
+        parcalar.append(ek)
+    return "{" + ",".join(parcalar) + "}" if parcalar else ""
+
+
+class _Metrik:
+    tip = ""
+
+    def __init__(self, ad: str, aciklama: str, etiketler: tuple = ()):
+        self.ad = ad
+        self.aciklama = aciklama
+        self.etiketler = tuple(etiketler)
+
+    def satirlar(self):
+        yield f"# HELP {self.ad} {self.aciklama}"
+        yield f"# TYPE {self.ad} {self.tip}"
+        yield from self._ornekler()
+
+    def _ornekler(self):
+        return iter(())
+
+
+class Sayac(_Metrik):
+    tip = "counter"
+
+    def __init__(self, ad: str, aciklama: str, etiketler: tuple = ()):
+        super().__init__(ad, aciklama, etiketler)
+        self._degerler = {}
+
+    def artir(self, *etiket_degerleri, miktar: float = 1):
+        etiket_degerleri = tuple(map(str, etiket_degerleri))
+        self._degerler[etiket_degerleri] = self._degerler.get(etiket_degerleri, 0) + miktar
+
+    def deger(self, *etiket_degerleri) -> float:
+        return self._degerler.get(tuple(map(str, etiket_degerleri)), 0)
+
+    def _ornekler(self):
+        for degerler, v in sorted(self._degerler.items()):
+            yield f"{self.ad}{_etiketler(self.etiketler, degerler)} {_deger(v)}"
+
+
+class Gosterge(_Metrik):
+    """Değeri kazıma anında `oku()` ile alınır: sayı ya da {etiket değerleri: sayı}."""
+
+    tip = "gauge"
+
+    def __init__(self, ad: str, aciklama: str, etiketler: tuple = (), oku: Callable | None = None):
+        super().__init__(ad, aciklama, etiketler)
+        self.oku = oku
+
+    def _ornekler(self):
+        if self.oku is None:
+            return
+        try:
+            sonuc = self.oku()
+        except Exception:
+            logger.exception("Metrik okunamadı: %s", self.ad)
+            return
+        if not isinstance(sonuc, dict):
+            sonuc = {(): sonuc}
+        for degerler, v in sorted(sonuc.items(), key=lambda x: str(x[0])):
+            if not isinstance(degerler, tuple):
+                degerler = (degerler,)
+            yield f"{self.ad}{_etiketler(self.etiketler, degerler)} {_deger(v)}"
+
+
+class Histogram(_Metrik):
+    tip = "histogram"
+
+    def __init__(self, ad: str, aciklama: str, etiketler: tuple = (), kovalar: tuple = HTTP_KOVALARI):
+        super().__init__(ad, aciklama, etiketler)
+        self.kovalar = tuple(kovalar)
+        self._seriler = {}  # etiket değerleri -> [kova sayaçları (+Inf dahil), toplam, adet]
+
+    def gozlem(self, deger: float, *etiket_degerleri):
+        etiket_degerleri = tuple(map(str, etiket_degerleri))
+        seri = self._seriler.get(etiket_degerleri)
+        if seri is None:
+            seri = self._seriler[etiket_degerleri] = [[0] * (len(self.kovalar) + 1), 0.0, 0]
+        seri[0][bisect.bisect_left(self.kovalar, deger)] += 1
+        seri[1] += deger
+        seri[2] += 1
+
+    def toplamlar(self) -> dict:
+        """Etiket değerleri -> (toplam, adet)."""
+        return {degerler: (seri[1], seri[2]) for degerler, seri in self._seriler.items()}
+
+    def _ornekler(self):
+        for degerler, (kovalar, toplam, adet) in sorted(self._seriler.items()):
+            birikim = 0
+            for sinir, kova in zip(self.kovalar + (float("inf"),), kovalar):
+                birikim += kova
+                le = f'le="{_deger(sinir)}"'
+                yield f"{self.ad}_bucket{_etiketler(self.etiketler, degerler, le)} {birikim}"
+            yield f"{self.ad}_sum{_etiketler(self.etiketler, degerler)} {_deger(float(toplam))}"
+            yield f"{self.ad}_count{_etiketler(self.etiketler, degerler)} {adet}"
+
+
+class MetrikKaydi:
+    def __init__(self):
+        self._metrikler = {}
+
+    def _ekle(self, metrik: _Metrik):
+        self._metrikler[metrik.ad] = metrik
+        return metrik
+
+    def sayac(self, ad: str, aciklama: str, etiketler: tuple = ()) -> Sayac:
+        return self._ekle(Sayac(ad, aciklama, etiketler))
+
+    def gosterge(self, ad: str, aciklama: str, etiketler: tuple = (), oku: Callable | None = None) -> Gosterge:
+        """Aynı adla tekrar çağrılırsa önceki göstergenin yerine geçer (ör. yeni servis örneği)."""
+        return self._ekle(Gosterge(ad, aciklama, etiketler, oku))
+
+    def histogram(self, ad: str, aciklama: str, etiketler: tuple = (), kovalar: tuple = HTTP_KOVALARI) -> Histogram:
+        return self._ekle(Histogram(ad, aciklama, etiketler, kovalar))
+
+    def metin(self) -> str:
+        satirlar = []
+        for metrik in self._metrikler.values():
+            satirlar.extend(metrik.satirlar())
+        return "\n".join(satirlar) + "\n"
+
+
+# Süreç geneli kayıt ve ölçüm noktalarının kullandığı metrikler
+metrikler = MetrikKaydi()
+
+http_istek = metrikler.sayac(
+    "mhrs_http_istek_toplam", "MHRS'ye atılan istekler (durum: HTTP kodu ya da 'hata')", ("uc_nokta", "durum")
+)
+http_sure = metrikler.histogram(
+    "mhrs_http_istek_suresi_saniye", "MHRS isteklerinin süresi (kulvar beklemesi hariç)", ("uc_nokta",)
+)
+kulvar_bekleme = metrikler.histogram(
+    "mhrs_kulvar_bekleme_saniye", "İsteğin kulvar sırasında beklediği süre (bütçe beklemesi dahil)", ("kulvar",)
+)
+butce_bekleme = metrikler.histogram(
+    "mhrs_butce_bekleme_saniye", "İsteğin global istek bütçesinden jeton beklediği süre", (), GECIKME_KOVALARI
+)
+zamanlayici_gecikme = metrikler.histogram(
+    "mhrs_zamanlayici_gecikme_saniye", "İşlerin planlanan zamandan ne kadar geç başladığı", (), GECIKME_KOVALARI
+)
+sorgu_sonuc = metrikler.sayac("mhrs_sorgu_toplam", "Slot sorguları, sonuç sınıfına göre", ("sinif",))
+slot_acilan = metrikler.sayac("mhrs_slot_acilan_toplam", "Sorgu cevaplarında yeni görülen boş slotlar")
+randevu_sonuc = metrikler.sayac("mhrs_randevu_toplam", "Randevu alma denemeleri", ("sonuc",))
+login_sonuc = metrikler.sayac("mhrs_login_toplam", "Login denemeleri", ("sonuc",))
+giden_mesaj = metrikler.sayac(
+    "mhrs_giden_mesaj_toplam", "Kullanıcı bildirimleri (gonderildi | birlestirildi | tekrar | dusuruldu)", ("sonuc",)
+)
+
+
+async def _istek(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        istek_satiri = await asyncio.wait_for(reader.readline(), timeout=5)
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parcalar = istek_satiri.decode("latin-1").split()
+        if len(parcalar) >= 2 and parcalar[0] == "GET" and parcalar[1].split("?")[0] == "/metrics":
+            durum, govde, tip = "200 OK", metrikler.metin().encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            durum, govde, tip = "404 Not Found", b"not found\n", "text/plain; charset=utf-8"
+        writer.write(
+            f"HTTP/1.1 {durum}\r\nContent-Type: {tip}\r\nContent-Length: {len(govde)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + govde
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def metrik_sunucusu_baslat(port: int, host: str = METRIK_HOST) -> asyncio.AbstractServer:
+    """GET /metrics ucunu açar; kapatmak için dönen sunucuda close() çağrılır."""
+    sunucu = await asyncio.start_server(_istek, host, port)
+    logger.info("Metrikler: http://%s:%d/metrics", host, port)
+    return sunucu
@@ -0,0 +1,303 @@
+"""
+JWT yaşam döngüsü: süresi dolmadan token yenileme ve tekil login.
+
+TC/Şifresi olan takipler hesap (TC) bazında gruplanır. Hesabın güncel tokeni
+tektir ve o hesaptaki her takibe dağıtılır. Token'ın `exp` alanı çözülür ve
+süresi dolmadan OTURUM_YENILEME_PAYI sn önce zamanlayıcıda yenileme işi
+çalışır. Böylece sorgular normal akışta 401 almaz; 401 yolu yalnızca
+beklenmedik oturum düşmeleri için kalır.
+
+Login hesap başına tek uçuştur (single-flight): aynı anda 401 alan birden
+çok sorgu tek bir login denemesini bekler. Deneme sayısı ve başarısızlık
+sonrası bekleme de takip değil hesap başına tutulur. Denemeler arası bekleme
+sorgu içinde uyunarak değil, hesabın zamanlayıcıdaki işi ertelenerek yapılır;
+hesabın son takibi bırakıldığında iş iptal edilir.
+
+Sadece token ile eklenen takipler (TC/Şifre yok) yenilenemez, buraya girmez.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+from mhrs_core import api, metrikler
+from mhrs_core.logs import olay, user_logger
+from mhrs_core.saat import Saat, gercek_saat
+
+OTURUM_YENILEME_PAYI = 5 * 60   # exp'ten bu kadar sn önce yenile
+
+# 401 sonrası yeniden giriş
+RELOGIN_MAX_RETRY = 5
+RELOGIN_WAIT_MIN = 30
+RELOGIN_WAIT_MAX = 90
+RELOGIN_FAIL_BREAK = 3600  # 5 deneme de başarısızsa 1 saat mola
+
+
+def hesap_anahtari(takip: dict) -> str | None:
+    """Token'ı yenilenebilir takipler için hesap anahtarı (TC); değilse None."""
+    if takip.get("tc") and takip.get("sifre"):
+        return str(takip["tc"])
+    return None
+
+
+class OturumYoneticisi:
+    """
+    Hesap başına güncel tokeni tutar, süresi dolmadan yeniler ve login'i
+    tekilleştirir.
+
+    login: (tc, sifre) -> JWT | None
+    bildirici: oturum_yenileniyor / oturum_yenilendi / ... olaylarını alan Bildirici
+    guncellendi: token değişen takip için çağrılır (ör. store'a yazmak için)
+    saat: zaman ve rastgelelik kaynağı (bkz. mhrs_core.saat)
+    """
+
+    def __init__(self, login: Callable[[str, str], Awaitable[str | None]], zamanlayici, bildirici=None,
+                 guncellendi: Callable[[dict], None] | None = None, saat: Saat = gercek_saat):
+        self.login = login
+        self.saat = saat
+        self.zamanlayici = zamanlayici
+        self.bildirici = bildirici
+        self.guncellendi = guncellendi
+        # hesap -> {"tc", "sifre", "token", "exp", "takipler": {takip no: (user_id, username, takip)},
+        #           "ucus": Task | None, "durum", "gecersiz", "deneme": ardışık başarısız login,
+        #           "sonraki_deneme": epoch sn}
+        self.hesaplar = {}
+        self.login_sayisi = 0
+        self.ortak_bekleyen = 0  # devam eden bir login'e katılan çağrılar
+
+    # ===========================
+    # Takip kaydı
+    # ===========================
+    def _yeni_kayit(self, takip: dict) -> dict:
+        return {
+            "tc": takip["tc"],
+            "sifre": takip["sifre"],
+            "token": None,
+            "exp": None,
+            "takipler": {},
+            "ucus": None,
+            "durum": "gecerli",      # gecerli | yeniden_giris | mola
+            "gecersiz": False,       # token 401 aldı, yenisi bekleniyor
+            "deneme": 0,
+            "sonraki_deneme": 0.0,   # epoch sn; bundan önce login denenmez
+        }
+
+    def kaydet(self, no: int, user_id, username: str, takip: dict):
+        """Takibi hesabına bağlar; hesabın daha taze tokeni varsa takibe verir."""
+        hesap = hesap_anahtari(takip)
+        if hesap is None:
+            return
+
+        exp = api.jwt_exp(takip.get("token"))
+        kayit = self.hesaplar.get(hesap)
+        if kayit is None:
+            kayit = self.hesaplar[hesap] = self._yeni_kayit(takip)
+        kayit["tc"], kayit["sifre"] = takip["tc"], takip["sifre"]
+        kayit["takipler"][no] = (user_id, username, takip)
+
+        if kayit["token"] is None or (exp or 0) > (kayit["exp"] or 0):
+            kayit["token"], kayit["exp"] = takip.get("token"), exp
+            if exp is not None:
+                # Sihirbazda yeni alınmış token: bekleyen yeniden giriş durumu biter
+                kayit.update(durum="gecerli", gecersiz=False, deneme=0, sonraki_deneme=0.0)
+            self._dagit(kayit)
+        elif takip.get("token") != kayit["token"]:
+            takip["token"] = kayit["token"]
+            if self.guncellendi is not None:
+                self.guncellendi(takip)
+
+        self._planla(hesap, kayit)
+
+    def birak(self, no: int, takip: dict):
+        """Takip bitti/durduruldu; hesabın takibi kalmadıysa yenileme işi iptal edilir."""
+        hesap = hesap_anahtari(takip)
+        kayit = self.hesaplar.get(hesap)
+        if kayit is None:
+            return
+        kayit["takipler"].pop(no, None)
+        if not kayit["takipler"]:
+            self.hesaplar.pop(hesap, None)
+            self.zamanlayici.cancel(("oturum", hesap))
+
+
+    # ===========================
+    # Yenileme (durum makinesi)
+    # ===========================
+    def login_suruyor(self, takip: dict) -> bool:
+        kayit = self.hesaplar.get(hesap_anahtari(takip))
+        return kayit is not None and kayit["ucus"] is not None
+
+    def gecersiz_mi(self, takip: dict) -> bool:
+        """Hesabın tokeni 401 almış ve yenisi henüz alınamamış mı."""
+        kayit = self.hesaplar.get(hesap_anahtari(takip))
+        return kayit is not None and kayit["gecersiz"]
+
+    def bekleme_kalan(self, takip: dict) -> float:
+        """Hesabın tokeni geçersiz ve sıradaki login denemesi bekleniyorsa kalan süre (sn), değilse 0."""
+        kayit = self.hesaplar.get(hesap_anahtari(takip))
+        if kayit is None or not kayit["gecersiz"]:
+            return 0.0
+        return max(0.0, kayit["sonraki_deneme"] - self.saat.zaman())
+
+    async def yenile(self, takip: dict, eski_token: str | None = None) -> str | None:
+        """
+        401 yolu: hesap için tek bir login denemesi yapar ve yeni tokeni tüm
+        takiplerine dağıtır. Hesapta devam eden bir login varsa yenisi
+        başlatılmaz, onun sonucu beklenir; 401 alan `eski_token` bu arada
+        zaten yenilendiyse login yapılmaz.
+
+        Başarısız denemeden sonra bir sonraki deneme zamanlayıcıda planlanır
+        (RELOGIN_WAIT_MIN–MAX sn, RELOGIN_MAX_RETRY denemeden sonra
+        RELOGIN_FAIL_BREAK); o zamana kadar çağrılar hiç denemeden None döner.
+        """
+        hesap = hesap_anahtari(takip)
+        if hesap is None:
+            return None
+        kayit = self.hesaplar.get(hesap)
+        if kayit is None:
+            # Takip bu arada bitmiş olabilir; tek seferlik kayıtla devam
+            kayit = self._yeni_kayit(takip)
+            kayit["takipler"][0] = (None, hesap[:3] + "********", takip)
+        elif eski_token is not None and kayit["token"] and kayit["token"] != eski_token:
+            return kayit["token"]
+
+        kayit["gecersiz"] = True
+        if kayit["ucus"] is None and kayit["sonraki_deneme"] > self.saat.zaman():
+            return None
+        return await self._ucus(hesap, kayit)
+
+    async def _ucus(self, hesap: str, kayit: dict) -> str | None:
+        """Hesabın devam eden login'ine katılır, yoksa yenisini başlatır."""
+        if kayit["ucus"] is not None:
+            self.ortak_bekleyen += 1
+            return await asyncio.shield(kayit["ucus"])
+
+        ucus = kayit["ucus"] = asyncio.ensure_future(self._deneme(hesap, kayit))
+
+        def _bitti(_):
+            if kayit["ucus"] is ucus:
+                kayit["ucus"] = None
+
+        ucus.add_done_callback(_bitti)
+        return await asyncio.shield(ucus)
+
+    async def _deneme(self, hesap: str, kayit: dict) -> str | None:
+        """Tek login denemesi; sonucuna göre hesabın durumunu ve sıradaki işini ayarlar."""
+        kullanicilar = self._kullanicilar(kayit) if kayit["gecersiz"] else []
+        username = self._kullanici_adi(kayit)
+        deneme = kayit["deneme"] + 1
+
+        for uid in kullanicilar:
+            await self._bildir("oturum_yenileniyor", uid, deneme, RELOGIN_MAX_RETRY)
+
+        self.login_sayisi += 1
+        bas = self.saat.monotonik()
+        jwt = await self.login(kayit["tc"], kayit["sifre"])
+        metrikler.login_sonuc.artir("basarili" if jwt else "basarisiz")
+        olay("login", hesap=hesap[:3] + "********", basarili=bool(jwt), deneme=deneme,
+             proaktif=not kayit["gecersiz"], sure_ms=round((self.saat.monotonik() - bas) * 1000))
+        if jwt:
+            kayit.update(token=jwt, exp=api.jwt_exp(jwt), durum="gecerli", deneme=0,
+                         sonraki_deneme=0.0, gecersiz=False)
+            self._dagit(kayit)
+            self._planla(hesap, kayit)
+            if kullanicilar:
+                user_logger.info(f"{username} - Oturum başarıyla yenilendi.")
+            else:
+                user_logger.info(f"{username} - Oturum süresi dolmadan yenilendi.")
+            for uid in kullanicilar:
+                await self._bildir("oturum_yenilendi", uid)
+            return jwt
+
+        if deneme >= RELOGIN_MAX_RETRY:
+            bekleme = RELOGIN_FAIL_BREAK
+            kayit.update(durum="mola", deneme=0)
+            user_logger.warning(
+                f"{username} - {RELOGIN_MAX_RETRY} kez oturum yenileme başarısız. "
+                f"{RELOGIN_FAIL_BREAK // 60} dk mola veriliyor."
+            )
+            for uid in kullanicilar:
+                await self._bildir("oturum_yenilenemedi", uid, RELOGIN_FAIL_BREAK)
+        else:
+            bekleme = self.saat.rng.randint(RELOGIN_WAIT_MIN, RELOGIN_WAIT_MAX)
+            kayit.update(durum="yeniden_giris", deneme=deneme)
+            user_logger.warning(f"{username} - Oturum yenilenemedi ({deneme}/{RELOGIN_MAX_RETRY}), {bekleme} sn sonra tekrar.")
+            for uid in kullanicilar:
+                await self._bildir("oturum_yenileme_basarisiz", uid, deneme, bekleme)
+
+        kayit["sonraki_deneme"] = self.saat.zaman() + bekleme
+        self._planla(hesap, kayit)
+        return None
+
+    def _dagit(self, kayit: dict):
+        for _, _, takip in kayit["takipler"].values():
+            if takip.get("token") != kayit["token"]:
+                takip["token"] = kayit["token"]
+                if self.guncellendi is not None:
+                    self.guncellendi(takip)
+
+    def _sonraki(self, kayit: dict) -> float | None:
+        """Hesabın yenileme işinin bir sonraki çalışmasına kalan süre; iş yoksa None."""
+        simdi = self.saat.zaman()
+        if kayit["durum"] != "gecerli" or kayit["gecersiz"]:
+            return max(0.0, kayit["sonraki_deneme"] - simdi)
+        if kayit["exp"] is None:
+            return None  # exp çözülemedi: sadece 401'de yenilenir
+        return max(0.0, kayit["exp"] - simdi - OTURUM_YENILEME_PAYI)
+
+    def _planla(self, hesap: str, kayit: dict):
+        if self.hesaplar.get(hesap) is not kayit:
+            return
+        gecikme = self._sonraki(kayit)
+        if gecikme is None:
+            self.zamanlayici.cancel(("oturum", hesap))
+        else:
+            self.zamanlayici.schedule(("oturum", hesap), lambda: self._yenileme_turu(hesap), delay=gecikme)
+
+    async def _yenileme_turu(self, hesap: str):
+        """Zamanlayıcı işi: süresi yaklaşan tokeni yeniler ya da bekleyen login denemesini yapar."""
+        kayit = self.hesaplar.get(hesap)
+        if kayit is None or not kayit["takipler"]:
+            return None
+
+        # 401 yolu bu arada yenilediyse ya da sıradaki denemenin vakti gelmediyse erken kalktık demektir
+        kalan = self._sonraki(kayit)
+        if kalan is None or kalan > 0:
+            return kalan
+
+        await self._ucus(hesap, kayit)
+        return self._sonraki(kayit)
+
+    # ===========================
+    # Yardımcılar
+    # ===========================
+    @staticmethod
+    def _kullanicilar(kayit: dict) -> list:
+        return [uid for uid in dict.fromkeys(uid for uid, _, _ in kayit["takipler"].values()) if uid is not None]
+
+    @staticmethod
+    def _kullanici_adi(kayit: dict) -> str:
+        for _, username, _ in kayit["takipler"].values():
+            return username
+        return kayit["tc"][:3] + "********"
+
+    async def _bildir(self, olay: str, *args):
+        if self.bildirici is not None:
+            await getattr(self.bildirici, olay)(*args)
+
+    def durum(self) -> dict:
+        """Hesap başına token'ın kalan süresi (sn), deneme/mola durumu ve takip sayısı; TC maskelenir."""
+        simdi = self.saat.zaman()
+        return {
+            f"{hesap[:3]}********": {
+                "kalan": round(kayit["exp"] - simdi) if kayit["exp"] else None,
+                "takipler": len(kayit["takipler"]),
+                "durum": kayit["durum"],
+                "gecersiz": kayit["gecersiz"],
+                "deneme": kayit["deneme"],
+                "sonraki_deneme": max(0, round(kayit["sonraki_deneme"] - simdi)),
+                "login_suruyor": kayit["ucus"] is not None,
+            }
+            for hesap, kayit in self.hesaplar.items()
+        }
+
+    def stats(self) -> dict:
+        return {"login": self.login_sayisi, "ortak_bekleyen": self.ortak_bekleyen, "hesaplar": self.durum()}
@@ -0,0 +1,190 @@
+"""
+İsteğe bağlı profil kancaları: sıcak yolun nereye zaman harcadığını görmek için.
+
+Açmak için ortam değişkeni ya da (PC modunda) --profil:
+
+    MHRS_PROFIL=1                 profil açık
+    MHRS_PROFIL_ORNEKLEME=10      her N çağrıdan biri cProfile altında çalışır
+    MHRS_PROFIL_ARALIK=300        sn; bu aralıkla döküm alınır (0: sadece istekle)
+    MHRS_PROFIL_BELLEK=1          tracemalloc da açılır
+
+Açıkken TakipServisi zamanlayıcı turunu, randevu_sorgula ve randevu_al'ı
+sarmalar: her çağrının süresi `mhrs_profil_sure_saniye{bolum}` histogramına
+yazılır, örneklenen çağrılar süreç geneli bir cProfile'a eklenir. Döküm
+(pstats + okunur özet + tracemalloc) zamanlayıcıyla, SIGUSR1 ile ya da
+servis dururken log dizinindeki profil/ altına yazılır.
+
+Kapalıyken hiçbir şey sarmalanmaz; sıcak yolda ek maliyet yoktur.
+
+Not: async çağrı cProfile altındayken araya giren diğer görevler de ölçülür;
+örnekleme oranı düşük tutulursa döküm yine de genel tabloyu doğru verir.
+"""
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from datetime import datetime
+
+from mhrs_core import metrikler
+from mhrs_core.logs import log_dizini
+
+logger = logging.getLogger(__name__)
+
+
+def _ortam(ad: str, varsayilan: str) -> str:
+    return os.environ.get(ad, varsayilan).strip()
+
+
+PROFIL_ORNEKLEME = int(_ortam("MHRS_PROFIL_ORNEKLEME", "10"))
+PROFIL_ARALIK = float(_ortam("MHRS_PROFIL_ARALIK", "0"))
+PROFIL_UST_SATIR = 40       # özet dosyasında listelenen fonksiyon sayısı
+BELLEK_UST_SATIR = 25
+
+
+class Profilci:
+    def __init__(self):
+        self.etkin = False
+        self.ornekleme = PROFIL_ORNEKLEME
+        self.aralik = PROFIL_ARALIK
+        self.bellek = False
+        self._profil = None
+        self._derinlik = 0      # iç içe/eşzamanlı örneklenen çağrılar
+        self._sayac = 0
+        self._gorev = None
+        self._sure = None
+
+    def ac(self, ornekleme: int | None = None, aralik: float | None = None, bellek: bool | None = None):
+        """Profili açar. Servis oluşturulmadan önce çağrılmalıdır (sarmalama orada yapılır)."""
+        self.etkin = True
+        if ornekleme is not None:
+            self.ornekleme = max(1, ornekleme)
+        if aralik is not None:
+            self.aralik = aralik
+        if bellek is not None:
+            self.bellek = bellek
+        if self._profil is None:
+            self._profil = cProfile.Profile()
+            self._sure = metrikler.metrikler.histogram(
+                "mhrs_profil_sure_saniye", "Profil açıkken sarmalanan bölümlerin süresi", ("bolum",)
+            )
+        if self.bellek and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def sarmala(self, bolum: str, fn):
+        """Async fonksiyonu süre ölçümü ve örneklemeli cProfile ile sarar."""
+
+        @functools.wraps(fn)
+        async def sarili(*args, **kwargs):
+            self._sayac += 1
+            ornek = self._sayac % self.ornekleme == 0
+            if ornek:
+                self._profil_gir()
+            bas = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self._sure.gozlem(time.perf_counter() - bas, bolum)
+                if ornek:
+                    self._profil_cik()
+
+        return sarili
+
+    def _profil_gir(self):
+        self._derinlik += 1
+        if self._derinlik == 1:
+            self._profil.enable()
+
+    def _profil_cik(self):
+        self._derinlik -= 1
+        if self._derinlik == 0:
+            self._profil.disable()
+
+    # ===========================
+    # Döküm
+    # ===========================
+    def dok(self, sebep: str = "istek") -> str | None:
+        """pstats, okunur özet ve (açıksa) tracemalloc dökümü yazar; özet dosyasının yolunu döner."""
+        if not self.etkin:
+            return None
+        dizin = os.path.join(log_dizini(), "profil")
+        os.makedirs(dizin, exist_ok=True)
+        on_ek = os.path.join(dizin, datetime.now().strftime("profil-%Y%m%d-%H%M%S"))
+
+        ozet = io.StringIO()
+        ozet.write(f"Sebep: {sebep} | örnekleme: 1/{self.ornekleme}\n\n")
+        ozet.write(self._sure_ozeti())
+        if self._derinlik == 0:
+            # Açık bir örnek yokken; devam eden ölçümün ortasında istatistik alınmaz
+            self._profil.dump_stats(on_ek + ".pstats")
+            ozet.write("\n")
+            stats = pstats.Stats(self._profil, stream=ozet)
+            stats.sort_stats("cumulative").print_stats(PROFIL_UST_SATIR)
+        if tracemalloc.is_tracing():
+            anlik = tracemalloc.take_snapshot()
+            anlik.dump(on_ek + ".tracemalloc")
+            ozet.write(f"\nBellek (en çok ayıran {BELLEK_UST_SATIR} satır):\n")
+            for istatistik in anlik.statistics("lineno")[:BELLEK_UST_SATIR]:
+                ozet.write(f"  {istatistik}\n")
+
+        with open(on_ek + ".txt", "w", encoding="utf-8") as f:
+            f.write(ozet.getvalue())
+        logger.info("Profil dökümü (%s): %s.txt", sebep, on_ek)
+        return on_ek + ".txt"
+
+    def _sure_ozeti(self) -> str:
+        satirlar = ["Bölüm süreleri (sn):"]
+        for (bolum,), (toplam, adet) in sorted(self._sure.toplamlar().items()):
+            satirlar.append(f"  {bolum:<16} adet={adet:<8} toplam={toplam:.3f} ort={toplam / adet:.4f}")
+        return "\n".join(satirlar) + "\n"
+
+    # ===========================
+    # Zamanlayıcı / sinyal
+    # ===========================
+    def baslat(self):
+        """Çalışan event loop'ta periyodik dökümü ve SIGUSR1 ile isteğe bağlı dökümü kurar."""
+        if not self.etkin or self._gorev is not None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, self._guvenli_dok, "SIGUSR1")
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass  # Windows / ana thread dışı
+        if self.aralik > 0:
+            self._gorev = loop.create_task(self._periyodik())
+
+    async def _periyodik(self):
+        while True:
+            await asyncio.sleep(self.aralik)
+            # Loop thread'inde: örnekleme açıp kapatan sarmalayıcılarla yarışmaz
+            self._guvenli_dok("zamanlayıcı")
+
+    def _guvenli_dok(self, sebep: str):
+        try:
+            self.dok(sebep)
+        except Exception:
+            logger.exception("Profil dökümü alınamadı")
+
+    def durdur(self):
+        """Periyodik dökümü durdurur ve son dökümü alır."""
+        if not self.etkin:
+            return
+        if self._gorev is not None:
+            self._gorev.cancel()
+            self._gorev = None
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass
+        self._guvenli_dok("kapanış")
+
+
+profil = Profilci()
+
+if _ortam("MHRS_PROFIL", "") not in ("", "0"):
+    profil.ac(bellek=_ortam("MHRS_PROFIL_BELLEK", "") not in ("", "0"))
@@ -0,0 +1,136 @@
+"""
+Zaman ve rastgelelik kaynağı: gerçek ya da sanal.
+
+Takip yolu (TakipServisi, OturumYoneticisi, DevreKesici, sahte MHRS) saati
+ve rastgele sayıları doğrudan time/datetime/random'dan değil bir Saat
+nesnesinden alır; varsayılan `gercek_saat`tir.
+
+Beklemeler zaten event loop üzerindedir (zamanlayıcı işleri, TokenBucket,
+asyncio.sleep). SanalSaat kendi event loop'unun saatini sanal yapar: çalışacak
+hazır iş ve bekleyen I/O yokken zaman bir sonraki zamanlayıcıya atlar. Aynı
+tohumla haftalarca sürecek bir takip akışı saniyeler içinde ve her seferinde
+aynı sırayla geçer (bkz. mhrs_core.simulasyon):
+
+    saat = SanalSaat(tohum=1)
+    servis = TakipServisi(bildirici, http=StubHttp(MhrsStub(saat=saat)), saat=saat)
+    saat.calistir(ana())      # ana() içindeki asyncio.sleep(7 * 86400) anında döner
+
+Sanal loop'ta gerçek ağ beklenmez; sahte MHRS'ye süreç içinden (StubHttp)
+gidilir. Log zaman damgaları gerçek saattir.
+"""
+import asyncio
+import random
+import selectors
+import time
+from datetime import datetime
+
+SANAL_COZUNURLUK = 1e-6   # sn; sanal loop'ta en kısa bekleme
+
+
+class Saat:
+    """Gerçek saat; rastgelelik random modülünden (ya da verilen random.Random'dan)."""
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+
+    def zaman(self) -> float:
+        """Epoch sn (time.time)."""
+        return time.time()
+
+    def monotonik(self) -> float:
+        """Süre ölçümü için (time.monotonic)."""
+        return time.monotonic()
+
+    def simdi(self) -> datetime:
+        return datetime.now()
+
+
+class _SanalSelector:
+    """Bekleme yerine sanal saati ilerleten selector sarmalayıcısı."""
+
+    def __init__(self, selector: selectors.BaseSelector, saat: "SanalSaat"):
+        self._selector = selector
+        self._saat = saat
+
+    def select(self, timeout=None):
+        olaylar = self._selector.select(0)
+        if olaylar or timeout == 0:
+            return olaylar
+        if timeout is None:
+            # Uyanacak zamanlayıcı yok: ancak gerçek bir I/O (ör. başka thread) ilerletebilir
+            return self._selector.select(None)
+        self._saat.ilerlet(timeout)
+        return olaylar
+
+    def __getattr__(self, ad):
+        return getattr(self._selector, ad)
+
+
+class _SanalLoop(asyncio.SelectorEventLoop):
+    def __init__(self, saat: "SanalSaat"):
+        super().__init__()
+        self._saat = saat
+        self._selector = _SanalSelector(self._selector, saat)
+
+    def time(self) -> float:
+        return self._saat.monotonik()
+
+    def call_later(self, delay, callback, *args, context=None):
+        # Çok kısa beklemeler "şimdi"ye yuvarlanıp saat ilerlemeden tekrar etmesin
+        # (ör. jeton kovasının kalan kesri): en az SANAL_COZUNURLUK
+        if delay > 0:
+            delay = max(delay, SANAL_COZUNURLUK)
+        return super().call_later(delay, callback, *args, context=context)
+
+
+class SanalSaat(Saat):
+    """
+    `baslangic` anından başlayan sanal saat ve tohumlu RNG. Zaman yalnızca
+    sanal loop boştayken (ya da ilerlet() ile) ilerler.
+    """
+
+    def __init__(self, baslangic: datetime | None = None, tohum: int = 0):
+        super().__init__(random.Random(tohum))
+        self._epoch = (baslangic or datetime.now().replace(microsecond=0)).timestamp()
+        self._t = 0.0
+
+    def zaman(self) -> float:
+        return self._epoch + self._t
+
+    def monotonik(self) -> float:
+        return self._t
+
+    def simdi(self) -> datetime:
+        return datetime.fromtimestamp(self.zaman())
+
+    def gecen(self) -> float:
+        """Başlangıçtan beri geçen sanal süre (sn)."""
+        return self._t
+
+    def ilerlet(self, sn: float):
+        self._t += max(0.0, sn)
+
+    def yeni_loop(self) -> asyncio.AbstractEventLoop:
+        """Saati bu sanal saat olan event loop."""
+        return _SanalLoop(self)
+
+    def calistir(self, coro):
+        """asyncio.run gibi, ama sanal zamanlı yeni bir loop'ta."""
+        loop = self.yeni_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(coro)
+        finally:
+            try:
+                kalanlar = asyncio.all_tasks(loop)
+                for gorev in kalanlar:
+                    gorev.cancel()
+                loop.run_until_complete(asyncio.gather(*kalanlar, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+
+
+# Varsayılan: gerçek saat ve random modülü
+gercek_saat = Saat()
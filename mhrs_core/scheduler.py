@@ -0,0 +1,213 @@
+"""
+Tüm takipleri tek yerden yöneten zamanlayıcı.
+
+Her takip (ya da ortak sorgu anahtarı) için ayrı bir uyuyan coroutine yerine,
+bir sonraki sorgu zamanları tek bir heap'te tutulur. Zamanı gelen işler sınırlı
+sayıda worker'a dağıtılır. İş fonksiyonu bir sonraki turun bekleme süresini
+(sn) döner; None dönerse iş biter.
+
+Upstream istek bütçesi iş başına değil istek başına, HTTP istemcisinde
+harcanır (bkz. async_client.RATE_PER_SEC). Bütçe yetmezse worker'lar jeton
+bekler, hazır kuyruğu dolar ve gecikme (lateness) büyür.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+
+from mhrs_core import metrikler
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 8              # aynı anda çalışan iş sayısı
+ERROR_DELAY = 95         # iş hata fırlatırsa bir sonraki deneme (sn)
+
+
+class TokenBucket:
+    """Hız sınırı: saniyede `rate` jeton, en fazla `burst` birikir."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = None
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._last is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Job:
+    __slots__ = ("func", "seq", "due", "running")
+
+    def __init__(self, func):
+        self.func = func
+        self.seq = None
+        self.due = None
+        self.running = False
+
+
+class Scheduler:
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self._heap = []  # (due, seq, key)
+        self._jobs = {}  # key -> _Job
+        self._seq = itertools.count()
+        self._tasks = []
+        self._ready = None
+        self._wakeup = None
+        self._idle = None
+        self._running = 0
+        self.dispatched = 0
+        self.late_last = 0.0
+        self.late_max = 0.0
+        self.late_avg = 0.0
+
+    def __contains__(self, key) -> bool:
+        return key in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def kalan(self, key) -> float | None:
+        """İşin bir sonraki çalışmasına kalan süre (sn); çalışıyorsa 0, yoksa None."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        if job.running or job.due is None:
+            return 0.0
+        return max(0.0, job.due - asyncio.get_running_loop().time())
+
+    def _push(self, key, job: _Job, delay: float):
+        loop = asyncio.get_running_loop()
+        job.seq = next(self._seq)
+        job.due = loop.time() + max(0.0, delay)
+        heapq.heappush(self._heap, (job.due, job.seq, key))
+        if self._heap[0][1] == job.seq and self._wakeup is not None:
+            self._wakeup.set()
+
+    def schedule(self, key, func, delay: float = 0.0):
+        """func: argümansız coroutine fonksiyonu; bir sonraki bekleme süresini döner."""
+        job = self._jobs.get(key)
+        if job is None:
+            job = self._jobs[key] = _Job(func)
+        else:
+            job.func = func
+        if self._idle is not None:
+            self._idle.clear()
+        if not job.running:
+            self._push(key, job, delay)
+
+    def cancel(self, key):
+        """İşi kaldırır; heap'teki kaydı dağıtıcı tarafından atlanır."""
+        self._jobs.pop(key, None)
+        self._check_idle()
+
+    def _check_idle(self):
+        if not self._jobs and self._idle is not None:
+            self._idle.set()
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue(maxsize=self.workers)
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._check_idle()
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """Tüm işler bitene (ya da iptal edilene) kadar bekler."""
+        await self._idle.wait()
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            due, seq, key = self._heap[0]
+            job = self._jobs.get(key)
+            # Çalışan iş bitince worker onu yeniden planlar; ikinci kez dağıtılmaz
+            if job is None or job.seq != seq or job.running:
+                heapq.heappop(self._heap)
+                continue
+
+            bekle = due - loop.time()
+            if bekle > 0:
+                # wait_for değil: 3.11'de uyandırma ile stop() aynı tura denk gelirse
+                # iptali yutar ve dağıtıcı durmaz
+                self._wakeup.clear()
+                zamanlayici = loop.call_later(bekle, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    zamanlayici.cancel()
+                continue
+
+            heapq.heappop(self._heap)
+            gecikme = loop.time() - due
+            self.dispatched += 1
+            self.late_last = gecikme
+            self.late_max = max(self.late_max, gecikme)
+            self.late_avg += (gecikme - self.late_avg) * 0.05
+            metrikler.zamanlayici_gecikme.gozlem(gecikme)
+            job.running = True
+            await self._ready.put((key, job))
+
+    async def _worker(self):
+        while True:
+            key, job = await self._ready.get()
+            if self._jobs.get(key) is not job:
+                job.running = False
+                continue
+            self._running += 1
+            try:
+                delay = await job.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Zamanlanmış iş hata verdi: %s", key)
+                delay = ERROR_DELAY
+            finally:
+                self._running -= 1
+                job.running = False
+
+            if self._jobs.get(key) is not job:
+                continue
+            if delay is None:
+                self._jobs.pop(key, None)
+                self._check_idle()
+            else:
+                self._push(key, job, delay)
+
+    def stats(self) -> dict:
+        """Kuyruk derinliği ve gecikme (lateness, sn) bilgisi."""
+        return {
+            "isler": len(self._jobs),
+            "heap": len(self._heap),
+            "hazir": self._ready.qsize() if self._ready is not None else 0,
+            "calisan": self._running,
+            "dagitilan": self.dispatched,
+            "gecikme_son": round(self.late_last, 3),
+            "gecikme_ort": round(self.late_avg, 3),
+            "gecikme_max": round(self.late_max, 3),
+        }
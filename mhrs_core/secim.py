@@ -0,0 +1,108 @@
+"""
+Bir cevaptaki aday slotlar arasından en iyisinin seçilmesi.
+
+Takipteki `siralama` ayarına göre her slota bir sıralama anahtarı verilir ve
+adaylar heap üzerinden sırayla çekilir: en iyi slot O(n) heapify + O(log n)
+ile bulunur, randevu alınamazsa aynı cevaptaki bir sonraki aday denenir.
+
+Sıralama tipleri:
+  - erken: en erken slot (varsayılan)
+  - hekim: adı verilen metni içeren hekim önce, sonra en erken
+  - kurum: adı verilen metni içeren kurum önce, sonra en erken
+  - saat:  [bas, bit) saat aralığındaki slotlar önce, aralığa uzaklığa göre
+"""
+import heapq
+from typing import Callable, Iterable, Iterator
+
+from mhrs_core.slots import Slot
+
+SIRALAMA_MENUSU = (
+    "1 - En erken randevu\n"
+    "2 - Tercih ettiğim hekim\n"
+    "3 - Tercih ettiğim kurum\n"
+    "4 - Tercih ettiğim saat aralığı"
+)
+SIRALAMA_TIPLERI = {"1": "erken", "2": "hekim", "3": "kurum", "4": "saat"}
+VARSAYILAN_SIRALAMA = {"tip": "erken"}
+
+
+def normal_ad(s: str | None) -> str:
+    """Hekim/kurum adlarını büyük-küçük harf ve I/İ/ı farkı gözetmeden karşılaştırmak için."""
+    if not s:
+        return ""
+    return s.replace("İ", "i").replace("I", "i").replace("ı", "i").casefold().strip()
+
+
+def saat_araligi_coz(metin: str) -> tuple[int, int]:
+    """'09-12' → (9, 12). Bitiş hariçtir; geçersizse ValueError."""
+    bas, _, bit = metin.replace(" ", "").partition("-")
+    bas, bit = int(bas), int(bit)
+    if not (0 <= bas < bit <= 24):
+        raise ValueError(f"Geçersiz saat aralığı: {metin}")
+    return bas, bit
+
+
+def siralama_olustur(tip_secimi: str, deger: str = "") -> dict:
+    """Sihirbaz cevaplarından takipte saklanacak sıralama ayarını üretir; geçersizse ValueError."""
+    tip = SIRALAMA_TIPLERI.get(tip_secimi.strip())
+    if tip is None:
+        raise ValueError(f"Geçersiz sıralama: {tip_secimi}")
+    if tip == "erken":
+        return {"tip": tip}
+    if tip == "saat":
+        bas, bit = saat_araligi_coz(deger)
+        return {"tip": tip, "bas": bas, "bit": bit}
+    deger = deger.strip()
+    if not deger:
+        raise ValueError("Tercih edilen ad boş olamaz")
+    return {"tip": tip, "deger": deger}
+
+
+def siralama_aciklama(siralama: dict | None) -> str:
+    siralama = siralama or VARSAYILAN_SIRALAMA
+    tip = siralama.get("tip", "erken")
+    if tip == "hekim":
+        return f"Tercih edilen hekim: {siralama['deger']}"
+    if tip == "kurum":
+        return f"Tercih edilen kurum: {siralama['deger']}"
+    if tip == "saat":
+        return f"Tercih edilen saat: {siralama['bas']:02d}:00-{siralama['bit']:02d}:00"
+    return "En erken randevu"
+
+
+def siralama_anahtari(siralama: dict | None) -> Callable[[Slot], tuple]:
+    """Takibin sıralama ayarından slot → anahtar fonksiyonu üretir (küçük olan daha iyi)."""
+    siralama = siralama or VARSAYILAN_SIRALAMA
+    tip = siralama.get("tip", "erken")
+
+    if tip == "hekim":
+        aranan = normal_ad(siralama["deger"])
+        return lambda s: (aranan not in normal_ad(s.hekim_adi), s.baslangic)
+
+    if tip == "kurum":
+        aranan = normal_ad(siralama["deger"])
+        return lambda s: (aranan not in normal_ad(s.kurum_adi), s.baslangic)
+
+    if tip == "saat":
+        bas_dk, bit_dk = siralama["bas"] * 60, siralama["bit"] * 60
+
+        def _saat(s: Slot) -> tuple:
+            dk = s.baslangic.hour * 60 + s.baslangic.minute
+            uzaklik = bas_dk - dk if dk < bas_dk else max(0, dk - bit_dk + 1)
+            return uzaklik, s.baslangic
+
+        return _saat
+
+    return lambda s: (s.baslangic,)
+
+
+def en_iyi_slotlar(slotlar: Iterable[Slot], siralama: dict | None) -> Iterator[Slot]:
+    """
+    Slotları en iyiden kötüye doğru üretir. Heap tembel boşaltılır: sadece
+    ilk aday isteniyorsa geri kalanlar sıralanmaz. Eşitlikte cevap sırası korunur.
+    """
+    anahtar = siralama_anahtari(siralama)
+    yigin = [(anahtar(s), i, s) for i, s in enumerate(slotlar)]
+    heapq.heapify(yigin)
+    while yigin:
+        yield heapq.heappop(yigin)[2]
@@ -0,0 +1,276 @@
+"""
+Sanal saatle takip simülasyonu: kapasite planlaması ve zamanlama politikası için.
+
+    python -m mhrs_core.simulasyon --takip 2000 --anahtar 300 --gun 7
+    python -m mhrs_core.simulasyon --gun 1 --rate 3 --sabit --json
+
+TakipServisi'nin kendisi (zamanlayıcı ve TokenBucket, uzun molalar, devre
+kesici, oturum yenileme, otomatik randevu) süreç içindeki sahte MHRS'ye
+(StubHttp) karşı SanalSaat üzerinde çalışır. Beklemeler anında geçer; aynı
+parametre ve tohum her seferinde aynı sonucu verir. Randevusu bulunan ya da
+alınan takip biter; `--sabit` ile yerine aynı anahtarda yenisi eklenir.
+
+Rapor:
+  - upstream istekler (uç nokta başına), slot sorgusu/sn ortalaması ve en
+    yoğun dakika
+  - anahtar başına tur aralığı (p50/p90/en çok; WAIT_MIN–WAIT_MAX ile
+    karşılaştırılır) ve uzun molalar
+  - zamanlayıcı gecikmesi: istek bütçesi (--rate) yetmiyorsa büyür
+  - bildirim/randevu sayıları ve takibin eklenmesinden sonuca kadar geçen süre
+  - simüle edilen sürenin gerçek süreye oranı
+
+Loglama kurulmaz; log zaman damgaları gerçek saat olacağından simülasyon
+olay()/kullanıcı logları yazmaz.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+from mhrs_core import api, metrikler
+from mhrs_core.async_client import BURST, RATE_PER_SEC
+from mhrs_core.saat import SanalSaat
+from mhrs_core.scheduler import WORKERS, Scheduler, TokenBucket
+from mhrs_core.stub import MhrsStub, StubHttp, sure_araligi
+from mhrs_core.takip import WAIT_MAX, WAIT_MIN, Bildirici, TakipServisi
+
+ORNEKLEME_ARALIGI = 60   # sn (sanal); yoğunluk ve nüfus tamamlama periyodu
+
+
+def _yuzdelik(degerler: list, oran: float) -> float:
+    if not degerler:
+        return 0.0
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(oran * len(sirali)))]
+
+
+class _SayanBildirici(Bildirici):
+    """Bildirimleri sayar; takibin eklenmesinden sonuca kadar geçen sanal süreyi tutar."""
+
+    def __init__(self, saat: SanalSaat):
+        self.saat = saat
+        self.eklendi = {}       # user_id -> sanal sn
+        self.biten = []         # sonuçlanan user_id'ler (--sabit için)
+        self.bulma_sureleri = []
+        self.sayilar = {}
+
+    def _say(self, ad: str):
+        self.sayilar[ad] = self.sayilar.get(ad, 0) + 1
+
+    def _sonuc(self, user_id):
+        eklendi = self.eklendi.pop(user_id, None)
+        if eklendi is not None:
+            self.bulma_sureleri.append(self.saat.gecen() - eklendi)
+        self.biten.append(user_id)
+
+    async def randevu_bulundu(self, user_id, slot):
+        self._say("bildirim")
+        self._sonuc(user_id)
+
+    async def randevu_alindi(self, user_id, bilgi):
+        self._say("randevu")
+        self._sonuc(user_id)
+
+    async def uzun_mola(self, user_id, deneme, sure, since_long_break):
+        self._say("uzun_mola")
+
+    async def token_gecersiz(self, user_id, yenilenebilir):
+        self._say("token_gecersiz")
+
+    async def oturum_yenilenemedi(self, user_id, mola):
+        self._say("oturum_yenilenemedi")
+
+
+class _OlcenServis(TakipServisi):
+    """Her anahtarın slot sorgusu zamanlarından tur aralıklarını toplar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.son_sorgu = {}
+        self.araliklar = []
+
+    async def randevu_sorgula(self, anahtar):
+        simdi = self.saat.gecen()
+        onceki = self.son_sorgu.get(anahtar)
+        if onceki is not None:
+            self.araliklar.append(simdi - onceki)
+        self.son_sorgu[anahtar] = simdi
+        return await super().randevu_sorgula(anahtar)
+
+
+def _takip(anahtar_no: int, hesap_no: int, otomatik: bool, bas: datetime) -> dict:
+    return {
+        "il_id": "34", "ilce_id": 3400 + anahtar_no, "klinik_id": 165, "klinik_adi": "Dahiliye (İç Hastalıkları)",
+        "kurum_id": -1, "kurum_adi": "Farketmez", "hekim_id": -1, "hekim_adi": "Farketmez",
+        "otomatik": otomatik, "tc": str(10_000_000_000 + hesap_no), "sifre": "sim", "token": None,
+        "baslangic_tarihi": bas.strftime("%d.%m.%Y"), "bitis_tarihi": (bas + timedelta(days=15)).strftime("%d.%m.%Y"),
+        "siralama": {"tip": "erken"}, "filtre": None,
+    }
+
+
+def simule_et(
+    takip: int = 1000,
+    anahtar: int = 200,
+    hesap: int = 100,
+    gun: float = 1,
+    otomatik_orani: float = 0.5,
+    sabit: bool = False,
+    rate: float = RATE_PER_SEC,
+    workers: int = WORKERS,
+    burst: int = BURST,
+    tohum: int = 0,
+    baslangic: datetime | None = None,
+    **stub_ayarlari,
+) -> dict:
+    """
+    Simülasyonu çalıştırıp raporu döner. `stub_ayarlari` MhrsStub'a geçer
+    (acilma_araligi, acik_kalma, uyari_orani, hata_orani, gecikme, ...).
+    """
+    saat = SanalSaat(baslangic or datetime(2030, 1, 7, 7, 0), tohum=tohum)
+    stub = MhrsStub(tohum=tohum, saat=saat, **stub_ayarlari)
+    # Takip yolunun her isteği (sorgu, login, randevu) bütçeden jeton alır
+    http = StubHttp(stub, butce=TokenBucket(rate, burst))
+    # Sihirbaz login'leri: simülasyon başında takip nüfusu hazır kabul edilir, bütçeyi tüketmez
+    sihirbaz_http = StubHttp(stub)
+    bildirici = _SayanBildirici(saat)
+    zamanlayici = Scheduler(workers=workers)
+    servis = _OlcenServis(bildirici, zamanlayici=zamanlayici, http=http, saat=saat)
+    gecikme_once = metrikler.zamanlayici_gecikme.toplamlar().get((), (0.0, 0))
+    dakikalik = []          # örnekleme aralığı başına slot sorgusu/sn
+    anahtar_nolari = {}     # user_id -> anahtar no
+    uid_sayaci = itertools.count()
+
+    async def ekle(anahtar_no: int):
+        uid = next(uid_sayaci)
+        t = _takip(anahtar_no, uid % max(1, hesap), saat.rng.random() < otomatik_orani, saat.simdi())
+        # Front-end'ler gibi: takip eklenirken login (sihirbaz)
+        t["token"] = await api.mhrs_login_get_token(sihirbaz_http, t["tc"], t["sifre"])
+        anahtar_nolari[uid] = anahtar_no
+        bildirici.eklendi[uid] = saat.gecen()
+        servis.takip_ekle(uid, f"sim{uid}", t, gecikme=saat.rng.uniform(0, WAIT_MIN))
+
+    async def calis():
+        await servis.start()
+        await asyncio.gather(*(ekle(i % max(1, anahtar)) for i in range(takip)))
+
+        onceki, onceki_an = stub.stats()["istekler"].get("slot", 0), saat.gecen()
+        son = gun * 86400
+        while saat.gecen() < son:
+            await asyncio.sleep(min(ORNEKLEME_ARALIGI, son - saat.gecen()))
+            sorgu = stub.stats()["istekler"].get("slot", 0)
+            dakikalik.append((sorgu - onceki) / max(saat.gecen() - onceki_an, 1e-9))
+            onceki, onceki_an = sorgu, saat.gecen()
+            if sabit:
+                biten, bildirici.biten = bildirici.biten, []
+                await asyncio.gather(*(ekle(anahtar_nolari.pop(uid)) for uid in biten))
+        await servis.stop()
+
+    duvar = time.perf_counter()
+    saat.calistir(calis())
+    duvar = time.perf_counter() - duvar
+
+    gecikme_toplam, gecikme_adet = metrikler.zamanlayici_gecikme.toplamlar().get((), (0.0, 0))
+    gecikme_adet -= gecikme_once[1]
+    sure = saat.gecen()
+    istekler = stub.stats()["istekler"]
+    aralik = servis.araliklar
+    return {
+        "parametreler": {
+            "takip": takip, "anahtar": anahtar, "hesap": hesap, "gun": gun, "otomatik_orani": otomatik_orani,
+            "sabit": sabit, "rate": rate, "workers": workers, "burst": burst, "tohum": tohum,
+            **stub_ayarlari,
+        },
+        "sanal_sure_sn": round(sure),
+        "gercek_sure_sn": round(duvar, 2),
+        "hiz": round(sure / duvar) if duvar else None,
+        "istekler": istekler,
+        "sorgu_sn_ort": round(istekler.get("slot", 0) / sure, 3) if sure else 0.0,
+        "sorgu_sn_en_yogun_dakika": round(max(dakikalik, default=0.0), 3),
+        "tur_araligi_sn": {
+            "p50": round(_yuzdelik(aralik, 0.5), 1),
+            "p90": round(_yuzdelik(aralik, 0.9), 1),
+            "en_cok": round(max(aralik, default=0.0), 1),
+            "hedef": [WAIT_MIN, WAIT_MAX],
+        },
+        "zamanlayici_gecikme_sn": {
+            "ort": round((gecikme_toplam - gecikme_once[0]) / gecikme_adet, 3) if gecikme_adet > 0 else 0.0,
+            "en_cok": round(zamanlayici.late_max, 3),
+        },
+        "bildirimler": dict(sorted(bildirici.sayilar.items())),
+        "bulma_suresi_dk": {
+            "adet": len(bildirici.bulma_sureleri),
+            "p50": round(_yuzdelik(bildirici.bulma_sureleri, 0.5) / 60, 1),
+            "p90": round(_yuzdelik(bildirici.bulma_sureleri, 0.9) / 60, 1),
+        },
+        "aktif_takip": len(servis.takipler),
+        "login": servis.oturumlar.login_sayisi,
+        "devre_engellenen": servis.devreler.engellenen,
+        "stub": {k: v for k, v in stub.stats().items() if k != "istekler"},
+    }
+
+
+def yazdir(sonuc: dict, cikti=sys.stdout):
+    def yaz(s=""):
+        print(s, file=cikti)
+
+    p = sonuc["parametreler"]
+    aralik, gecikme, bulma = sonuc["tur_araligi_sn"], sonuc["zamanlayici_gecikme_sn"], sonuc["bulma_suresi_dk"]
+    yaz(f"{p['takip']} takip / {p['anahtar']} anahtar / {p['hesap']} hesap, {p['gun']} gün | "
+        f"bütçe {p['rate']}/sn, {p['workers']} worker | tohum {p['tohum']}")
+    yaz(f"⏱️  {sonuc['sanal_sure_sn'] / 3600:,.1f} saat {sonuc['gercek_sure_sn']} sn'de simüle edildi "
+        f"(~{sonuc['hiz']:,}x)")
+    yaz("📡 İstekler: " + ", ".join(f"{uc} {adet:,}" for uc, adet in sonuc["istekler"].items()))
+    yaz(f"   Slot sorgusu: ort {sonuc['sorgu_sn_ort']}/sn, en yoğun dakika {sonuc['sorgu_sn_en_yogun_dakika']}/sn")
+    yaz(f"🔁 Tur aralığı: p50 {aralik['p50']} sn, p90 {aralik['p90']} sn, en çok {aralik['en_cok']} sn "
+        f"(hedef {aralik['hedef'][0]}–{aralik['hedef'][1]} sn)")
+    yaz(f"🗓️  Zamanlayıcı gecikmesi: ort {gecikme['ort']} sn, en çok {gecikme['en_cok']} sn")
+    yaz("🔔 " + (", ".join(f"{ad} {adet:,}" for ad, adet in sonuc["bildirimler"].items()) or "bildirim yok"))
+    yaz(f"   Bulma süresi: {bulma['adet']} takip, p50 {bulma['p50']} dk, p90 {bulma['p90']} dk | "
+        f"aktif takip {sonuc['aktif_takip']}, login {sonuc['login']}, devre engeli {sonuc['devre_engellenen']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sanal saatle MHRS takip simülasyonu")
+    parser.add_argument("--takip", type=int, default=1000)
+    parser.add_argument("--anahtar", type=int, default=200, help="ayrı sorgu anahtarı sayısı")
+    parser.add_argument("--hesap", type=int, default=100, help="ayrı TC (oturum) sayısı")
+    parser.add_argument("--gun", type=float, default=1, help="simüle edilecek süre, gün")
+    parser.add_argument("--otomatik-orani", type=float, default=0.5, help="otomatik randevu alan takiplerin oranı")
+    parser.add_argument("--sabit", action="store_true", help="biten takiplerin yerine yenisini ekle")
+    parser.add_argument("--rate", type=float, default=RATE_PER_SEC, help="saniyede en fazla upstream istek")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--burst", type=int, default=BURST)
+    parser.add_argument("--tohum", type=int, default=0)
+    parser.add_argument("--gecikme", type=sure_araligi, default=(0.1, 0.4), help="stub cevap gecikmesi, sn ya da aralık")
+    parser.add_argument("--acilma-araligi", type=float, default=3600, help="sn; anahtar başına slot açılma periyodu")
+    parser.add_argument("--acik-kalma", type=float, default=600, help="açılan slotun boş kaldığı sn")
+    parser.add_argument("--baslangic-bos", type=int, default=0, help="anahtarın ilk sorgusunda boş slot sayısı")
+    parser.add_argument("--uyari-orani", type=float, default=0.0)
+    parser.add_argument("--hata-orani", type=float, default=0.0)
+    parser.add_argument("--token-omru", type=float, default=3600)
+    parser.add_argument("--oturum-omru", type=float, default=0)
+    parser.add_argument("--json", action="store_true", help="raporu JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    # Simülasyonun ürettiği uyarılar (401, devre, ...) konsolu doldurmasın
+    logging.disable(logging.WARNING)
+    sonuc = simule_et(
+        takip=args.takip, anahtar=args.anahtar, hesap=args.hesap, gun=args.gun,
+        otomatik_orani=args.otomatik_orani, sabit=args.sabit, rate=args.rate, workers=args.workers,
+        burst=args.burst, tohum=args.tohum, gecikme=args.gecikme, acilma_araligi=args.acilma_araligi,
+        acik_kalma=args.acik_kalma, baslangic_bos=args.baslangic_bos, uyari_orani=args.uyari_orani,
+        hata_orani=args.hata_orani, token_omru=args.token_omru, oturum_omru=args.oturum_omru,
+    )
+    if args.json:
+        json.dump(sonuc, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        yazdir(sonuc)
+
+
+if __name__ == "__main__":
+    main()
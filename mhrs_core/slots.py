@@ -0,0 +1,140 @@
+"""
+slot-sorgulama cevabındaki hekim → muayene yeri → saat → slot ağacının çözümlenmesi.
+
+Çözümleyici bir generator'dür: cevabı yerinde değiştirmez, boş ve ileri tarihli
+her slot için değiştirilemez bir Slot kaydı üretir. Zaman karşılaştırması
+cevap başına alınan tek bir `now` anına göre yapılır.
+
+SlotSnapshot bir sorgu anahtarında en son görülen slotları tutar ve yeni
+cevabı bununla karşılaştırıp yalnızca açılan/kapanan slotları verir.
+"""
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterator, NamedTuple
+
+if TYPE_CHECKING:
+    from mhrs_core.filtre import SlotFiltresi
+
+
+class Slot(NamedTuple):
+    """Boş bir randevu slotu. NamedTuple: __slots__ = (), değiştirilemez."""
+
+    id: int
+    cetvel_id: int | None
+    baslangic: datetime
+    bitis: datetime
+    baslangic_zamani: str  # MHRS'ye geri gönderilen ham değer
+    bitis_zamani: str
+    hekim_id: int | None
+    hekim_adi: str
+    kurum_id: int | None
+    kurum_adi: str | None
+    muayene_yeri_id: int | None
+    muayene_yeri_adi: str | None
+    klinik_adi: str
+
+
+def hekim_adi(hekim: dict) -> str:
+    hekim_info = hekim.get("hekim") or hekim
+    ad = (hekim_info.get("ad") or "").strip()
+    soyad = (hekim_info.get("soyad") or "").strip()
+    return (ad + " " + soyad).strip() or (
+        hekim_info.get("hekimAdi")
+        or hekim_info.get("hekimAd")
+        or hekim_info.get("hekimAdiSoyadi")
+        or hekim_info.get("text")
+        or "Bilinmiyor"
+    )
+
+
+def bos_slotlar(
+    data: list, klinik_adi: str, now: datetime | None = None, filtre: "SlotFiltresi | None" = None
+) -> Iterator[Slot]:
+    """
+    Slot ağacındaki boş ve `now`dan sonraki slotları ağaç sırasıyla üretir.
+    `filtre` verilirse hekim kısmı hekim başına, zaman kısmı slot başına
+    Slot kaydı oluşturulmadan önce uygulanır.
+    """
+    if not data:
+        return
+    if now is None:
+        now = datetime.now()
+    fromiso = datetime.fromisoformat
+    hekim_uygun = filtre.hekim if filtre is not None else None
+    zaman_uygun = filtre.zaman if filtre is not None else None
+
+    for hekim in data[0].get("hekimSlotList") or ():
+        # Hekim/kurum bilgisi hekim başına bir kez çıkarılır
+        hekim_info = hekim.get("hekim") or hekim
+        adi = hekim_adi(hekim)
+        if hekim_uygun is not None and not hekim_uygun(adi):
+            continue
+        hekim_id = hekim_info.get("mhrsHekimId", hekim_info.get("id"))
+        kurum = hekim.get("kurum") or {}
+        kurum_id = kurum.get("mhrsKurumId", kurum.get("id"))
+        kurum_adi = kurum.get("kurumAdi") or kurum.get("adi")
+
+        for muayene in hekim.get("muayeneYeriSlotList") or ():
+            muayene_yeri = muayene.get("muayeneYeri") or {}
+            for saat in muayene.get("saatSlotList") or ():
+                for sl in saat.get("slotList") or ():
+                    if not sl.get("bos"):
+                        continue
+
+                    bas_str = sl["baslangicZamani"]
+                    baslangic = fromiso(bas_str)
+                    if baslangic <= now:
+                        continue
+                    if zaman_uygun is not None and not zaman_uygun(baslangic):
+                        continue
+
+                    detay = sl.get("slot") or {}
+                    bit_str = sl["bitisZamani"]
+                    yield Slot(
+                        sl["id"],
+                        detay.get("fkCetvelId"),
+                        baslangic,
+                        fromiso(bit_str),
+                        bas_str,
+                        bit_str,
+                        hekim_id,
+                        adi,
+                        kurum_id,
+                        kurum_adi,
+                        detay.get("muayeneYeriId", muayene_yeri.get("id")),
+                        detay.get("muayeneYeriAdi") or muayene_yeri.get("adi"),
+                        klinik_adi,
+                    )
+
+
+class SlotSnapshot:
+    """
+    Bir sorgu anahtarında son cevapta görülen boş slotlar (id -> başlangıç).
+
+    Her güncellemede tamamen yeni cevapla değiştirilir; geçmişe kayan ya da
+    dolan slotlar kendiliğinden düşer. Boyut, son cevaptaki boş slot sayısını
+    aşmaz.
+    """
+
+    __slots__ = ("_gorulen",)
+
+    def __init__(self):
+        self._gorulen: dict[int, datetime] = {}
+
+    def guncelle(self, slotlar: list[Slot]) -> tuple[list[Slot], list[int]]:
+        """Yeni cevabı kaydeder; (açılan slotlar, kapanan slot id'leri) döner."""
+        onceki = self._gorulen
+        simdiki = {s.id: s.baslangic for s in slotlar}
+        acilan = [s for s in slotlar if s.id not in onceki]
+        kapanan = [sid for sid in onceki if sid not in simdiki]
+        self._gorulen = simdiki
+        return acilan, kapanan
+
+    def unut(self, slot_id: int):
+        """Slot bir sonraki cevapta hâlâ boşsa yeniden açılmış sayılır."""
+        self._gorulen.pop(slot_id, None)
+
+    def __contains__(self, slot_id) -> bool:
+        return slot_id in self._gorulen
+
+    def __len__(self) -> int:
+        return len(self._gorulen)
@@ -0,0 +1,186 @@
+"""
+Aktif takiplerin SQLite üzerinde kalıcı tutulması.
+
+Bot yeniden başladığında takipler buradan okunup zamanlayıcıya geri verilir;
+kullanıcıların /start akışını baştan yapması gerekmez. Takip kaydı seçilen
+il/ilçe/klinik adlarını da içerdiği için referans verisi yeniden çekilmez.
+
+Giriş bilgileri (TC, şifre, token) diske ancak bir şifreleyici verilirse
+yazılır; şifreleyici yoksa kayıtta bulunmazlar ve bu takipler yeniden
+başlatmada devam edemez (kullanıcı /start ile yeniden başlatır). Telegram
+botunda şifreleyici MHRS_KIMLIK_ANAHTARI ortam değişkenindeki Fernet
+anahtarından kurulur (`cryptography` paketi gerekir):
+
+    python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+
+Veritabanı ile SQLite'ın yan dosyaları (-wal, -shm) yalnızca sahibine
+okunur (0600).
+
+Yazma maliyeti: WAL ve synchronous=NORMAL ile commit fsync beklemez (fsync
+yalnızca checkpoint'te), yazım onlarca mikrosaniyedir. Store'a yalnızca
+takip eklenip bırakılırken ve token yenilenince yazılır; sorgu turları
+yazmaz. Bu yüzden yazımlar event loop üzerinde senkron yapılır.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = os.path.join("data", "takipler.db")
+KIMLIK_ANAHTARI_ENV = "MHRS_KIMLIK_ANAHTARI"
+GIZLI_ALANLAR = ("tc", "sifre", "token")
+OKUMA_PARTI = 500        # hepsi(): tek sorguda okunan satır
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS takipler (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    sorgu_anahtari TEXT NOT NULL,
+    veri TEXT NOT NULL,
+    olusturma REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_takipler_user ON takipler(user_id);
+CREATE INDEX IF NOT EXISTS idx_takipler_anahtar ON takipler(sorgu_anahtari);
+"""
+
+
+def _anahtar_metni(anahtar: tuple) -> str:
+    return "|".join(str(p) for p in anahtar)
+
+
+def ortamdan_sifreleyici():
+    """MHRS_KIMLIK_ANAHTARI varsa ondan Fernet şifreleyici, yoksa None."""
+    anahtar = os.environ.get(KIMLIK_ANAHTARI_ENV, "").strip()
+    if not anahtar:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        raise RuntimeError(f"{KIMLIK_ANAHTARI_ENV} verilmiş ama cryptography kurulu değil (pip install cryptography)")
+    return Fernet(anahtar.encode())
+
+
+class TakipStore:
+    """
+    sifreleyici: encrypt(bytes) -> bytes / decrypt(bytes) -> bytes (ör. Fernet);
+    None ise giriş bilgileri yazılmaz.
+    """
+
+    def __init__(self, path: str = STORE_PATH, sifreleyici=None):
+        self.path = path
+        self.sifreleyici = sifreleyici
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Bağlantı ilk kullanımda açılır; import maliyeti yok
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Dosya 0600 oluşturulur; SQLite -wal/-shm dosyalarını ana dosyanın izinleriyle açar
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # Eski sürümlerin 0644 bıraktığı dosyalar için
+            for yol in (self.path, self.path + "-wal", self.path + "-shm"):
+                try:
+                    os.chmod(yol, 0o600)
+                except OSError:
+                    pass
+            self._conn = conn
+        return self._conn
+
+    def _veri(self, takip: dict) -> str:
+        """Yazılacak JSON: giriş bilgileri şifrelenip "kimlik" alanına girer ya da hiç yazılmaz."""
+        veri = {k: v for k, v in takip.items() if k != "id" and k not in GIZLI_ALANLAR}
+        kimlik = {k: takip[k] for k in GIZLI_ALANLAR if takip.get(k)}
+        if kimlik and self.sifreleyici is not None:
+            veri["kimlik"] = self.sifreleyici.encrypt(json.dumps(kimlik).encode()).decode()
+        return json.dumps(veri, ensure_ascii=False)
+
+    def _takip(self, takip_id: int, veri: str) -> dict:
+        takip = json.loads(veri)
+        sifreli = takip.pop("kimlik", None)
+        if sifreli is not None and self.sifreleyici is not None:
+            try:
+                takip.update(json.loads(self.sifreleyici.decrypt(sifreli.encode())))
+            except Exception:
+                # Anahtar değişmiş: takip giriş bilgisi yokmuş gibi yüklenir
+                logger.warning("Takip %s giriş bilgileri çözülemedi (anahtar değişmiş olabilir)", takip_id)
+        takip["id"] = takip_id
+        return takip
+
+    def ekle(self, user_id: int, username: str, anahtar: tuple, takip: dict) -> int:
+        """Takibi kaydeder, kalıcı takip id'sini döner."""
+        with self._lock:
+            db = self._db()
+            cur = db.execute(
+                "INSERT INTO takipler (user_id, username, sorgu_anahtari, veri, olusturma) VALUES (?, ?, ?, ?, ?)",
+                (user_id, username, _anahtar_metni(anahtar), self._veri(takip), time.time()),
+            )
+            db.commit()
+            return cur.lastrowid
+
+    def guncelle(self, takip_id: int, takip: dict):
+        """Token yenilenmesi gibi değişiklikleri yazar."""
+        with self._lock:
+            db = self._db()
+            db.execute("UPDATE takipler SET veri = ? WHERE id = ?", (self._veri(takip), takip_id))
+            db.commit()
+
+    def sil(self, takip_id: int):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM takipler WHERE id = ?", (takip_id,))
+            db.commit()
+
+    def kullanici_sil(self, user_id: int):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM takipler WHERE user_id = ?", (user_id,))
+            db.commit()
+
+    def _satirlar(self, sql: str, params: tuple = ()):
+        with self._lock:
+            rows = self._db().execute(sql, params).fetchall()
+        for takip_id, user_id, username, veri in rows:
+            yield takip_id, user_id, username, self._takip(takip_id, veri)
+
+    def hepsi(self, parti: int = OKUMA_PARTI):
+        """
+        (id, user_id, username, takip) kayıtlarını eklenme sırasıyla üretir.
+        Satırlar `parti`lik sayfalarla okunur; bellekte tüm tablo tutulmaz ve
+        okuma sürerken kayıt silinebilir.
+        """
+        son = 0
+        while True:
+            sayfa = list(self._satirlar(
+                "SELECT id, user_id, username, veri FROM takipler WHERE id > ? ORDER BY id LIMIT ?", (son, parti)
+            ))
+            yield from sayfa
+            if len(sayfa) < parti:
+                return
+            son = sayfa[-1][0]
+
+    def kullanici_takipleri(self, user_id: int):
+        return self._satirlar(
+            "SELECT id, user_id, username, veri FROM takipler WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+
+    def anahtar_takipleri(self, anahtar: tuple):
+        return self._satirlar(
+            "SELECT id, user_id, username, veri FROM takipler WHERE sorgu_anahtari = ? ORDER BY id",
+            (_anahtar_metni(anahtar),),
+        )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,677 @@
+"""
+prd.mhrs.gov.tr yerine yerelde çalışan sahte MHRS sunucusu.
+
+    python -m mhrs_core.stub --port 8080
+    MHRS_BASE_URL=http://127.0.0.1:8080 python mhrs_pc.py
+    python mhrs_pc.py --base-url http://127.0.0.1:8080
+
+İki giriş noktasının kullandığı uç noktaları uygular: login, hasta bilgisi,
+ilçe/klinik/kurum/hekim select-input listeleri, slot-sorgulama ve
+randevu-ekle. Ek bağımlılık yok (asyncio stream'leri, HTTP/1.1 keep-alive).
+
+Fikstürler:
+  - Varsayılan olarak her liste ve slot ağacı `--tohum`dan deterministik
+    üretilir; aynı tohum her çalıştırmada aynı ilçe/klinik/kurum/hekimleri verir.
+  - `--fikstur DIZIN` verilirse DIZIN/<uç nokta>.json (ilce, klinik, kurum,
+    hekim, hasta_bilgisi, slot, randevu_ekle) kaydedilmiş cevap olarak olduğu
+    gibi döner. Kaydedilmiş slot.json'da randevusu alınan slotlar dolu görünür.
+  - `--fikstur-yaz DIZIN` üretilen cevapları düzenlenebilir dosyalar olarak yazar.
+
+Davranış:
+  - Gecikme: `--gecikme 0.05-0.2` (tüm uçlar), `--slot-gecikme` (slot sorgusu).
+  - Login her TC/şifreyi kabul eder ve `--token-omru` sn'lik (exp) bir JWT
+    verir. Süresi dolan ya da `--oturum-omru` sn'den eski oturumun tokeni
+    401 alır (MHRS'nin oturumu erken düşürmesi).
+  - `--uyari-orani` ile slot sorgularının bir kısmı `--uyari-kodu` (RND4034)
+    uyarısıyla boş döner; `--hata-orani` ile 503 döner.
+  - Slot açılma planı sorgu anahtarı başına işler: ilk sorguda
+    `--baslangic-bos` slot boştur; sonra her `--acilma-araligi` sn'de
+    `--acilma-adet` slot açılır ve `--acik-kalma` sn sonra (başkası almış
+    gibi) kapanır. `--plan plan.json` ile sunucu açılışına göre ek olaylar:
+    [{"sn": 30, "adet": 2, "sure": 120}, ...]
+  - Randevu-ekle boş slotu alır; aynı slot bir daha boş görünmez.
+
+GET /stub/durum istek sayılarını, açık ve alınmış slotları döner.
+
+Sahte sunucuya karşı çalışırken referans listeleri gerçek MHRS'ninkilerden
+ayrı bir önbellek dosyasına yazılır (bkz. mhrs_core.cache.kaynak_yolu).
+"""
+import argparse
+import asyncio
+import base64
+import http
+import json
+import logging
+import os
+import random
+import re
+from datetime import datetime, timedelta
+
+from mhrs_core import api
+from mhrs_core.saat import Saat, gercek_saat
+
+logger = logging.getLogger(__name__)
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = 8080
+
+FIKSTUR_UC_NOKTALARI = ("hasta_bilgisi", "ilce", "klinik", "kurum", "hekim", "slot", "randevu_ekle")
+
+SLOT_DAKIKA = 15
+MESAI_SAATLERI = (8, 9, 10, 11, 13, 14, 15, 16)
+AYNI_ANDA_ACIK_MAX = 500       # anahtar başına; plan hatasında bellek büyümesin
+ACILMA_TELAFI_MAX = 100        # uzun aradan sonra gelen sorguda bir seferde işlenen periyot
+
+_ILCE_ADLARI = ("Merkez", "Kuzey", "Güney", "Doğu", "Batı", "Sahil")
+_KLINIKLER = (
+    (165, "Dahiliye (İç Hastalıkları)"),
+    (173, "Göz Hastalıkları"),
+    (176, "Kardiyoloji"),
+    (180, "Kulak Burun Boğaz Hastalıkları"),
+    (188, "Ortopedi ve Travmatoloji"),
+    (196, "Deri ve Zührevi Hastalıkları (Cildiye)"),
+    (203, "Nöroloji"),
+    (210, "Kadın Hastalıkları ve Doğum"),
+)
+_KURUM_EKLERI = ("Devlet Hastanesi", "Eğitim ve Araştırma Hastanesi", "Ağız ve Diş Sağlığı Merkezi",
+                 "İlçe Devlet Hastanesi")
+_ADLAR = ("Ahmet", "Ayşe", "Mehmet", "Fatma", "Mustafa", "Zeynep", "Emre", "Elif", "Can", "Selin")
+_SOYADLAR = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Aydın", "Öztürk", "Arslan", "Doğan")
+
+
+def sure_araligi(metin: str) -> tuple[float, float]:
+    """'0.2' → (0.2, 0.2), '0.05-0.2' → (0.05, 0.2); geçersizse ValueError."""
+    bas, _, bit = str(metin).replace(" ", "").partition("-")
+    bas = float(bas)
+    bit = float(bit) if bit else bas
+    if not 0 <= bas <= bit:
+        raise ValueError(f"Geçersiz süre aralığı: {metin}")
+    return bas, bit
+
+
+def _b64(veri: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(veri).encode()).decode().rstrip("=")
+
+
+def _yol_deseni(yol: str) -> re.Pattern:
+    """api.py'deki yol fonksiyonlarından eşleşme deseni: {} yerleri sayı grubudur."""
+    return re.compile(re.escape(yol).replace(re.escape("{}"), r"(-?\d+)") + "$")
+
+
+def slot_agaci(slotlar) -> list:
+    """
+    Slot kayıtlarından slot-sorgulama `data` ağacını (hekim → muayene yeri →
+    saat → slot) kurar. Kayıt: {"hekim", "kurum", "muayene_yeri", "id",
+    "cetvel_id", "baslangic": datetime, "bos"}.
+    """
+    hekimler = {}
+    for s in sorted(slotlar, key=lambda s: (s["hekim"]["mhrsHekimId"], s["baslangic"])):
+        hekim = hekimler.get(s["hekim"]["mhrsHekimId"])
+        if hekim is None:
+            hekim = hekimler[s["hekim"]["mhrsHekimId"]] = {
+                "hekim": s["hekim"], "kurum": s["kurum"], "muayeneYeriSlotList": [],
+            }
+        yerler = hekim["muayeneYeriSlotList"]
+        if not yerler or yerler[-1]["muayeneYeri"]["id"] != s["muayene_yeri"]["id"]:
+            yerler.append({"muayeneYeri": s["muayene_yeri"], "saatSlotList": []})
+        saatler = yerler[-1]["saatSlotList"]
+        bas = s["baslangic"]
+        saat = bas.strftime("%Y-%m-%d %H:00:00")
+        if not saatler or saatler[-1]["saat"] != saat:
+            saatler.append({"saat": saat, "bos": False, "slotList": []})
+        saatler[-1]["bos"] = saatler[-1]["bos"] or s["bos"]
+        saatler[-1]["slotList"].append({
+            "id": s["id"],
+            "baslangicZamani": bas.strftime("%Y-%m-%d %H:%M:%S"),
+            "bitisZamani": (bas + timedelta(minutes=SLOT_DAKIKA)).strftime("%Y-%m-%d %H:%M:%S"),
+            "bos": s["bos"],
+            "slot": {"fkCetvelId": s["cetvel_id"], "muayeneYeriId": s["muayene_yeri"]["id"]},
+        })
+    if not hekimler:
+        return []
+    return [{"hekimSlotList": list(hekimler.values())}]
+
+
+class MhrsStub:
+    """Sahte MHRS. Sunucu olarak (baslat) ya da doğrudan cevapla() ile süreç içinde kullanılır."""
+
+    def __init__(
+        self,
+        fikstur: str | None = None,
+        gecikme: tuple = (0.0, 0.0),
+        slot_gecikme: tuple | None = None,
+        token_omru: float = 3600,
+        oturum_omru: float = 0,
+        uyari_orani: float = 0.0,
+        uyari_kodu: str = "RND4034",
+        hata_orani: float = 0.0,
+        acilma_araligi: float = 600,
+        acilma_adet: int = 1,
+        acik_kalma: float = 300,
+        baslangic_bos: int = 2,
+        plan: list | None = None,
+        hekim_sayisi: int = 4,
+        tohum: int = 0,
+        saat: Saat = gercek_saat,
+    ):
+        self.fikstur = fikstur
+        self.gecikme = gecikme
+        self.slot_gecikme = slot_gecikme or gecikme
+        self.token_omru = token_omru
+        self.oturum_omru = oturum_omru
+        self.uyari_orani = uyari_orani
+        self.uyari_kodu = uyari_kodu
+        self.hata_orani = hata_orani
+        self.acilma_araligi = acilma_araligi
+        self.acilma_adet = acilma_adet
+        self.acik_kalma = acik_kalma
+        self.baslangic_bos = baslangic_bos
+        self.plan = sorted(plan or (), key=lambda o: o["sn"])
+        self.hekim_sayisi = hekim_sayisi
+        self.tohum = tohum
+        self.rng = random.Random(tohum)
+        self.saat = saat
+
+        self.baslangic = saat.monotonik()
+        self._kayitli = {}       # uç nokta -> kaydedilmiş cevap (fikstur dizininden)
+        self._oturumlar = {}     # token -> verildiği an (monotonic)
+        self._anahtarlar = {}    # sorgu anahtarı -> {"islenen": periyot, "plan": sıra}
+        self._acik = {}          # slot id -> {slot kaydı..., "anahtar", "kapanis": monotonic | None}
+        self._alinan = {}        # slot id -> randevuyu alan TC
+        self._istekler = {}      # uç nokta -> istek sayısı
+        self._sayac = 0
+        if fikstur:
+            self._fiksturleri_oku(fikstur)
+
+        self._rotalar = [
+            ("POST", re.compile(re.escape(api.LOGIN_PATH) + "$"), self._login),
+            ("GET", re.compile(re.escape(api.HASTA_BILGISI_PATH) + "$"), self._hasta_bilgisi),
+            ("GET", _yol_deseni(api.ilce_path("{}")), self._ilce),
+            ("GET", _yol_deseni(api.klinik_path("{}", "{}")), self._klinik),
+            ("GET", _yol_deseni(api.kurum_path("{}", "{}", "{}")), self._kurum),
+            ("GET", _yol_deseni(api.hekim_path("{}", "{}")), self._hekim),
+            ("POST", re.compile(re.escape(api.SLOT_PATH) + "$"), self._slot),
+            ("POST", re.compile(re.escape(api.RANDEVU_EKLE_PATH) + "$"), self._randevu_ekle),
+            ("GET", re.compile(r"/stub/durum$"), self._durum),
+        ]
+
+    def _fiksturleri_oku(self, dizin: str):
+        for ad in FIKSTUR_UC_NOKTALARI:
+            yol = os.path.join(dizin, f"{ad}.json")
+            if os.path.exists(yol):
+                with open(yol, encoding="utf-8") as f:
+                    self._kayitli[ad] = json.load(f)
+        logger.info("Kaydedilmiş fikstürler: %s", ", ".join(self._kayitli) or "-")
+
+    def _simdi(self) -> float:
+        return self.saat.monotonik() - self.baslangic
+
+    # ===========================
+    # Üretilen referans verileri
+    # ===========================
+    def _rastgele(self, *parcalar) -> random.Random:
+        # Aynı tohum ve parametreler her zaman aynı listeyi üretir
+        return random.Random(":".join(map(str, (self.tohum, *parcalar))))
+
+    def ilceler(self, plaka) -> list:
+        plaka = int(plaka)
+        adet = self._rastgele("ilce", plaka).randint(3, len(_ILCE_ADLARI))
+        return [{"value": plaka * 100 + i + 1, "text": _ILCE_ADLARI[i]} for i in range(adet)]
+
+    def klinikler(self, il_id, ilce_id) -> list:
+        rng = self._rastgele("klinik", il_id, ilce_id)
+        secilen = sorted(rng.sample(range(len(_KLINIKLER)), rng.randint(4, len(_KLINIKLER))))
+        return [{"value": _KLINIKLER[i][0], "text": _KLINIKLER[i][1]} for i in secilen]
+
+    def kurumlar(self, il_id, ilce_id, klinik_id) -> list:
+        rng = self._rastgele("kurum", il_id, ilce_id, klinik_id)
+        ilce = next((i["text"] for i in self.ilceler(il_id) if str(i["value"]) == str(ilce_id)), "Merkez")
+        return [
+            {"value": int(ilce_id) * 10 + i + 1, "text": f"{ilce} {_KURUM_EKLERI[i]}"}
+            for i in range(rng.randint(1, 3))
+        ]
+
+    def hekimler(self, kurum_id, klinik_id) -> list:
+        rng = self._rastgele("hekim", kurum_id, klinik_id)
+        return [
+            {"value": int(kurum_id) * 100 + i + 1, "text": f"{rng.choice(_ADLAR)} {rng.choice(_SOYADLAR)}"}
+            for i in range(self.hekim_sayisi)
+        ]
+
+    def _slot_hekimleri(self, anahtar: tuple) -> list:
+        """Sorgu anahtarının kapsadığı (hekim, kurum, muayene yeri) üçlüleri."""
+        il_id, ilce_id, klinik_id, kurum_id, hekim_id = anahtar
+        kurumlar = self.kurumlar(il_id, ilce_id, klinik_id)
+        if kurum_id != "-1":
+            kurumlar = [k for k in kurumlar if str(k["value"]) == kurum_id] or [
+                {"value": int(kurum_id), "text": f"Kurum {kurum_id}"}
+            ]
+        sonuc = []
+        for kurum in kurumlar:
+            for hekim in self.hekimler(kurum["value"], klinik_id):
+                if hekim_id != "-1" and str(hekim["value"]) != hekim_id:
+                    continue
+                ad, _, soyad = hekim["text"].partition(" ")
+                sonuc.append((
+                    {"mhrsHekimId": hekim["value"], "ad": ad, "soyad": soyad},
+                    {"mhrsKurumId": kurum["value"], "kurumAdi": kurum["text"]},
+                    {"id": hekim["value"] % 100 + 5000, "adi": f"{hekim['value'] % 100}. Poliklinik"},
+                ))
+        if not sonuc and hekim_id != "-1":
+            # Listede olmayan (ör. kaydedilmiş fikstürden seçilmiş) hekim
+            sonuc.append((
+                {"mhrsHekimId": int(hekim_id), "ad": "Hekim", "soyad": hekim_id},
+                {"mhrsKurumId": int(kurum_id), "kurumAdi": f"Kurum {kurum_id}"},
+                {"id": 5000, "adi": "1. Poliklinik"},
+            ))
+        return sonuc
+
+    # ===========================
+    # Slot açılma planı
+    # ===========================
+    def _slot_ac(self, anahtar: tuple, bas: datetime, bit: datetime, adet: int, sure: float | None):
+        hekimler = self._slot_hekimleri(anahtar)
+        en_erken = max(bas, self.saat.simdi() + timedelta(hours=1))
+        gunler = (bit.date() - en_erken.date()).days + 1
+        if not hekimler or gunler <= 0:
+            return
+        kapanis = self._simdi() + sure if sure else None
+        acilan = 0
+        for _ in range(adet * 20):
+            if acilan >= adet or len(self._acik) >= AYNI_ANDA_ACIK_MAX * max(1, len(self._anahtarlar)):
+                break
+            hekim, kurum, yer = self.rng.choice(hekimler)
+            gun = en_erken.date() + timedelta(days=self.rng.randrange(gunler))
+            if gun.weekday() >= 5:
+                continue
+            dt = datetime(gun.year, gun.month, gun.day, self.rng.choice(MESAI_SAATLERI),
+                          self.rng.randrange(0, 60, SLOT_DAKIKA))
+            if not en_erken < dt <= bit:
+                continue
+            slot_id = int(f"{hekim['mhrsHekimId']}{dt:%y%m%d%H%M}")
+            if slot_id in self._acik or slot_id in self._alinan:
+                continue
+            self._acik[slot_id] = {
+                "hekim": hekim, "kurum": kurum, "muayene_yeri": yer, "id": slot_id,
+                "cetvel_id": hekim["mhrsHekimId"] * 10 + gun.weekday(), "baslangic": dt, "bos": True,
+                "anahtar": anahtar, "kapanis": kapanis,
+            }
+            acilan += 1
+        if acilan:
+            logger.info("%s: %d slot açıldı (açık: %d)", "|".join(anahtar), acilan, len(self._acik))
+
+    def slot_ac(self, anahtar: tuple, adet: int = 1, gun: int = api.VARSAYILAN_GUN_FARKI, sure: float | None = None):
+        """Plan dışında, sorgu anahtarı (api.sorgu_anahtari) için hemen slot açar (ör. ölçümlerde)."""
+        bas = self.saat.simdi().replace(hour=0, minute=0, second=0, microsecond=0)
+        self._slot_ac(tuple(map(str, anahtar)), bas, bas + timedelta(days=gun, hours=23, minutes=59), adet, sure)
+
+    def _plani_isle(self, anahtar: tuple, bas: datetime, bit: datetime):
+        simdi = self._simdi()
+        durum = self._anahtarlar.get(anahtar)
+        if durum is None:
+            # İlk sorgu: o ana kadarki periyotlar telafi edilmez, hâlâ açık olan plan olayları uygulanır
+            durum = self._anahtarlar[anahtar] = {
+                "islenen": int(simdi // self.acilma_araligi) if self.acilma_araligi else 0, "plan": 0,
+            }
+            if self.baslangic_bos:
+                self._slot_ac(anahtar, bas, bit, self.baslangic_bos, None)
+            while durum["plan"] < len(self.plan) and self.plan[durum["plan"]]["sn"] <= simdi:
+                olay = self.plan[durum["plan"]]
+                sure = olay.get("sure", self.acik_kalma)
+                if not sure or olay["sn"] + sure > simdi:
+                    self._slot_ac(anahtar, bas, bit, olay.get("adet", 1),
+                                  sure and olay["sn"] + sure - simdi)
+                durum["plan"] += 1
+            return
+
+        if self.acilma_araligi and self.acilma_adet:
+            periyot = int(simdi // self.acilma_araligi)
+            for _ in range(min(periyot - durum["islenen"], ACILMA_TELAFI_MAX)):
+                self._slot_ac(anahtar, bas, bit, self.acilma_adet, self.acik_kalma)
+            durum["islenen"] = periyot
+        while durum["plan"] < len(self.plan) and self.plan[durum["plan"]]["sn"] <= simdi:
+            olay = self.plan[durum["plan"]]
+            self._slot_ac(anahtar, bas, bit, olay.get("adet", 1), olay.get("sure", self.acik_kalma))
+            durum["plan"] += 1
+
+    def _kapananlari_sil(self):
+        simdi, su_an = self._simdi(), self.saat.simdi()
+        for slot_id in [sid for sid, s in self._acik.items()
+                        if (s["kapanis"] is not None and s["kapanis"] <= simdi) or s["baslangic"] <= su_an]:
+            del self._acik[slot_id]
+
+    # ===========================
+    # Uç noktalar: (durum kodu, gövde)
+    # ===========================
+    def _token_gecerli(self, basliklar: dict) -> bool:
+        token = basliklar.get("authorization", "").removeprefix("Bearer ").strip()
+        exp = api.jwt_exp(token)
+        if exp is None or exp <= self.saat.zaman():
+            return False
+        verildi = self._oturumlar.get(token)
+        return not (self.oturum_omru and verildi is not None and self.saat.monotonik() - verildi >= self.oturum_omru)
+
+    def _login(self, basliklar, govde, *_):
+        tc = str((govde or {}).get("kullaniciAdi") or "")
+        if not (tc.isdigit() and len(tc) == 11 and (govde or {}).get("parola")):
+            return 401, {"success": False, "data": None,
+                         "errors": [{"kodu": "LGN1001", "mesaj": "T.C. kimlik numarası veya parola hatalı."}]}
+        simdi = self.saat.zaman()
+        self._sayac += 1
+        token = ".".join((
+            _b64({"alg": "none", "typ": "JWT"}),
+            _b64({"sub": tc, "iat": int(simdi), "exp": int(simdi + (self.token_omru or 10 * 365 * 86400)),
+                  "n": self._sayac}),
+            "stub",
+        ))
+        self._oturumlar[token] = self.saat.monotonik()
+        return 200, {"success": True, "data": {"jwt": token}, "warnings": [], "errors": []}
+
+    def _kayitli_ya_da(self, uc_nokta: str, uret):
+        if uc_nokta in self._kayitli:
+            return 200, self._kayitli[uc_nokta]
+        return 200, uret()
+
+    def _hasta_bilgisi(self, *_):
+        return self._kayitli_ya_da("hasta_bilgisi", lambda: {
+            "success": True, "data": {"adi": "Test", "soyadi": "Hasta"},
+        })
+
+    def _ilce(self, basliklar, govde, plaka):
+        return self._kayitli_ya_da("ilce", lambda: self.ilceler(plaka))
+
+    def _klinik(self, basliklar, govde, il_id, ilce_id):
+        return self._kayitli_ya_da("klinik", lambda: {"success": True, "data": self.klinikler(il_id, ilce_id)})
+
+    def _kurum(self, basliklar, govde, il_id, ilce_id, klinik_id):
+        return self._kayitli_ya_da("kurum", lambda: {
+            "success": True, "data": self.kurumlar(il_id, ilce_id, klinik_id),
+        })
+
+    def _hekim(self, basliklar, govde, kurum_id, klinik_id):
+        if str(kurum_id) == "-1":
+            return 200, {"success": True, "data": []}
+        return self._kayitli_ya_da("hekim", lambda: {"success": True, "data": self.hekimler(kurum_id, klinik_id)})
+
+    def _slot(self, basliklar, govde, *_):
+        if self.uyari_orani and self.rng.random() < self.uyari_orani:
+            return 200, {
+                "success": False, "data": [], "errors": [],
+                "warnings": [{"kodu": self.uyari_kodu,
+                              "mesaj": "<font color='red'>Çok sık sorgu yaptınız.</font><br>Lütfen daha sonra "
+                                       "tekrar deneyiniz."}],
+            }
+        if "slot" in self._kayitli:
+            return 200, self._kayitli_slot()
+
+        anahtar = api.sorgu_anahtari({
+            "il_id": govde["mhrsIlId"], "ilce_id": govde["mhrsIlceId"], "klinik_id": govde["mhrsKlinikId"],
+            "kurum_id": govde.get("mhrsKurumId", -1), "hekim_id": govde.get("mhrsHekimId", -1),
+        })
+        bas = datetime.fromisoformat(govde["baslangicZamani"])
+        bit = datetime.fromisoformat(govde["bitisZamani"])
+        self._kapananlari_sil()
+        self._plani_isle(anahtar, bas, bit)
+        # Başka bir anahtar altında açılmış ama bu sorgunun kapsadığı slotlar da görünür
+        slotlar = [s for s in self._acik.values() if _kapsar(anahtar, s) and bas <= s["baslangic"] <= bit]
+        return 200, {"success": True, "data": slot_agaci(slotlar), "warnings": [], "errors": []}
+
+    def _kayitli_slot(self) -> dict:
+        js = self._kayitli["slot"]
+        if not self._alinan:
+            return js
+        js = json.loads(json.dumps(js))
+        for veri in js.get("data") or ():
+            for hekim in veri.get("hekimSlotList") or ():
+                for yer in hekim.get("muayeneYeriSlotList") or ():
+                    for saat in yer.get("saatSlotList") or ():
+                        for sl in saat.get("slotList") or ():
+                            if sl.get("id") in self._alinan:
+                                sl["bos"] = False
+        return js
+
+    def _randevu_ekle(self, basliklar, govde, *_):
+        slot_id = (govde or {}).get("fkSlotId")
+        slot = self._acik.pop(slot_id, None)
+        kayitli = "slot" in self._kayitli and slot_id not in self._alinan
+        if slot is None and not kayitli:
+            return 200, {"success": False, "data": None, "warnings": [], "errors": [
+                {"kodu": "SLOT_DOLU", "mesaj": "Seçtiğiniz randevu başka bir vatandaş tarafından alınmıştır."},
+            ]}
+        token = basliklar.get("authorization", "").removeprefix("Bearer ").strip()
+        self._alinan[slot_id] = _token_tc(token)
+        logger.info("Randevu alındı: slot %s", slot_id)
+        if slot is None:
+            return self._kayitli_ya_da("randevu_ekle", lambda: {"success": True, "data": {}})
+        hekim = slot["hekim"]
+        return self._kayitli_ya_da("randevu_ekle", lambda: {"success": True, "data": {
+            "hekim": {"ad": hekim["ad"], "soyad": hekim["soyad"]},
+            "klinik": {"mhrsKlinikAdi": dict(_KLINIKLER).get(int(slot["anahtar"][2]), "Klinik")},
+            "muayeneYeri": {"adi": slot["muayene_yeri"]["adi"]},
+            "kurum": {"kurumAdi": slot["kurum"]["kurumAdi"]},
+        }})
+
+    def _durum(self, *_):
+        return 200, self.stats()
+
+    def stats(self) -> dict:
+        return {
+            "istekler": dict(self._istekler),
+            "anahtar": len(self._anahtarlar),
+            "acik_slot": len(self._acik),
+            "alinan_slot": len(self._alinan),
+            "oturum": len(self._oturumlar),
+        }
+
+    # ===========================
+    # İstek işleme
+    # ===========================
+    async def cevapla(self, metod: str, yol: str, basliklar: dict, govde: bytes = b"") -> tuple[int, object]:
+        """Bir isteği işler; (HTTP durum kodu, JSON'a çevrilecek gövde) döner."""
+        yol = yol.split("?")[0]
+        for rota_metod, desen, isleyici in self._rotalar:
+            eslesme = desen.match(yol)
+            if eslesme and rota_metod == metod:
+                break
+        else:
+            return 404, {"success": False, "errors": [{"kodu": "404", "mesaj": f"{metod} {yol}"}]}
+
+        uc_nokta = isleyici.__name__.lstrip("_")
+        self._istekler[uc_nokta] = self._istekler.get(uc_nokta, 0) + 1
+        gecikme = self.slot_gecikme if uc_nokta == "slot" else self.gecikme
+        if gecikme[1]:
+            await asyncio.sleep(self.rng.uniform(*gecikme))
+
+        if uc_nokta == "durum":
+            return isleyici()
+        if self.hata_orani and self.rng.random() < self.hata_orani:
+            return 503, "Service Unavailable"
+        if uc_nokta != "login" and not self._token_gecerli(basliklar):
+            return 401, {"success": False, "errors": [{"kodu": "401", "mesaj": "Oturum süresi doldu."}]}
+        try:
+            js = json.loads(govde) if govde else None
+        except ValueError:
+            return 400, {"success": False, "errors": [{"kodu": "400", "mesaj": "Geçersiz JSON"}]}
+        return isleyici(basliklar, js, *eslesme.groups())
+
+    async def _baglanti(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                istek_satiri = await reader.readline()
+                parcalar = istek_satiri.decode("latin-1").split()
+                if len(parcalar) < 2:
+                    break
+                basliklar = {}
+                while (satir := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    ad, _, deger = satir.decode("latin-1").partition(":")
+                    basliklar[ad.strip().lower()] = deger.strip()
+                uzunluk = int(basliklar.get("content-length") or 0)
+                govde = await reader.readexactly(uzunluk) if uzunluk else b""
+
+                try:
+                    durum, cevap = await self.cevapla(parcalar[0], parcalar[1], basliklar, govde)
+                except Exception:
+                    logger.exception("Stub isteği işlenemedi: %s %s", parcalar[0], parcalar[1])
+                    durum, cevap = 500, "Internal Server Error"
+                if isinstance(cevap, str):
+                    veri, tip = cevap.encode(), "text/plain; charset=utf-8"
+                else:
+                    veri, tip = json.dumps(cevap, ensure_ascii=False).encode(), "application/json; charset=utf-8"
+                kapat = basliklar.get("connection", "").lower() == "close"
+                writer.write(
+                    f"HTTP/1.1 {durum} {http.HTTPStatus(durum).phrase}\r\nContent-Type: {tip}\r\n"
+                    f"Content-Length: {len(veri)}\r\nConnection: {'close' if kapat else 'keep-alive'}\r\n\r\n"
+                    .encode() + veri
+                )
+                await writer.drain()
+                if kapat:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # kapanışta boşta bekleyen keep-alive bağlantısı
+        finally:
+            writer.close()
+
+    async def baslat(self, host: str = STUB_HOST, port: int = STUB_PORT) -> asyncio.AbstractServer:
+        """Sunucuyu açar (port=0: boş bir port); kapatmak için dönen sunucuda close() çağrılır."""
+        sunucu = await asyncio.start_server(self._baglanti, host, port)
+        gercek_port = sunucu.sockets[0].getsockname()[1]
+        logger.info("Sahte MHRS: http://%s:%d", host, gercek_port)
+        return sunucu
+
+    def fiksturleri_yaz(self, dizin: str, plaka: int = 34):
+        """Üretilen cevapları düzenlenip --fikstur ile verilebilecek dosyalar olarak yazar."""
+        os.makedirs(dizin, exist_ok=True)
+        ilce = self.ilceler(plaka)[0]["value"]
+        klinik = self.klinikler(plaka, ilce)[0]["value"]
+        kurum = self.kurumlar(plaka, ilce, klinik)[0]["value"]
+        anahtar = (str(plaka), str(ilce), str(klinik), "-1", "-1")
+        bas = self.saat.simdi().replace(hour=0, minute=0, second=0, microsecond=0)
+        self._slot_ac(anahtar, bas, bas + timedelta(days=api.VARSAYILAN_GUN_FARKI), 5, None)
+        cevaplar = {
+            "hasta_bilgisi": self._hasta_bilgisi()[1],
+            "ilce": self.ilceler(plaka),
+            "klinik": {"success": True, "data": self.klinikler(plaka, ilce)},
+            "kurum": {"success": True, "data": self.kurumlar(plaka, ilce, klinik)},
+            "hekim": {"success": True, "data": self.hekimler(kurum, klinik)},
+            "slot": {"success": True, "data": slot_agaci(self._acik.values()), "warnings": [], "errors": []},
+        }
+        for ad, js in cevaplar.items():
+            with open(os.path.join(dizin, f"{ad}.json"), "w", encoding="utf-8") as f:
+                json.dump(js, f, ensure_ascii=False, indent=2)
+        logger.info("Fikstürler yazıldı: %s", dizin)
+
+
+class StubCevap:
+    """httpx.Response yerine: json() stub'ın ürettiği nesneyi döner (takip yolu değiştirmez)."""
+
+    def __init__(self, status_code: int, govde):
+        self.status_code = status_code
+        self._govde = govde
+
+    @property
+    def text(self) -> str:
+        return self._govde if isinstance(self._govde, str) else json.dumps(self._govde, ensure_ascii=False)
+
+    def json(self):
+        if isinstance(self._govde, str):
+            return json.loads(self._govde)
+        return self._govde
+
+
+class StubHttp:
+    """
+    AsyncMhrsClient yerine stub'a süreç içinden giden istemci (soket yok).
+    Sanal saatle simülasyonda kullanılır; bkz. mhrs_core.saat.
+    butce: AsyncMhrsClient'taki gibi her istekten önce jeton alınan TokenBucket.
+    """
+
+    def __init__(self, stub: MhrsStub, butce=None):
+        self.stub = stub
+        self.butce = butce
+
+    async def request(self, method: str, endpoint: str, path: str, headers: dict | None = None,
+                      payload: dict | None = None) -> StubCevap:
+        if self.butce is not None:
+            await self.butce.acquire()
+        basliklar = {ad.lower(): deger for ad, deger in (headers or {}).items()}
+        govde = json.dumps(payload).encode() if payload is not None else b""
+        return StubCevap(*await self.stub.cevapla(method, path, basliklar, govde))
+
+    async def get(self, endpoint: str, path: str, headers: dict | None = None) -> StubCevap:
+        return await self.request("GET", endpoint, path, headers=headers)
+
+    async def post(self, endpoint: str, path: str, payload: dict, headers: dict | None = None) -> StubCevap:
+        return await self.request("POST", endpoint, path, headers=headers, payload=payload)
+
+
+def _kapsar(anahtar: tuple, slot: dict) -> bool:
+    il_id, ilce_id, klinik_id, kurum_id, hekim_id = anahtar
+    return (
+        slot["anahtar"][:3] == (il_id, ilce_id, klinik_id)
+        and kurum_id in ("-1", str(slot["kurum"]["mhrsKurumId"]))
+        and hekim_id in ("-1", str(slot["hekim"]["mhrsHekimId"]))
+    )
+
+
+def _token_tc(token: str) -> str | None:
+    try:
+        govde = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(govde + "=" * (-len(govde) % 4))).get("sub")
+    except (IndexError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yerel sahte MHRS sunucusu")
+    parser.add_argument("--host", default=STUB_HOST)
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--fikstur", help="kaydedilmiş cevapların dizini (<uç nokta>.json)")
+    parser.add_argument("--fikstur-yaz", metavar="DIZIN", help="üretilen cevapları dizine yaz ve çık")
+    parser.add_argument("--gecikme", type=sure_araligi, default=(0.0, 0.0), help="sn ya da aralık, ör. 0.05-0.2")
+    parser.add_argument("--slot-gecikme", type=sure_araligi, help="slot sorgusu için gecikme (varsayılan: --gecikme)")
+    parser.add_argument("--token-omru", type=float, default=3600, help="verilen JWT'nin ömrü, sn (0: süresiz)")
+    parser.add_argument("--oturum-omru", type=float, default=0, help="bu kadar sn sonra oturum düşer (401); 0: kapalı")
+    parser.add_argument("--uyari-orani", type=float, default=0.0, help="slot sorgularının uyarıyla dönme oranı")
+    parser.add_argument("--uyari-kodu", default="RND4034")
+    parser.add_argument("--hata-orani", type=float, default=0.0, help="isteklerin 503 dönme oranı")
+    parser.add_argument("--acilma-araligi", type=float, default=600, help="sn; anahtar başına slot açılma periyodu")
+    parser.add_argument("--acilma-adet", type=int, default=1, help="periyot başına açılan slot")
+    parser.add_argument("--acik-kalma", type=float, default=300, help="açılan slotun boş kaldığı sn (0: alınana kadar)")
+    parser.add_argument("--baslangic-bos", type=int, default=2, help="anahtarın ilk sorgusunda boş slot sayısı")
+    parser.add_argument("--plan", help='ek açılma olayları: [{"sn": 30, "adet": 2, "sure": 120}, ...]')
+    parser.add_argument("--hekim-sayisi", type=int, default=4, help="kurum/klinik başına üretilen hekim")
+    parser.add_argument("--tohum", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format=logging.BASIC_FORMAT)
+    plan = None
+    if args.plan:
+        with open(args.plan, encoding="utf-8") as f:
+            plan = json.load(f)
+
+    stub = MhrsStub(
+        fikstur=args.fikstur, gecikme=args.gecikme, slot_gecikme=args.slot_gecikme, token_omru=args.token_omru,
+        oturum_omru=args.oturum_omru, uyari_orani=args.uyari_orani, uyari_kodu=args.uyari_kodu,
+        hata_orani=args.hata_orani, acilma_araligi=args.acilma_araligi, acilma_adet=args.acilma_adet,
+        acik_kalma=args.acik_kalma, baslangic_bos=args.baslangic_bos, plan=plan, hekim_sayisi=args.hekim_sayisi,
+        tohum=args.tohum,
+    )
+    if args.fikstur_yaz:
+        stub.fiksturleri_yaz(args.fikstur_yaz)
+        return
+
+    async def calistir():
+        sunucu = await stub.baslat(args.host, args.port)
+        async with sunucu:
+            await sunucu.serve_forever()
+
+    try:
+        asyncio.run(calistir())
+    except KeyboardInterrupt:
+        logger.info("Stub istatistikleri: %s", stub.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,709 @@
+"""
+Takip, slot sorgusu ve randevu alma mantığı.
+
+PC ve Telegram giriş noktaları aynı TakipServisi'ni kullanır; aralarındaki tek
+fark kullanıcıya nasıl haber verildiğidir (konsol çıktısı / Telegram mesajı).
+Bu fark Bildirici alt sınıflarıyla verilir.
+
+Aynı il/ilçe/klinik/kurum/hekim sorgusunu izleyen takipler tek abonelikte
+toplanır: anahtar başına bir tur, bir upstream sorgu. Takiplerin kendisi
+TakipKaydi'nda numarayla tutulur (bkz. mhrs_core.kayit).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from mhrs_core import api, metrikler
+from mhrs_core.devre import OTURUM, SUNUCU, DevreKesici, siniflandir
+from mhrs_core.logs import govde_ozeti, http_logger, olay, user_logger
+from mhrs_core.oturum import OturumYoneticisi, hesap_anahtari
+from mhrs_core.profil import profil
+from mhrs_core.saat import Saat, gercek_saat
+from mhrs_core.filtre import filtre_birlesimi, filtre_derle
+from mhrs_core.kayit import Kayit, TakipKaydi
+from mhrs_core.scheduler import Scheduler
+from mhrs_core.secim import en_iyi_slotlar
+from mhrs_core.slots import Slot, SlotSnapshot, bos_slotlar
+
+# Takip döngüsü bekleme ayarları
+WAIT_MIN = 55  # sn
+WAIT_MAX = 95  # sn
+
+# Uzun mola ayarları (sabit değil, olasılıklı)
+LONG_BREAK_MIN_TRIES = 10         # En az 10 deneme olmadan uzun mola düşünmeyiz
+LONG_BREAK_PROB = 0.80           # 10+ denemeden sonra her seferinde %80 ihtimalle uzun mola
+LONG_BREAK_SECONDS_MIN = 5 * 60  # 5 dk
+LONG_BREAK_SECONDS_MAX = 10 * 60 # 10 dk
+
+# Otomatik modda bir turda en fazla kaç aday slot için randevu denenir
+RANDEVU_MAX_DENEME = 3
+
+# Yeniden başlatmada bu kadar takip yüklendikçe event loop'a dönülür
+GERI_YUKLEME_PARTI = 200
+
+
+def _olay_anahtari(anahtar: tuple) -> str:
+    return "|".join(map(str, anahtar))
+
+
+def _slot_alanlari(slot: Slot) -> dict:
+    return {
+        "slot_id": slot.id,
+        "hekim_adi": slot.hekim_adi,
+        "kurum_adi": slot.kurum_adi,
+        "baslangic": slot.baslangic.isoformat(),
+    }
+
+
+class Bildirici:
+    """
+    Kullanıcıya yapılan bildirimler. Front-end'ler ihtiyaç duydukları
+    metodları override eder; varsayılanlar hiçbir şey yapmaz.
+    """
+
+    async def token_gecersiz(self, user_id, yenilenebilir: bool):
+        pass
+
+    async def oturum_yenileniyor(self, user_id, deneme: int, max_deneme: int):
+        pass
+
+    async def oturum_yenileme_basarisiz(self, user_id, deneme: int, bekleme: int):
+        pass
+
+    async def oturum_yenilendi(self, user_id):
+        pass
+
+    async def oturum_yenilenemedi(self, user_id, mola: int):
+        pass
+
+    async def randevu_bulundu(self, user_id, slot: Slot):
+        pass
+
+    async def randevu_alindi(self, user_id, bilgi: dict):
+        pass
+
+    async def uzun_mola(self, user_id, deneme: int, sure: int, since_long_break: int):
+        pass
+
+    async def uzun_mola_bitti(self, user_id):
+        pass
+
+    async def bekleniyor(self, user_id, deneme: int, sure: int):
+        pass
+
+    async def geri_yuklenemedi(self, user_id):
+        """Yeniden başlatmada giriş bilgisi saklanmamış takip(ler)i devam edemedi."""
+        pass
+
+
+class TakipServisi:
+    def __init__(self, bildirici: Bildirici, zamanlayici: Scheduler | None = None, store=None, http=None,
+                 saat: Saat = gercek_saat):
+        if http is None:
+            from mhrs_core.async_client import async_client as http
+        self.bildirici = bildirici
+        self.zamanlayici = zamanlayici if zamanlayici is not None else Scheduler()
+        self.store = store
+        self.http = http
+        # Zaman ve rastgelelik; sanal saatle simülasyon için bkz. mhrs_core.saat
+        self.saat = saat
+        self.devreler = DevreKesici(saat=saat)
+        self.oturumlar = OturumYoneticisi(
+            self.login, self.zamanlayici, bildirici=bildirici, guncellendi=self._takibi_kaydet, saat=saat
+        )
+        # Aktif takipler; kullanıcıya ve sorgu anahtarına göre indeksli
+        self.takipler = TakipKaydi()
+        # anahtar -> {"deneme", "since_long_break", "mola", "mola_durumu", "durum",
+        #            "snapshot": SlotSnapshot, "gozlendi": ilk cevap alındı mı,
+        #            "pencereler": {takip no: son bakılan pencere sonu}}
+        # durum: bir sonraki tura kadar neden beklendiği (bekliyor | uzun_mola | oturum_bekleniyor | devre_acik)
+        # ve kalan süre zamanlayıcıda tutulur; durdurulan anahtarın işi hemen iptal edilir.
+        self.sorgu_abonelikleri = {}
+
+        # Profil kapalıyken hiçbir şey sarmalanmaz (bkz. mhrs_core.profil)
+        if profil.etkin:
+            self.takip_dongusu = profil.sarmala("tur", self.takip_dongusu)
+            self.randevu_sorgula = profil.sarmala("randevu_sorgula", self.randevu_sorgula)
+            self.randevu_al = profil.sarmala("randevu_al", self.randevu_al)
+
+        m = metrikler.metrikler
+        m.gosterge("mhrs_aktif_takip", "Aktif takipler", oku=lambda: len(self.takipler))
+        m.gosterge("mhrs_sorgu_anahtari", "Ayrı sorgu anahtarları (tur başına bir upstream sorgu)",
+                   oku=lambda: len(self.sorgu_abonelikleri))
+        m.gosterge("mhrs_zamanlayici_is", "Zamanlayıcıdaki işler", oku=lambda: len(self.zamanlayici))
+        m.gosterge("mhrs_zamanlayici_calisan", "Şu an çalışan işler (worker doluluğu)",
+                   oku=lambda: self.zamanlayici.stats()["calisan"])
+        m.gosterge("mhrs_zamanlayici_worker", "Zamanlayıcı worker sayısı", oku=lambda: self.zamanlayici.workers)
+        m.gosterge(
+            "mhrs_devre_acik", "Açık ya da yarı açık devre sayısı (genel dahil)",
+            oku=lambda: sum(d.durum != "kapali" for d in (self.devreler.genel, *self.devreler.anahtarlar.values())),
+        )
+
+    # ===========================
+    # Yaşam döngüsü
+    # ===========================
+    async def start(self):
+        await self.zamanlayici.start()
+        profil.baslat()
+
+    async def stop(self):
+        await self.zamanlayici.stop()
+        profil.durdur()
+
+    async def join(self):
+        """Tüm takipler bitene kadar bekler."""
+        await self.zamanlayici.join()
+
+    async def geri_yukle(self) -> int:
+        """
+        Store'daki takipleri belleğe alıp zamanlayıcıya verir. İlk turlar,
+        yeniden başlatmada MHRS'ye yığılmasın diye WAIT_MIN içine yayılır.
+
+        Kayıtlar sayfa sayfa okunur ve her GERI_YUKLEME_PARTI takipte event
+        loop'a dönülür; binlerce takip yüklenirken de bot mesajlara cevap verir
+        ve yüklenen takipler hemen taranmaya başlar.
+
+        Giriş bilgisi saklanmamış takipler (bkz. mhrs_core.store) devam edemez:
+        silinir ve kullanıcıya bir kez bildirilir.
+        """
+        if self.store is None:
+            return 0
+        adet = 0
+        bildirilen = set()
+        for i, (takip_id, uid, uname, takip) in enumerate(self.store.hepsi(), 1):
+            if takip.get("token") or hesap_anahtari(takip):
+                self.takip_ekle(uid, uname, takip, gecikme=self.saat.rng.uniform(0, WAIT_MIN), kaydet=False)
+                adet += 1
+            else:
+                self.store.sil(takip_id)
+                if uid not in bildirilen:
+                    bildirilen.add(uid)
+                    user_logger.info(f"{uname} - Giriş bilgisi saklanmadığı için takip yeniden yüklenemedi.")
+                    await self.bildirici.geri_yuklenemedi(uid)
+            if i % GERI_YUKLEME_PARTI == 0:
+                await asyncio.sleep(0)
+        return adet
+
+    # ===========================
+    # Takip yönetimi
+    # ===========================
+    def takip_ekle(self, user_id, username: str, takip: dict, gecikme: float = 0.0, kaydet: bool = True) -> int:
+        """
+        Takibi kaydeder, sorgu anahtarına ekler; anahtar için tur yoksa `gecikme`
+        sn sonra başlatır. Takip numarasını döner.
+        """
+        anahtar = api.sorgu_anahtari(takip)
+        if kaydet and self.store is not None:
+            takip["id"] = self.store.ekle(user_id, username, anahtar, takip)
+
+        kayit = self.takipler.ekle(user_id, username, anahtar, takip)
+        self.oturumlar.kaydet(kayit.no, user_id, username, takip)
+
+        self.sorgu_abonelikleri.setdefault(
+            anahtar,
+            {
+                "deneme": 0,
+                "since_long_break": 0,
+                "mola": 0,
+                "mola_durumu": None,
+                "durum": "bekliyor",
+                "snapshot": SlotSnapshot(),
+                "gozlendi": False,
+                "pencereler": {},
+            },
+        )
+        if anahtar not in self.zamanlayici:
+            self.zamanlayici.schedule(anahtar, lambda: self.takip_dongusu(anahtar), delay=gecikme)
+        return kayit.no
+
+    def takip_var_mi(self, user_id) -> bool:
+        return self.takipler.kullanici_var_mi(user_id)
+
+    def kullanici_durdur(self, user_id) -> bool:
+        """
+        Kullanıcının tüm takiplerini bırakır. Başka abonesi kalmayan anahtarların
+        ve hesapların zamanlayıcı işleri hemen iptal edilir; bekleyen mola/uzun
+        mola da bununla birlikte düşer.
+        """
+        if not self.takip_var_mi(user_id):
+            return False
+        for kayit in self.takipler.kullanici(user_id):
+            self.takipler.sil(kayit.no)
+            self._abonelikten_cik(kayit)
+        if self.store is not None:
+            self.store.kullanici_sil(user_id)
+        return True
+
+    def _takibi_bitir(self, no: int):
+        kayit = self.takipler.sil(no)
+        if kayit is None:
+            return
+        self._abonelikten_cik(kayit)
+        if self.store is not None and kayit.takip.get("id"):
+            self.store.sil(kayit.takip["id"])
+
+    def _abonelikten_cik(self, kayit: Kayit):
+        """Kayıttan silinmiş takibi hesabından ve sorgu anahtarından ayırır."""
+        self.oturumlar.birak(kayit.no, kayit.takip)
+        anahtar = kayit.anahtar
+        abonelik = self.sorgu_abonelikleri.get(anahtar)
+        if abonelik is None:
+            return
+        abonelik["pencereler"].pop(kayit.no, None)
+        if not self.takipler.anahtar_var_mi(anahtar):
+            self.sorgu_abonelikleri.pop(anahtar, None)
+            self.zamanlayici.cancel(anahtar)
+            self.devreler.birak(anahtar)
+
+    def _takibi_kaydet(self, takip: dict):
+        if self.store is not None and takip.get("id"):
+            self.store.guncelle(takip["id"], takip)
+
+    def durum(self, user_id=None) -> list:
+        """
+        Takiplerin anlık durumu: hangi beklemede oldukları, bir sonraki tura
+        kalan süre (sn) ve hesabın oturum durumu. user_id verilirse sadece onunkiler.
+        """
+        kayitlar = self.takipler if user_id is None else self.takipler.kullanici(user_id)
+        sonuc = []
+        for kayit in kayitlar:
+            abonelik = self.sorgu_abonelikleri.get(kayit.anahtar)
+            if abonelik is None:
+                continue
+            kalan = self.zamanlayici.kalan(kayit.anahtar)
+            sonuc.append({
+                "no": kayit.no,
+                "user_id": kayit.user_id,
+                "username": kayit.username,
+                "klinik_adi": kayit.takip["klinik_adi"],
+                "otomatik": kayit.takip["otomatik"],
+                "durum": abonelik["durum"],
+                "devre": self.devreler.durum(kayit.anahtar),
+                "deneme": abonelik["deneme"],
+                "sonraki_tur": round(kalan) if kalan is not None else None,
+                "oturum_bekleme": round(self.oturumlar.bekleme_kalan(kayit.takip)),
+            })
+        return sonuc
+
+    # ===========================
+    # MHRS çağrıları
+    # ===========================
+    async def login(self, tc: str, sifre: str) -> str | None:
+        return await api.mhrs_login_get_token(self.http, tc, sifre, logger=http_logger)
+
+    async def randevu_al(self, slot: Slot, token: str, username: str, user_id) -> bool:
+        """
+        Verilen slot için randevu almaya çalışır.
+        Başarılıysa hekim/klinik/muayene yeri bilgilerini MHRS cevabından çekip loglar.
+        """
+        try:
+            res = await self.http.post(
+                "randevu_ekle", api.RANDEVU_EKLE_PATH, api.randevu_ekle_payload(slot), headers=api.headers(token)
+            )
+            http_ok = res.status_code == 200
+
+            try:
+                js = res.json()
+            except Exception:
+                js = None
+
+            bilgi = api.randevu_bilgisi(slot, js)
+            dt = bilgi["dt"]
+
+            # success flag'i JS'den de kontrol et
+            if http_ok and ((js or {}).get("success", True)):
+                user_logger.info(
+                    f"{username} - RANDEVU ALINDI | "
+                    f"Klinik: {bilgi['klinik_adi']} | "
+                    f"Hekim: {bilgi['hekim_adi']} | "
+                    f"MuayeneYeri: {bilgi['muayene_yeri']} | "
+                    f"Tarih: {dt.strftime('%d.%m.%Y')} | "
+                    f"Saat: {dt.strftime('%H:%M')} | "
+                    f"SlotId: {slot.id} | "
+                    f"CetvelId: {slot.cetvel_id} | "
+                    f"RawBaslangic: {slot.baslangic_zamani}"
+                )
+                await self.bildirici.randevu_alindi(user_id, bilgi)
+                return True
+
+            http_logger.error("RANDEVU_EKLE HTTP HATA %s - %s", res.status_code, govde_ozeti(res.text))
+            user_logger.warning(f"{username} - Randevu alma BAŞARISIZ - {res.status_code}")
+        except Exception as e:
+            user_logger.warning(f"{username} - Randevu alma hatası: {e}")
+        return False
+
+    async def _yeniden_giris(self, kayit: Kayit, payload: dict, eski_token: str):
+        """
+        Sorguyu taşıyan takibin tokeni 401 aldı. TC/Şifre varsa token yenilenir ve
+        slot sorgusu tekrarlanır (login hesap başına tekildir, bkz.
+        OturumYoneticisi.yenile); yoksa o tokenle eklenmiş takipler bitirilir.
+        Yeni cevabı, yenilenemezse None döner.
+        """
+        _, user_id, username, _, takip = kayit
+        user_logger.warning(f"{username} - Token geçersiz (401).")
+        if not hesap_anahtari(takip):
+            await self._token_gecersiz(eski_token)
+            return None
+
+        # Hesabın tokeninin düştüğü bir kez bildirilir (süren proaktif login'e katılsa da)
+        if not self.oturumlar.gecersiz_mi(takip):
+            await self.bildirici.token_gecersiz(user_id, yenilenebilir=True)
+
+        new_jwt = await self.oturumlar.yenile(takip, eski_token)
+        if new_jwt:
+            return await self.http.post("slot", api.SLOT_PATH, payload, headers=api.headers(new_jwt))
+        return None
+
+    async def _token_gecersiz(self, token: str):
+        """
+        401 alan ve yenilenemeyen (TC/Şifresiz) tokenle eklenmiş takipleri bitirir
+        (store'dan da silinir); her kullanıcıya bir kez bildirilir, yeni token
+        /start ile verilir.
+        """
+        bitenler = [k for k in self.takipler if k.takip.get("token") == token and not hesap_anahtari(k.takip)]
+        for kayit in bitenler:
+            self._takibi_bitir(kayit.no)
+            user_logger.info(f"{kayit.username} - Token geçersiz, takip sonlandırıldı: {kayit.takip['klinik_adi']}")
+        for uid in dict.fromkeys(k.user_id for k in bitenler):
+            await self.bildirici.token_gecersiz(uid, yenilenebilir=False)
+
+    def _token_kullanilir(self, kayit: Kayit) -> bool:
+        """Takibin tokeniyle sorgu atılabilir / randevu alınabilir mi: hesabın sıradaki login denemesi beklenmiyor."""
+        return not self.oturumlar.bekleme_kalan(kayit.takip)
+
+    def _tasiyicilar(self, aboneler: list[Kayit]) -> list[Kayit]:
+        """
+        Anahtarın slot sorgusunu taşıyabilecek aboneler, token başına bir tane.
+        401'de token yenileyebilsin diye TC/Şifresi olanlar önce denenir.
+        """
+        tasiyicilar, tokenlar = [], set()
+        for kayit in sorted(aboneler, key=lambda k: not (k.takip.get("tc") and k.takip.get("sifre"))):
+            token = kayit.takip.get("token")
+            if token in tokenlar or not self._token_kullanilir(kayit):
+                continue
+            tokenlar.add(token)
+            tasiyicilar.append(kayit)
+        return tasiyicilar
+
+    def _oturum_bekle(self, anahtar: tuple, aboneler: list[Kayit]):
+        """
+        Hiçbir abonenin tokeni kullanılamıyorsa anahtarı, en erken login denemesi
+        yapılacak hesabın işinden hemen sonrasına (+1 sn) kadar dinlendirir.
+        """
+        bekleme = min((b for k in aboneler if (b := self.oturumlar.bekleme_kalan(k.takip))), default=0)
+        abonelik = self.sorgu_abonelikleri.get(anahtar)
+        if bekleme and abonelik is not None:
+            abonelik["mola"] = bekleme + 1
+            abonelik["mola_durumu"] = "oturum_bekleniyor"
+
+    async def randevu_sorgula(self, anahtar: tuple) -> list:
+        """
+        Anahtara abone tüm takipler için tek slot sorgusu atar (en geniş pencereyle),
+        sonucu her aboneye kendi penceresine göre süzerek dağıtır.
+        Bildirilen / randevusu alınan abonelerin kayıtlarını döner.
+
+        Cevap anahtarın SlotSnapshot'ıyla karşılaştırılır; bir abone yalnızca
+        yeni açılan slotlara ve penceresine yeni giren günlere bakar. İlk
+        turunda penceresindeki tüm boş slotları görür. Adaylar arasından takibin
+        `siralama` ayarına göre en iyisi seçilir (bkz. mhrs_core.secim).
+
+        ÖNEMLİ:
+          - Hekim seçimi "Farketmez" olsa bile, MHRS API'den gelen her slot
+            hangi hekime aitse `hekim_adi` o hekim üzerinden belirlenir.
+        """
+        aboneler = self.takipler.anahtar(anahtar)
+        abonelik = self.sorgu_abonelikleri.get(anahtar)
+        if not aboneler or abonelik is None:
+            return []
+
+        # Sorgu ilk taşıyıcının tokeniyle atılır; 401 alır ve yenilenemezse sıradakiyle.
+        # Login sırası bekleyen hesaplar taşıyıcı olmaz; anahtar yalnızca hiç taşıyıcı kalmazsa bekler.
+        tasiyicilar = self._tasiyicilar(aboneler)
+        if not tasiyicilar:
+            self._oturum_bekle(anahtar, aboneler)
+            return []
+        username, takip = tasiyicilar[0].username, tasiyicilar[0].takip
+        klinik_adi = takip["klinik_adi"]
+
+        # Devre açıksa (MHRS hata veriyor ya da reddediyor) sorgu atılmaz
+        bekle = self.devreler.izin(anahtar)
+        if bekle:
+            abonelik["mola"] = bekle
+            abonelik["mola_durumu"] = "devre_acik"
+            user_logger.info(f"{username} - MHRS hata veriyor, {round(bekle)} sn sorgu atılmayacak.")
+            return []
+
+        # ----- Kayan pencere (abonelerin en genişi) -----
+        bas_dt = self.saat.simdi().replace(hour=0, minute=0, second=0, microsecond=0)
+        gun = max(api.gun_farki(k.takip) for k in aboneler)
+        payload = api.slot_payload(takip, bas_dt, gun)
+
+        sinif = None
+        bas = self.saat.monotonik()
+        try:
+            for kayit in tasiyicilar:
+                token = kayit.takip.get("token")
+                res = await self.http.post("slot", api.SLOT_PATH, payload, headers=api.headers(token))
+                # 401 → TC/Şifre varsa otomatik yenile; olmazsa bir sonraki abonenin oturumu denenir
+                if res.status_code == 401:
+                    res = await self._yeniden_giris(kayit, payload, token)
+                if res is not None and res.status_code != 401:
+                    username = kayit.username
+                    break
+            if res is None or res.status_code == 401:
+                sinif = OTURUM
+                self.devreler.kaydet(anahtar, sinif)
+                self._sorgu_olayi(anahtar, klinik_adi, aboneler, bas, sinif, http=res and res.status_code)
+                return []
+            goruldu = self.saat.monotonik()
+
+            # JSON'u bir kere parse edelim
+            try:
+                js = res.json()
+            except Exception:
+                js = {}
+
+            # Önce warnings'lere bakalım (RND4034 vs burada geliyor); sonuç devreye işlenir
+            uyari = api.ilk_uyari(js)
+            sinif = siniflandir(res.status_code, uyari[0] if uyari else None)
+            self.devreler.kaydet(anahtar, sinif)
+            if uyari:
+                olay("uyari", anahtar=_olay_anahtari(anahtar), klinik_adi=klinik_adi, http=res.status_code,
+                     kod=uyari[0], mesaj=uyari[1])
+
+            if res.status_code != 200:
+                http_logger.error("SLOT HTTP HATA %s - %s", res.status_code, govde_ozeti(res.text))
+
+                if uyari:
+                    user_logger.info(f"{username} - MHRS UYARI | Kod: {uyari[0]} | Mesaj: {uyari[1]}")
+                else:
+                    user_logger.error(
+                        f"{username} - HTTP HATA {res.status_code} ({api.hata_kodu(js)}) - Slot sorgusu başarısız."
+                    )
+                self._sorgu_olayi(anahtar, klinik_adi, aboneler, bas, sinif, http=res.status_code,
+                                  uyari=uyari and uyari[0])
+                return []
+
+            data = (js or {}).get("data", [])
+            if not data:
+                _, kapanan = abonelik["snapshot"].guncelle([])
+                abonelik["gozlendi"] = True
+                self._sorgu_olayi(anahtar, klinik_adi, aboneler, bas, sinif, http=200, uyari=uyari and uyari[0],
+                                  bos=0, acilan=0, kapanan=len(kapanan))
+                if uyari:
+                    user_logger.info(f"{username} - MHRS UYARI | Kod: {uyari[0]} | Mesaj: {uyari[1]}")
+                else:
+                    self._bulunamadi_logla(aboneler, bas_dt)
+                return []
+
+            ortak_filtre = filtre_birlesimi(filtre_derle(k.takip.get("filtre")) for k in aboneler)
+            adaylar = list(bos_slotlar(data, klinik_adi, now=self.saat.simdi(), filtre=ortak_filtre))
+        except Exception as e:
+            if sinif is None:
+                # Cevap hiç gelmedi (zaman aşımı / bağlantı hatası)
+                self.devreler.kaydet(anahtar, SUNUCU)
+            self._sorgu_olayi(anahtar, klinik_adi, aboneler, bas, sinif or SUNUCU, hata=type(e).__name__)
+            user_logger.warning(f"{username} - Randevu sorgulama hatası: {e}")
+            return []
+
+        snapshot = abonelik["snapshot"]
+        acilan, kapanan = snapshot.guncelle(adaylar)
+        if acilan or kapanan:
+            http_logger.info(
+                "SLOT DEGISIM %s - acilan=%d kapanan=%d bos=%d", anahtar, len(acilan), len(kapanan), len(adaylar)
+            )
+        # İlk cevaptaki slotlar "açılmış" değil, zaten boştu; çözümlemede ayrılır
+        ilk = not abonelik["gozlendi"]
+        abonelik["gozlendi"] = True
+        self._sorgu_olayi(anahtar, klinik_adi, aboneler, bas, sinif, http=200, bos=len(adaylar),
+                          acilan=len(acilan), kapanan=len(kapanan), ilk=ilk)
+        metrikler.slot_acilan.artir(miktar=len(acilan))
+        for slot in acilan:
+            olay("slot", anahtar=_olay_anahtari(anahtar), klinik_adi=klinik_adi, ilk=ilk, **_slot_alanlari(slot))
+        acilan_idler = {s.id for s in acilan}
+
+        if not adaylar:
+            self._bulunamadi_logla(aboneler, bas_dt)
+            return []
+
+        # Her abone kendi penceresindeki en iyi slotu alır; aynı slot iki kez alınmaz
+        sonuclanan = []
+        bulamayanlar = []
+        alinan_slotlar = set()
+        onceki_pencereler = abonelik["pencereler"]
+        pencereler = abonelik["pencereler"] = {}
+        for kayit in aboneler:
+            # Önceki abonenin randevu denemesi sürerken durdurulmuş olabilir
+            if kayit.no not in self.takipler:
+                continue
+            # Oturumu düşmüş hesabın takibi login'i dönene kadar bekler; penceresi tutulmadığından
+            # döndüğünde o an açık tüm slotlara bakar
+            if not self._token_kullanilir(kayit):
+                continue
+            _, uid, uname, _, t = kayit
+            pencere_sonu = bas_dt + timedelta(days=api.gun_farki(t), hours=23, minutes=59, seconds=59)
+            onceki_son = onceki_pencereler.get(kayit.no)
+            pencereler[kayit.no] = pencere_sonu
+            # Ortak filtre bu abonenin filtresiyse slotlar çözümlemede zaten süzüldü
+            filtre = filtre_derle(t.get("filtre"))
+            if filtre is ortak_filtre:
+                filtre = None
+
+            # Değişiklik yoksa bu abonenin bakacağı yeni slot da yok
+            if onceki_son == pencere_sonu and not acilan_idler:
+                bulamayanlar.append(kayit)
+                continue
+
+            uygunlar = [
+                slot
+                for slot in adaylar
+                if slot.baslangic <= pencere_sonu
+                and slot.id not in alinan_slotlar
+                # Daha önce görülmüş ve o zaman da pencerede olan slot yeniden ele alınmaz
+                and (onceki_son is None or slot.id in acilan_idler or slot.baslangic > onceki_son)
+                and (filtre is None or filtre(slot))
+            ]
+            if not uygunlar:
+                bulamayanlar.append(kayit)
+                continue
+
+            sirali = en_iyi_slotlar(uygunlar, t.get("siralama"))
+            if t["otomatik"]:
+                # En iyi slot alınamazsa aynı cevaptaki bir sonraki aday denenir
+                alindi = False
+                for sira, slot in enumerate(sirali, 1):
+                    bas_randevu = self.saat.monotonik()
+                    alindi = await self.randevu_al(slot, t["token"], uname, uid)
+                    bitis = self.saat.monotonik()
+                    metrikler.randevu_sonuc.artir("alindi" if alindi else "basarisiz")
+                    olay(
+                        "randevu", anahtar=_olay_anahtari(anahtar), klinik_adi=klinik_adi, user_id=uid,
+                        basarili=alindi, sira=sira, sure_ms=round((bitis - bas_randevu) * 1000),
+                        gecikme_ms=round((bitis - goruldu) * 1000), **_slot_alanlari(slot),
+                    )
+                    if alindi:
+                        alinan_slotlar.add(slot.id)
+                        sonuclanan.append(kayit)
+                        break
+                    if sira >= RANDEVU_MAX_DENEME:
+                        break
+                if not alindi:
+                    # Denenen ve sırası gelmeyen adaylar hâlâ boşsa sonraki turda yeniden ele alınsın
+                    for slot in uygunlar:
+                        snapshot.unut(slot.id)
+                continue
+
+            slot = next(sirali)
+            user_logger.info(
+                f"{uname} - UYGUN RANDEVU BULUNDU (ALINMADI) | "
+                f"Klinik: {klinik_adi} | "
+                f"Hekim: {slot.hekim_adi} | "
+                f"Tarih: {slot.baslangic.strftime('%d.%m.%Y')} | "
+                f"Saat: {slot.baslangic.strftime('%H:%M')}"
+            )
+            olay(
+                "bildirim", anahtar=_olay_anahtari(anahtar), klinik_adi=klinik_adi, user_id=uid,
+                gecikme_ms=round((self.saat.monotonik() - goruldu) * 1000), **_slot_alanlari(slot),
+            )
+            await self.bildirici.randevu_bulundu(uid, slot)
+            sonuclanan.append(kayit)
+
+        self._bulunamadi_logla(bulamayanlar, bas_dt)
+        return sonuclanan
+
+    def _sorgu_olayi(self, anahtar: tuple, klinik_adi: str, aboneler: list, bas: float, sinif: str, **alanlar):
+        metrikler.sorgu_sonuc.artir(sinif)
+        olay(
+            "sorgu", anahtar=_olay_anahtari(anahtar), klinik_adi=klinik_adi, abone=len(aboneler), sinif=sinif,
+            sure_ms=round((self.saat.monotonik() - bas) * 1000), **alanlar,
+        )
+
+    def _bulunamadi_logla(self, aboneler: list[Kayit], bas_dt: datetime):
+        for kayit in aboneler:
+            t = kayit.takip
+            bit_dt = bas_dt + timedelta(days=api.gun_farki(t))
+            user_logger.info(
+                f"{kayit.username} - RANDEVU BULUNAMADI | Klinik: {t['klinik_adi']} | "
+                f"Hekim: {t.get('hekim_adi', 'Farketmez')} | "
+                f"Tarih Aralığı: {bas_dt.strftime('%d.%m.%Y')} - {bit_dt.strftime('%d.%m.%Y')}"
+            )
+
+    # ===========================
+    # Takip döngüsü
+    # ===========================
+    async def takip_dongusu(self, anahtar: tuple):
+        """
+        Bir sorgu anahtarının tek turu (zamanlayıcı tarafından çağrılır):
+          - Her deneme arasında 55–95 sn rastgele bekler.
+          - Uzun mola sabit aralıkla değil:
+              * En az LONG_BREAK_MIN_TRIES deneme geçmeden uzun mola yok.
+              * LONG_BREAK_MIN_TRIES+ denemelerde her seferinde LONG_BREAK_PROB ihtimalle
+                LONG_BREAK_SECONDS_MIN–LONG_BREAK_SECONDS_MAX arası uzun mola.
+          - Böylece hem insan gibi davranır, hem de MHRS'yi spamlamaz.
+        Bir sonraki tura kadar beklenecek süreyi (sn) döner; abone kalmadıysa None.
+        Bekleme coroutine içinde uyunarak yapılmaz: nedeni abonelik["durum"]da,
+        süresi zamanlayıcıda tutulur ve iş iptal edilince hemen düşer.
+        """
+        abonelik = self.sorgu_abonelikleri.get(anahtar)
+        aboneler = self.takipler.anahtar(anahtar)
+        if abonelik is None or not aboneler:
+            return None
+
+        if abonelik["durum"] == "uzun_mola":
+            for uid in dict.fromkeys(k.user_id for k in aboneler):
+                await self.bildirici.uzun_mola_bitti(uid)
+            for kayit in aboneler:
+                user_logger.info(f"{kayit.username} - Uzun mola bitti, taramaya devam ediliyor.")
+
+        for kayit in await self.randevu_sorgula(anahtar):
+            self._takibi_bitir(kayit.no)
+            user_logger.info(
+                f"{kayit.username} - Randevu sonrası takip sonlandırıldı: {kayit.takip['klinik_adi']}"
+            )
+
+        # Tur sürerken anahtar durdurulduysa (/dur ya da son takip bitti) iş zaten iptal edildi
+        if self.sorgu_abonelikleri.get(anahtar) is not abonelik:
+            return None
+        aboneler = self.takipler.anahtar(anahtar)
+
+        if abonelik["mola"]:
+            mola, abonelik["mola"] = abonelik["mola"], 0
+            abonelik["durum"] = abonelik["mola_durumu"] or "oturum_bekleniyor"
+            abonelik["mola_durumu"] = None
+            return mola
+
+        abonelik["deneme"] += 1
+        abonelik["since_long_break"] += 1
+        deneme = abonelik["deneme"]
+        since_long_break = abonelik["since_long_break"]
+        kullanicilar = list(dict.fromkeys(k.user_id for k in aboneler))
+
+        # === Uzun mola mı yoksa normal mi? ===
+        uzun_mola_yap = False
+        if since_long_break >= LONG_BREAK_MIN_TRIES:
+            if self.saat.rng.random() < LONG_BREAK_PROB:
+                uzun_mola_yap = True
+
+        if uzun_mola_yap:
+            uzun_bekleme = self.saat.rng.randint(LONG_BREAK_SECONDS_MIN, LONG_BREAK_SECONDS_MAX)
+            dakika = uzun_bekleme // 60
+            saniye = uzun_bekleme % 60
+
+            for kayit in aboneler:
+                user_logger.info(
+                    f"{kayit.username} - {deneme}. deneme sonrası uzun mola: {dakika} dk {saniye} sn "
+                    f"(since_long_break={since_long_break})"
+                )
+            for uid in kullanicilar:
+                await self.bildirici.uzun_mola(uid, deneme, uzun_bekleme, since_long_break)
+
+            abonelik["since_long_break"] = 0
+            abonelik["durum"] = "uzun_mola"
+            return uzun_bekleme
+
+        abonelik["durum"] = "bekliyor"
+        bekleme = self.saat.rng.randint(WAIT_MIN, WAIT_MAX)
+        for kayit in aboneler:
+            user_logger.info(f"{kayit.username} - {bekleme} saniye bekleniyor (deneme #{deneme})")
+        for uid in kullanicilar:
+            await self.bildirici.bekleniyor(uid, deneme, bekleme)
+        return bekleme
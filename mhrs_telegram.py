@@ -1,109 +1,139 @@
-import asyncio
-import random
-import re
-import logging
-import os
 from datetime import datetime, timedelta
 
-import requests
 from telegram import Update
+from telegram.error import BadRequest, Forbidden, RetryAfter
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, MessageHandler, filters,
     ContextTypes, ConversationHandler
 )
 
+from mhrs_core import api, giden
+from mhrs_core.async_client import async_client
+from mhrs_core.cache import ref_cache
+from mhrs_core.filtre import FILTRE_ORNEGI, filtre_aciklama, filtre_coz
+from mhrs_core.giden import GidenKutusu
+from mhrs_core.logs import http_logger, log_stats, setup_logging, user_logger
+from mhrs_core.metrikler import metrik_sunucusu_baslat
+from mhrs_core.secim import (
+    SIRALAMA_MENUSU, SIRALAMA_TIPLERI, VARSAYILAN_SIRALAMA, siralama_aciklama, siralama_olustur
+)
+from mhrs_core.slots import Slot
+from mhrs_core.store import TakipStore, ortamdan_sifreleyici
+from mhrs_core.takip import Bildirici, TakipServisi
+
+# Conversation states
+(
+    AUTH_METHOD, TOKEN, TC, SIFRE, IL, ILCE, KLINIK, OTOMATIK, SIRALAMA, SIRALAMA_DEGER, FILTRE,
+    BASLANGIC_TARIHI, BITIS_TARIHI,
+) = range(13)
+
 # ===========================
-# Log ayarları
+# Telegram bildirimleri
 # ===========================
-os.makedirs("logs", exist_ok=True)
+class TelegramBildirici(Bildirici):
+    """Bildirimler GidenKutusu üzerinden gider; takip yolu Telegram'ı beklemez."""
 
-logging.basicConfig(level=logging.INFO)
+    def __init__(self):
+        self.bot = None  # post_init'te Application.bot atanır
+        self.kutu = GidenKutusu(self._bot_gonder, bekleme_suresi=_flood_bekleme, kalici_mi=_kalici_hata)
 
-user_logger = logging.getLogger("user_logger")
-user_logger.setLevel(logging.INFO)
-user_handler = logging.FileHandler(
-    f"logs/{datetime.now().strftime('%Y-%m-%d')}.log", encoding="utf-8"
-)
-user_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
-user_logger.addHandler(user_handler)
-user_logger.propagate = False
+    async def _bot_gonder(self, user_id, text: str, **kwargs):
+        await self.bot.send_message(chat_id=user_id, text=text, **kwargs)
+
+    def _gonder(self, user_id, text: str, oncelik: int = giden.NORMAL, anahtar=None, **kwargs):
+        self.kutu.ekle(user_id, text, oncelik, anahtar, **kwargs)
+
+    async def token_gecersiz(self, user_id, yenilenebilir: bool):
+        if yenilenebilir:
+            self._gonder(user_id, "⚠️ Oturum düştü. Token yenilemeye çalışıyorum...", giden.DUSUK, "oturum")
+        else:
+            self._gonder(user_id, "❗ Token geçersiz (401) ve TC/Şifre yok. /start ile tekrar giriş yap.",
+                         anahtar="oturum")
+
+    async def oturum_yenilendi(self, user_id):
+        self._gonder(user_id, "✅ Oturum yenilendi. Tarama devam ediyor...", giden.DUSUK, "oturum")
+
+    async def oturum_yenilenemedi(self, user_id, mola: int):
+        self._gonder(
+            user_id,
+            f"❌ 5 kez yeniden giriş denemesi başarısız. {mola // 60} dakika mola veriyorum.",
+            anahtar="oturum",
+        )
+
+    async def randevu_bulundu(self, user_id, slot: Slot):
+        dt = slot.baslangic
+        mesaj = (
+            "📢 *Uygun Randevu Bulundu!*\n\n"
+            f"🏥 Klinik: `{slot.klinik_adi}`\n"
+            f"👨‍⚕️ Hekim: `{slot.hekim_adi}`\n"
+            f"📅 Tarih: *{dt.strftime('%d.%m.%Y')}*\n"
+            f"⏰ Saat: *{dt.strftime('%H:%M')}*\n\n"
+            "⏹️ Bu takip durduruldu. Yeni takip için /start"
+        )
+        self._gonder(user_id, mesaj, giden.YUKSEK, parse_mode="Markdown")
+
+    async def randevu_alindi(self, user_id, bilgi: dict):
+        dt = bilgi["dt"]
+        mesaj = (
+            "✅ *Randevu Alındı!*\n\n"
+            f"🏥 Klinik: `{bilgi['klinik_adi']}`\n"
+            f"👨‍⚕️ Hekim: `{bilgi['hekim_adi']}`\n"
+            f"📍 Muayene Yeri: `{bilgi['muayene_yeri']}`\n"
+            f"📅 Tarih: *{dt.strftime('%d.%m.%Y')}*\n"
+            f"⏰ Saat: *{dt.strftime('%H:%M')}*\n\n"
+            "⏹️ Bu takip durduruldu. Yeni takip için /start"
+        )
+        self._gonder(user_id, mesaj, giden.YUKSEK, parse_mode="Markdown")
+
+    async def uzun_mola(self, user_id, deneme: int, sure: int, since_long_break: int):
+        self._gonder(user_id, f"😴 {deneme}. deneme sonrası uzun mola: {sure // 60} dk {sure % 60} sn",
+                     giden.DUSUK, "mola")
+
+    async def geri_yuklenemedi(self, user_id):
+        self._gonder(user_id, "🔄 Bot yeniden başladı. Giriş bilgilerin saklanmadığı için takibin devam edemiyor. "
+                              "/start ile tekrar başlat.")
+
+
+def _flood_bekleme(e: Exception) -> float | None:
+    if not isinstance(e, RetryAfter):
+        return None
+    sure = e.retry_after
+    return sure.total_seconds() if isinstance(sure, timedelta) else float(sure)
 
-http_logger = logging.getLogger("http_logger")
-http_logger.setLevel(logging.INFO)
-http_handler = logging.FileHandler("logs/pc_log.txt", encoding="utf-8")
-http_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-http_logger.addHandler(http_handler)
-http_logger.propagate = False
+
+def _kalici_hata(e: Exception) -> bool:
+    # Bot engellenmiş / sohbet yok ya da mesaj biçimi hatalı: tekrar denemek boşuna
+    return isinstance(e, (Forbidden, BadRequest))
 
 # ===========================
 # Global durum
 # ===========================
-aktif_kullanicilar = {}
-
-# Takip döngüsü bekleme ayarları
-WAIT_MIN = 55
-WAIT_MAX = 95
+# Takipler yeniden başlatmada kaybolmasın diye SQLite'ta da tutulur. Giriş bilgileri
+# yalnızca MHRS_KIMLIK_ANAHTARI verilirse (şifrelenerek) yazılır; bkz. mhrs_core/store.py
+servis = TakipServisi(TelegramBildirici(), store=TakipStore(sifreleyici=ortamdan_sifreleyici()))
 
-LONG_BREAK_MIN_TRIES = 10
-LONG_BREAK_PROB = 0.80
-LONG_BREAK_SECONDS_MIN = 5 * 60
-LONG_BREAK_SECONDS_MAX = 10 * 60
+# Prometheus metrik ucu (http://127.0.0.1:PORT/metrics); None: kapalı
+METRIK_PORT = 9108
 
-# Conversation states
-AUTH_METHOD, TOKEN, TC, SIFRE, IL, ILCE, KLINIK, OTOMATIK, BASLANGIC_TARIHI, BITIS_TARIHI = range(10)
+# MHRS adresi; None: MHRS_BASE_URL ortam değişkeni ya da prd.mhrs.gov.tr
+# (yerel sahte sunucu için ör. "http://127.0.0.1:8080", bkz. mhrs_core/stub.py)
+MHRS_URL = None
+_metrik_sunucu = None
 
 # ===========================
-# Helpers (Core)
+# Helpers
 # ===========================
-def _headers(token: str) -> dict:
-    return {"Authorization": f"Bearer {token}", "User-Agent": "Mozilla/5.0"}
-
-def _strip_html(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-    no_tags = re.sub(r"<.*?>", "", s)
-    return no_tags.replace("\r", " ").replace("\n", " ").strip()
-
-async def _http_get_json(url: str, headers: dict, timeout: int = 25):
-    def _do():
-        return requests.get(url, headers=headers, timeout=timeout)
-    res = await asyncio.to_thread(_do)
-    return res
-
-async def _http_post_json(url: str, headers: dict, payload: dict, timeout: int = 25):
-    def _do():
-        return requests.post(url, headers=headers, json=payload, timeout=timeout)
-    res = await asyncio.to_thread(_do)
-    return res
-
-async def mhrs_login_get_token(tc: str, sifre: str) -> str | None:
-    """
-    TC/Şifre ile MHRS login olur, JWT döner. Başarısızsa None.
-    """
-    url = "https://prd.mhrs.gov.tr/api/vatandas/login"
-    payload = {
-        "kullaniciAdi": tc,
-        "parola": sifre,
-        "islemKanali": "VATANDAS_WEB",
-        "girisTipi": "PAROLA",
-    }
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Accept-Language": "tr-TR,tr;q=0.9",
-    }
-    try:
-        res = await _http_post_json(url, headers=headers, payload=payload, timeout=20)
-        if res.status_code != 200:
-            http_logger.error("LOGIN HTTP %s - %s", res.status_code, res.text)
-            return None
+async def _http_get_json(endpoint: str, path: str, headers: dict):
+    return await async_client.get(endpoint, path, headers=headers)
+
+async def _referans_listesi(anahtar: str, endpoint: str, path: str, token: str, alan: str | None = None):
+    """İlçe/klinik gibi referans listelerini önbellekten, yoksa MHRS'den getirir."""
+    async def _fetch():
+        res = await _http_get_json(endpoint, path, headers=api.headers(token))
+        res.raise_for_status()
         js = res.json()
-        jwt = (js or {}).get("data", {}).get("jwt")
-        return jwt
-    except Exception as e:
-        http_logger.error("LOGIN EXC - %s", e)
-        return None
+        return js[alan] if alan else js
+    return await ref_cache.aget_or_fetch(anahtar, _fetch)
 
 # ===========================
 # Commands
@@ -119,6 +149,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🛠 Komutlar:\n"
         "/start - Yeni takip\n"
         "/dur - Tüm takipleri durdur\n"
+        "/durum - Takiplerin durumu\n"
         "/yardim - Token alma rehberi\n"
         "/iptal - İşlemi iptal\n\n"
     )
@@ -139,7 +170,7 @@ async def yardim(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "1. mhrs.gov.tr giriş yap\n"
         "2. F12 → Network\n"
         "3. İstek seç → Headers → Authorization\n\n"
-        "📌 Not: TC/Şifre ile girersen token düşse bile bot otomatik yeniler.\n""
+        "📌 Not: TC/Şifre ile girersen token düşse bile bot otomatik yeniler.\n"
     )
     await update.message.reply_text(mesaj, parse_mode="Markdown")
 
@@ -152,15 +183,39 @@ async def dur(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uid = update.effective_user.id
     username = update.effective_user.username or f"user_{uid}"
 
-    if uid not in aktif_kullanicilar or not aktif_kullanicilar[uid].get("takipler"):
+    if not servis.kullanici_durdur(uid):
         await update.message.reply_text("❌ Aktif takip yok.")
         return ConversationHandler.END
 
-    aktif_kullanicilar.pop(uid, None)
     await update.message.reply_text("⏹️ Tüm takipler durduruldu.")
     user_logger.info(f"{username} - Tüm takipleri durdurdu.")
     return ConversationHandler.END
 
+DURUM_METINLERI = {
+    "bekliyor": "🔁 Taranıyor",
+    "uzun_mola": "😴 Uzun molada",
+    "oturum_bekleniyor": "🔐 Oturum yenilemesi bekleniyor",
+    "devre_acik": "⛔ MHRS hata veriyor, bekleniyor",
+}
+
+async def durum(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    takipler = servis.durum(update.effective_user.id)
+    if not takipler:
+        await update.message.reply_text("❌ Aktif takip yok.")
+        return
+
+    satirlar = ["📋 *Takiplerin:*"]
+    for t in takipler:
+        mod = "🤖" if t["otomatik"] else "📢"
+        satir = f"\n{mod} #{t['no']} {t['klinik_adi']}\n   {DURUM_METINLERI.get(t['durum'], t['durum'])}"
+        if t["sonraki_tur"] is not None:
+            satir += f" · sonraki tur {t['sonraki_tur']} sn"
+        satir += f" · deneme #{t['deneme']}"
+        if t["oturum_bekleme"]:
+            satir += f"\n   ⏳ Yeniden giriş {t['oturum_bekleme']} sn sonra"
+        satirlar.append(satir)
+    await update.message.reply_text("\n".join(satirlar), parse_mode="Markdown")
+
 # ===========================
 # Conversation steps
 # ===========================
@@ -189,9 +244,9 @@ async def get_token(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Hasta bilgisi dene
     try:
         res = await _http_get_json(
-            "https://prd.mhrs.gov.tr/api/vatandas/vatandas/hasta-bilgisi",
-            headers=_headers(token),
-            timeout=20
+            "hasta_bilgisi",
+            api.HASTA_BILGISI_PATH,
+            headers=api.headers(token),
         )
         if res.status_code == 200 and res.json().get("success"):
             data = res.json().get("data", {})
@@ -219,7 +274,7 @@ async def get_sifre(update: Update, context: ContextTypes.DEFAULT_TYPE):
     uname = update.effective_user.username or f"user_{update.effective_user.id}"
 
     await update.message.reply_text("⏳ Giriş yapıyorum...")
-    jwt = await mhrs_login_get_token(tc, sifre)
+    jwt = await servis.login(tc, sifre)
     if not jwt:
         user_logger.warning(f"{uname} - TC/Şifre login başarısız.")
         await update.message.reply_text("❌ Giriş başarısız. /start ile tekrar dene.")
@@ -242,12 +297,12 @@ async def get_il(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     context.user_data["il_id"] = plaka
     try:
-        res = await _http_get_json(
-            f"https://prd.mhrs.gov.tr/api/yonetim/genel/ilce/selectinput/{plaka}",
-            headers=_headers(token),
-            timeout=25
+        ilceler = await _referans_listesi(
+            f"ilce:{plaka}",
+            "ilce",
+            api.ilce_path(plaka),
+            token,
         )
-        ilceler = res.json()
         context.user_data["ilceler"] = ilceler
         liste = "\n".join([f"{i+1} - {ilce['text']}" for i, ilce in enumerate(ilceler)])
         await update.message.reply_text("🏘 İlçe seç:\n" + liste)
@@ -274,12 +329,13 @@ async def get_ilce(update: Update, context: ContextTypes.DEFAULT_TYPE):
     il_id = context.user_data["il_id"]
     token = context.user_data["token"]
     try:
-        res = await _http_get_json(
-            f"https://prd.mhrs.gov.tr/api/kurum/kurum/kurum-klinik/il/{il_id}/ilce/{ilce['value']}/kurum/-1/aksiyon/200/select-input",
-            headers=_headers(token),
-            timeout=25
+        klinikler = await _referans_listesi(
+            f"klinik:{il_id}:{ilce['value']}",
+            "klinik",
+            api.klinik_path(il_id, ilce["value"]),
+            token,
+            alan="data",
         )
-        klinikler = res.json()["data"]
         context.user_data["klinikler"] = klinikler
         liste = "\n".join([f"{i+1} - {k['text']}" for i, k in enumerate(klinikler)])
         await update.message.reply_text("🏥 Klinik seç:\n" + liste)
@@ -317,6 +373,65 @@ async def get_otomatik(update: Update, context: ContextTypes.DEFAULT_TYPE):
     otomatik = (secim == "1")
     context.user_data["otomatik"] = otomatik
 
+    await update.message.reply_text(
+        "🏆 *Hangi randevu önce seçilsin?*\n\n" + SIRALAMA_MENUSU,
+        parse_mode="Markdown"
+    )
+    return SIRALAMA
+
+async def get_siralama(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    secim = update.message.text.strip()
+    tip = SIRALAMA_TIPLERI.get(secim)
+    if tip is None:
+        await update.message.reply_text("❌ 1, 2, 3 veya 4 yaz.")
+        return SIRALAMA
+
+    context.user_data["siralama_secimi"] = secim
+    if tip == "erken":
+        context.user_data["siralama"] = siralama_olustur(secim)
+        return await _filtre_sor(update, context)
+
+    if tip == "saat":
+        await update.message.reply_text("⏰ Saat aralığı gir (ss-ss). Örn: 09-12")
+    else:
+        await update.message.reply_text(f"✍️ Tercih ettiğin {tip} adını (ya da bir kısmını) yaz.")
+    return SIRALAMA_DEGER
+
+async def get_siralama_deger(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        siralama = siralama_olustur(
+            context.user_data["siralama_secimi"], update.message.text.strip()
+        )
+    except ValueError:
+        await update.message.reply_text("❌ Geçersiz değer. Tekrar yaz (saat için örn: 09-12).")
+        return SIRALAMA_DEGER
+
+    context.user_data["siralama"] = siralama
+    return await _filtre_sor(update, context)
+
+async def _filtre_sor(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(
+        "🔎 Filtre eklemek ister misin? İstemiyorsan - yaz.\n\n"
+        f"Örn: {FILTRE_ORNEGI}\n\n"
+        "gün: pzt,sal,... / pzt-cum / hafta içi / hafta sonu\n"
+        "saat: ss-ss (bitiş hariç)\n"
+        "hariç: istemediğin hekimler (virgülle)"
+    )
+    return FILTRE
+
+async def get_filtre(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        filtre = filtre_coz(update.message.text)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}. Tekrar yaz ya da - gönder.")
+        return FILTRE
+
+    context.user_data["filtre"] = filtre
+    if filtre:
+        await update.message.reply_text(f"✅ Filtre: {filtre_aciklama(filtre)}")
+    return await _tarih_sor(update, context)
+
+async def _tarih_sor(update: Update, context: ContextTypes.DEFAULT_TYPE):
     bugun = datetime.now().strftime("%d.%m.%Y")
     onbes = (datetime.now() + timedelta(days=15)).strftime("%d.%m.%Y")
 
@@ -371,12 +486,11 @@ async def get_bitis_tarihi(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "kurum_id": -1,
         "hekim_adi": "Farketmez",
         "kurum_adi": "Farketmez",
+        "siralama": context.user_data.get("siralama") or dict(VARSAYILAN_SIRALAMA),
+        "filtre": context.user_data.get("filtre"),
     }
 
-    aktif_kullanicilar.setdefault(uid, {"aktif": True, "takipler": []})
-    aktif_kullanicilar[uid]["takipler"].append(takip)
-
-    asyncio.create_task(takip_dongusu(uid, uname, context, takip))
+    servis.takip_ekle(uid, uname, takip)
 
     if takip["otomatik"]:
         await update.message.reply_text(
@@ -389,299 +503,51 @@ async def get_bitis_tarihi(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Durdurmak için /dur"
         )
 
-    user_logger.info(f"{uname} - Takip eklendi: {takip['klinik_adi']} (otomatik={takip['otomatik']})")
+    user_logger.info(
+        f"{uname} - Takip eklendi: {takip['klinik_adi']} (otomatik={takip['otomatik']}, "
+        f"{siralama_aciklama(takip['siralama'])}, {filtre_aciklama(takip['filtre'])})"
+    )
     return ConversationHandler.END
 
-# ===========================
-# Core: Takip + Sorgu + Alım
-# ===========================
-async def randevu_al(slot, token, username, context: ContextTypes.DEFAULT_TYPE, user_id: int):
-    url = "https://prd.mhrs.gov.tr/api/kurum/randevu/randevu-ekle"
-    payload = {
-        "fkSlotId": slot["id"],
-        "fkCetvelId": slot["fkCetvelId"],
-        "muayeneYeriId": slot.get("muayeneYeriId", -1),
-        "yenidogan": False,
-        "randevuNotu": "",
-        "baslangicZamani": slot["baslangicZamani"],
-        "bitisZamani": slot["bitisZamani"],
-    }
-
-    try:
-        res = await _http_post_json(url, headers=_headers(token), payload=payload, timeout=20)
-        http_ok = (res.status_code == 200)
-
-        try:
-            js = res.json()
-        except Exception:
-            js = None
-
-        # varsayılanlar
-        dt = datetime.fromisoformat(slot["baslangicZamani"])
-        klinik_adi = slot.get("klinikAdi", "Bilinmiyor")
-        hekim_adi = slot.get("hekimAdi", "Bilinmiyor")
-        muayene_yeri = slot.get("muayeneYeriAdi") or slot.get("muayeneYeriId", "-")
-
-        # cevap içinden güzelleştir
-        if js:
-            data = js.get("data", {}) or {}
-            hekim_info = data.get("hekim") or {}
-            ad = (hekim_info.get("ad") or "").strip()
-            soyad = (hekim_info.get("soyad") or "").strip()
-            full_name = (ad + " " + soyad).strip()
-            if full_name:
-                hekim_adi = full_name
-
-            klinik_info = data.get("klinik") or {}
-            klinik_adi_resp = (klinik_info.get("mhrsKlinikAdi") or klinik_info.get("kisaAdi") or "").strip()
-            if klinik_adi_resp:
-                klinik_adi = klinik_adi_resp
-
-            muayene_info = data.get("muayeneYeri") or {}
-            muayene_yeri_adi = (muayene_info.get("adi") or "").strip()
-            if muayene_yeri_adi:
-                muayene_yeri = muayene_yeri_adi
-
-        ok = http_ok and ((js or {}).get("success", True))
-        if ok:
-            user_logger.info(
-                f"{username} - RANDEVU ALINDI | Klinik:{klinik_adi} | Hekim:{hekim_adi} | "
-                f"MuayeneYeri:{muayene_yeri} | {dt.strftime('%d.%m.%Y %H:%M')} | SlotId:{slot.get('id')}"
-            )
-            mesaj = (
-                "✅ *Randevu Alındı!*\n\n"
-                f"🏥 Klinik: `{klinik_adi}`\n"
-                f"👨‍⚕️ Hekim: `{hekim_adi}`\n"
-                f"📍 Muayene Yeri: `{muayene_yeri}`\n"
-                f"📅 Tarih: *{dt.strftime('%d.%m.%Y')}*\n"
-                f"⏰ Saat: *{dt.strftime('%H:%M')}*\n\n"
-                "⏹️ Bu takip durduruldu. Yeni takip için /start"
-            )
-            await context.bot.send_message(chat_id=user_id, text=mesaj, parse_mode="Markdown")
-            return True
-
-        http_logger.error("RANDEVU_EKLE HTTP %s - %s", res.status_code, res.text)
-        user_logger.warning(f"{username} - Randevu alma BAŞARISIZ - {res.status_code}")
-        return False
-
-    except Exception as e:
-        user_logger.warning(f"{username} - Randevu alma hatası: {e}")
-        return False
-
-async def randevu_sorgula(takip: dict, username: str, user_id: int, context: ContextTypes.DEFAULT_TYPE):
-    token = takip["token"]
-    il_id = takip["il_id"]
-    ilce_id = takip["ilce_id"]
-    klinik_id = takip["klinik_id"]
-    klinik_adi = takip["klinik_adi"]
-    otomatik = takip["otomatik"]
-
-    # ----- Kayan pencere -----
-    orj_bas = takip.get("baslangic_tarihi")
-    orj_bit = takip.get("bitis_tarihi")
-    try:
-        orj_bas_dt = datetime.strptime(orj_bas, "%d.%m.%Y") if orj_bas else None
-        orj_bit_dt = datetime.strptime(orj_bit, "%d.%m.%Y") if orj_bit else None
-        gun_farki = max(0, (orj_bit_dt - orj_bas_dt).days) if (orj_bas_dt and orj_bit_dt) else 15
-    except Exception:
-        gun_farki = 15
-
-    bugun = datetime.now()
-    bas_dt = bugun.replace(hour=0, minute=0, second=0, microsecond=0)
-    bit_dt = bas_dt + timedelta(days=gun_farki)
-
-    payload = {
-        "aksiyonId": "200",
-        "baslangicZamani": bas_dt.strftime("%Y-%m-%d 08:00:00"),
-        "bitisZamani": bit_dt.strftime("%Y-%m-%d 23:59:59"),
-        "cinsiyet": "F",
-        "ekRandevu": True,
-        "mhrsHekimId": takip.get("hekim_id", -1),
-        "mhrsIlId": il_id,
-        "mhrsIlceId": ilce_id,
-        "mhrsKlinikId": klinik_id,
-        "mhrsKurumId": takip.get("kurum_id", -1),
-        "muayeneYeriId": -1,
-        "randevuZamaniList": [],
-        "tumRandevular": False,
-    }
-
-    url = "https://prd.mhrs.gov.tr/api/kurum-rss/randevu/slot-sorgulama/slot"
-
-    res = await _http_post_json(url, headers=_headers(token), payload=payload, timeout=25)
-
-    # 401 -> TC/Şifre varsa otomatik yenile
-    if res.status_code == 401:
-        user_logger.warning(f"{username} - Token geçersiz (401). Yenileme denenecek.")
-        if not (takip.get("tc") and takip.get("sifre")):
-            await context.bot.send_message(
-                chat_id=user_id,
-                text="❗ Token geçersiz (401) ve TC/Şifre yok. /start ile tekrar giriş yap."
-            )
-            return False
-
-        await context.bot.send_message(chat_id=user_id, text="⚠️ Oturum düştü. Token yenilemeye çalışıyorum...")
-
-        max_retry = 5
-        for deneme in range(1, max_retry + 1):
-            new_jwt = await mhrs_login_get_token(takip["tc"], takip["sifre"])
-            if new_jwt:
-                takip["token"] = new_jwt
-                token = new_jwt
-                user_logger.info(f"{username} - Oturum yenilendi.")
-                await context.bot.send_message(chat_id=user_id, text="✅ Oturum yenilendi. Tarama devam ediyor...")
-
-                res = await _http_post_json(url, headers=_headers(token), payload=payload, timeout=25)
-                break
-
-            if deneme < max_retry:
-                wait = random.randint(30, 90)
-                await asyncio.sleep(wait)
-
-        if res.status_code == 401:
-            mola = 3600
-            user_logger.warning(f"{username} - 5 yenileme denemesi başarısız. 60 dk mola.")
-            await context.bot.send_message(
-                chat_id=user_id,
-                text="❌ 5 kez yeniden giriş denemesi başarısız. 60 dakika mola veriyorum."
-            )
-            await asyncio.sleep(mola)
-            return False
-
-    # JSON parse
-    try:
-        js = res.json()
-    except Exception:
-        js = {}
-
-    if res.status_code != 200:
-        http_logger.error("SLOT HTTP %s - %s", res.status_code, res.text)
-
-        warnings_list = js.get("warnings") or []
-        if warnings_list and isinstance(warnings_list, list):
-            w0 = warnings_list[0] or {}
-            kodu = w0.get("kodu", "BILINMIYOR")
-            mesaj_plain = _strip_html(w0.get("mesaj", ""))
-            user_logger.info(f"{username} - MHRS UYARI | Kod: {kodu} | Mesaj: {mesaj_plain}")
-        else:
-            user_logger.warning(f"{username} - Slot sorgusu başarısız: HTTP {res.status_code}")
-        return False
-
-    data = (js or {}).get("data", [])
-    warnings_list = (js or {}).get("warnings") or []
-
-    if not data:
-        if warnings_list and isinstance(warnings_list, list):
-            w0 = warnings_list[0] or {}
-            kodu = w0.get("kodu", "BILINMIYOR")
-            mesaj_plain = _strip_html(w0.get("mesaj", ""))
-            user_logger.info(f"{username} - MHRS UYARI | Kod: {kodu} | Mesaj: {mesaj_plain}")
-        return False
-
-    # Slot tarama: hekim adını data ağacından çek
-    for hekim in data[0].get("hekimSlotList", []):
-        hekim_info = hekim.get("hekim") or hekim
-        ad = (hekim_info.get("ad") or "").strip()
-        soyad = (hekim_info.get("soyad") or "").strip()
-        hekim_adi = (ad + " " + soyad).strip() or (
-            hekim_info.get("hekimAdi")
-            or hekim_info.get("hekimAd")
-            or hekim_info.get("hekimAdiSoyadi")
-            or hekim_info.get("text")
-            or "Bilinmiyor"
-        )
-
-        for muayene in hekim.get("muayeneYeriSlotList", []):
-            for saat in muayene.get("saatSlotList", []):
-                for sl in saat.get("slotList", []):
-                    if not sl.get("bos"):
-                        continue
-
-                    enriched = sl["slot"]
-                    enriched.update({
-                        "id": sl["id"],
-                        "baslangicZamani": sl["baslangicZamani"],
-                        "bitisZamani": sl["bitisZamani"],
-                        "fkCetvelId": enriched.get("fkCetvelId"),
-                        "muayeneYeriId": enriched.get("muayeneYeriId"),
-                        "klinikAdi": klinik_adi,
-                        "hekimAdi": hekim_adi,
-                    })
-
-                    dt = datetime.fromisoformat(enriched["baslangicZamani"])
-                    if dt <= datetime.now():
-                        continue
-
-                    if otomatik:
-                        return await randevu_al(enriched, token, username, context, user_id)
-
-                    mesaj = (
-                        "📢 *Uygun Randevu Bulundu!*\n\n"
-                        f"🏥 Klinik: `{klinik_adi}`\n"
-                        f"👨‍⚕️ Hekim: `{hekim_adi}`\n"
-                        f"📅 Tarih: *{dt.strftime('%d.%m.%Y')}*\n"
-                        f"⏰ Saat: *{dt.strftime('%H:%M')}*\n\n"
-                        "⏹️ Bu takip durduruldu. Yeni takip için /start"
-                    )
-                    await context.bot.send_message(chat_id=user_id, text=mesaj, parse_mode="Markdown")
-                    return True
-
-    return False
-
-async def takip_dongusu(user_id: int, username: str, context: ContextTypes.DEFAULT_TYPE, takip: dict):
-    deneme = 0
-    since_long_break = 0
-
-    while True:
-        if user_id not in aktif_kullanicilar:
-            break
-        if takip not in aktif_kullanicilar[user_id]["takipler"]:
-            break
-
-        sonuc = await randevu_sorgula(takip, username, user_id, context)
-
-        if sonuc:
-            try:
-                aktif_kullanicilar[user_id]["takipler"].remove(takip)
-            except ValueError:
-                pass
-            user_logger.info(f"{username} - Randevu sonrası takip sonlandırıldı: {takip['klinik_adi']}")
-            break
-
-        deneme += 1
-        since_long_break += 1
-
-        uzun_mola = False
-        if since_long_break >= LONG_BREAK_MIN_TRIES:
-            if random.random() < LONG_BREAK_PROB:
-                uzun_mola = True
-
-        if uzun_mola:
-            uzun_bekleme = random.randint(LONG_BREAK_SECONDS_MIN, LONG_BREAK_SECONDS_MAX)
-            dakika = uzun_bekleme // 60
-            saniye = uzun_bekleme % 60
-
-            user_logger.info(f"{username} - {deneme}. deneme sonrası uzun mola: {dakika}dk {saniye}sn")
-            await context.bot.send_message(
-                chat_id=user_id,
-                text=f"😴 {deneme}. deneme sonrası uzun mola: {dakika} dk {saniye} sn"
-            )
-
-            since_long_break = 0
-            await asyncio.sleep(uzun_bekleme)
-            continue
-
-        bekleme = random.randint(WAIT_MIN, WAIT_MAX)
-        user_logger.info(f"{username} - {bekleme} saniye bekleniyor (deneme #{deneme})")
-        await asyncio.sleep(bekleme)
-
 # ===========================
 # Main
 # ===========================
+async def _baslangic(app):
+    global _metrik_sunucu
+    servis.bildirici.bot = app.bot
+    await servis.bildirici.kutu.start()
+    await servis.start()
+    if METRIK_PORT:
+        _metrik_sunucu = await metrik_sunucusu_baslat(METRIK_PORT)
+    adet = await servis.geri_yukle()
+    if adet:
+        user_logger.info(f"SISTEM - {adet} takip yeniden yüklendi.")
+
+async def _kapanis(app):
+    if _metrik_sunucu is not None:
+        _metrik_sunucu.close()
+    await servis.stop()
+    await servis.bildirici.kutu.stop()
+    http_logger.info("Giden mesaj istatistikleri: %s", servis.bildirici.kutu.stats())
+    http_logger.info("Zamanlayıcı istatistikleri: %s", servis.zamanlayici.stats())
+    http_logger.info("HTTP istemci istatistikleri: %s", async_client.pool_stats())
+    http_logger.info("Oturum istatistikleri: %s", servis.oturumlar.stats())
+    http_logger.info("Devre kesici istatistikleri: %s", servis.devreler.stats())
+    http_logger.info("Referans önbellek istatistikleri: %s", ref_cache.stats())
+    http_logger.info("Log istatistikleri: %s", log_stats())
+    await async_client.aclose()
+    servis.store.close()
+
 def main():
     BOT_TOKEN = "TOKENINI_BURAYA_YAZ"
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    setup_logging("telegram")
+    if MHRS_URL:
+        async_client.base_url = MHRS_URL.rstrip("/")
+        ref_cache.kaynak_ayarla(MHRS_URL)
+    http_logger.info("MHRS adresi: %s", async_client.base_url)
+
+    app = ApplicationBuilder().token(BOT_TOKEN).post_init(_baslangic).post_shutdown(_kapanis).build()
 
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", start)],
@@ -694,6 +560,9 @@ def main():
             ILCE: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_ilce)],
             KLINIK: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_klinik)],
             OTOMATIK: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_otomatik)],
+            SIRALAMA: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_siralama)],
+            SIRALAMA_DEGER: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_siralama_deger)],
+            FILTRE: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_filtre)],
             BASLANGIC_TARIHI: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_baslangic_tarihi)],
             BITIS_TARIHI: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_bitis_tarihi)],
         },
@@ -706,6 +575,7 @@ def main():
 
     app.add_handler(conv_handler)
     app.add_handler(CommandHandler("dur", dur))
+    app.add_handler(CommandHandler("durum", durum))
     app.add_handler(CommandHandler("yardim", yardim))
     app.add_handler(CommandHandler("iptal", iptal))
 
@@ -0,0 +1,75 @@
+import gzip
+import logging
+
+import pytest
+
+from mhrs_core import api
+from mhrs_core.analiz import Analiz
+from mhrs_core.logs import olay, olay_logger
+from mhrs_core.saat import SanalSaat
+from mhrs_core.stub import MhrsStub, StubHttp
+from mhrs_core.takip import Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI, jwt, takip
+
+
+@pytest.fixture
+def olay_dosyasi(tmp_path):
+    """olay_logger'ı kuyruk yerine doğrudan bir dosyaya yazdırır."""
+    yol = tmp_path / "olaylar.jsonl"
+    handler = logging.FileHandler(yol, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    olay_logger.addHandler(handler)
+    olay_logger.setLevel(logging.INFO)
+    yield yol
+    olay_logger.removeHandler(handler)
+    olay_logger.setLevel(logging.NOTSET)
+    handler.close()
+
+
+def test_loglama_kurulmadiysa_olay_yazilmaz(tmp_path):
+    yol = tmp_path / "olaylar.jsonl"
+    handler = logging.FileHandler(yol, encoding="utf-8", delay=True)
+    olay_logger.addHandler(handler)
+    try:
+        olay("sorgu", klinik_adi="Dahiliye")
+    finally:
+        olay_logger.removeHandler(handler)
+    assert not yol.exists()
+
+
+def test_servis_olaylari_analizle_geri_okunur(olay_dosyasi):
+    saat = SanalSaat(SIMDI, tohum=1)
+    mhrs = MhrsStub(saat=saat, tohum=1, baslangic_bos=0)
+    servis = TakipServisi(Bildirici(), http=StubHttp(mhrs), saat=saat)
+
+    async def ana():
+        t = takip(otomatik=True, token=jwt(saat.zaman() + 86400))
+        servis.takip_ekle(1, "a", t)
+        anahtar = api.sorgu_anahtari(t)
+        await servis.randevu_sorgula(anahtar)
+        mhrs.slot_ac(anahtar)
+        await servis.randevu_sorgula(anahtar)
+        olay("login", hesap="123********", basarili=True, sure_ms=40)
+
+    saat.calistir(ana())
+    # Arşivlenmiş ve yarım kalmış satırlar da okunur
+    arsiv = olay_dosyasi.with_name("olaylar.jsonl.2030-01-06.gz")
+    with open(olay_dosyasi, "rb") as f, gzip.open(arsiv, "wb") as g:
+        g.write(f.read())
+    with open(olay_dosyasi, "a", encoding="utf-8") as f:
+        f.write('{"tip": "sorgu", "klinik_a')
+
+    analiz = Analiz()
+    analiz.oku(str(arsiv))
+    analiz.oku(str(olay_dosyasi))
+    sonuc = analiz.sonuc()
+
+    assert sonuc["bozuk_satir"] == 1
+    assert (sonuc["login"]["adet"], sonuc["login"]["basarili"]) == (2, 2)
+    dahiliye = sonuc["klinikler"]["Dahiliye"]
+    assert (dahiliye["sorgu"], dahiliye["hata_orani"], dahiliye["isabet_orani"]) == (4, 0, 0.5)
+    assert (dahiliye["acilan_slot"], dahiliye["randevu_deneme"], dahiliye["randevu_alinan"]) == (2, 2, 2)
+    assert dahiliye["gecikme_ms"]["adet"] == 2
+    [hekim] = dahiliye["hekimler"].values()
+    assert hekim["randevu_alinan"] == 2
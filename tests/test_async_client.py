@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+
+from mhrs_core import api
+from mhrs_core.async_client import AsyncMhrsClient
+from mhrs_core.saat import SanalSaat
+from mhrs_core.scheduler import TokenBucket
+from mhrs_core.stub import MhrsStub, StubHttp
+from mhrs_core.takip import Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI, jwt, takip
+
+
+def _istemci(**kw) -> tuple[AsyncMhrsClient, list]:
+    """Sahte transport'lu istemci; gelen istekleri (zaman, yol) olarak kaydeder."""
+    gelen = []
+
+    def cevap(istek: httpx.Request) -> httpx.Response:
+        gelen.append((round(asyncio.get_running_loop().time(), 3), istek.url.path))
+        return httpx.Response(200, json={"success": True})
+
+    istemci = AsyncMhrsClient("http://mhrs.test", **kw)
+    istemci._http = httpx.AsyncClient(base_url=istemci.base_url, transport=httpx.MockTransport(cevap))
+    return istemci, gelen
+
+
+def test_butce_her_istekten_jeton_alir():
+    async def ana():
+        istemci, gelen = _istemci(butce=TokenBucket(rate=2, burst=1))
+        await istemci.post("slot", api.SLOT_PATH, {})
+        await istemci.post("login", api.LOGIN_PATH, {})
+        await istemci.post("randevu_ekle", api.RANDEVU_EKLE_PATH, {})
+        await istemci.get("ilce", "/ilce")
+        await istemci.aclose()
+        return gelen
+
+    assert [t for t, _ in SanalSaat().calistir(ana())] == [0, 0.5, 1.0, 1.5]
+
+
+def test_butcesiz_istemci_beklemez():
+    async def ana():
+        istemci, gelen = _istemci()
+        await asyncio.gather(*(istemci.post("slot", api.SLOT_PATH, {}) for _ in range(5)))
+        await istemci.aclose()
+        return gelen
+
+    assert [t for t, _ in SanalSaat().calistir(ana())] == [0] * 5
+
+
+def test_401_turunun_her_istegi_butceden_duser():
+    """Tek tur: slot (401) + login + slot tekrarı; bütçe iş başına değil istek başına harcanır."""
+    saat = SanalSaat(SIMDI, tohum=1)
+    mhrs = MhrsStub(saat=saat, tohum=1, baslangic_bos=0)
+
+    async def ana():
+        servis = TakipServisi(Bildirici(), http=StubHttp(mhrs, butce=TokenBucket(rate=1, burst=1)), saat=saat)
+        t = takip(tc="12345678901", sifre="s", token=jwt(saat.zaman() - 10))
+        servis.takip_ekle(1, "a", t)
+        bas = saat.gecen()
+        await servis.randevu_sorgula(api.sorgu_anahtari(t))
+        return saat.gecen() - bas
+
+    assert round(saat.calistir(ana()), 3) == 2.0
+    assert mhrs.stats()["istekler"] == {"slot": 2, "login": 1}
+
+
+def test_sihirbaz_istekleri_slot_sorgularinin_arkasinda_beklemez():
+    """Sorgu kulvarı doluyken ilçe listesi kendi kulvarından hemen gider."""
+    bitenler = []
+
+    async def cevap(istek: httpx.Request) -> httpx.Response:
+        if istek.url.path == api.SLOT_PATH:
+            await asyncio.sleep(25)
+        bitenler.append((round(asyncio.get_running_loop().time(), 3), istek.url.path))
+        return httpx.Response(200, json={"success": True})
+
+    async def ana():
+        istemci = AsyncMhrsClient("http://mhrs.test", lane_limits={"sorgu": 2})
+        istemci._http = httpx.AsyncClient(base_url=istemci.base_url, transport=httpx.MockTransport(cevap))
+        sorgular = [asyncio.create_task(istemci.post("slot", api.SLOT_PATH, {})) for _ in range(3)]
+        await asyncio.sleep(1)
+        assert istemci.pool_stats()["kulvarlar"]["sorgu"] == {"limit": 2, "aktif": 2, "bekleyen": 1}
+        await istemci.get("ilce", api.ilce_path(34))
+        await asyncio.gather(*sorgular)
+        await istemci.aclose()
+
+    SanalSaat().calistir(ana())
+    assert bitenler == [(1, api.ilce_path(34)), (25, api.SLOT_PATH), (25, api.SLOT_PATH), (50, api.SLOT_PATH)]
@@ -0,0 +1,19 @@
+from mhrs_core.bench import TOLERANS, karsilastir
+
+
+def _gerileyenler(sonuclar, taban):
+    return [ad for ad, *_, gerileme in karsilastir(sonuclar, {"olcumler": taban}, TOLERANS) if gerileme]
+
+
+def test_milisaniye_alti_gurultu_gerileme_sayilmaz():
+    # %20'den fazla ama mutlak fark eşiğin altında
+    assert _gerileyenler({"uctan_uca_bildirim_p90_ms": 1.2}, {"uctan_uca_bildirim_p90_ms": 0.95}) == []
+    assert _gerileyenler({"tur_bos_cevap_us": 70}, {"tur_bos_cevap_us": 40}) == []
+
+
+def test_esigi_gecen_kotulesme_gerileme_sayilir():
+    assert _gerileyenler({"uctan_uca_bildirim_p90_ms": 2.0}, {"uctan_uca_bildirim_p90_ms": 0.95}) == [
+        "uctan_uca_bildirim_p90_ms"]
+    assert _gerileyenler({"ayristirma_slot_sn": 700}, {"ayristirma_slot_sn": 1000}) == ["ayristirma_slot_sn"]
+    # İyi yöndeki değişim ne kadar büyük olursa olsun gerileme değildir
+    assert _gerileyenler({"ayristirma_slot_sn": 5000}, {"ayristirma_slot_sn": 1000}) == []
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import threading
+
+from mhrs_core import cache
+from mhrs_core.cache import RefCache, kaynak_yolu
+from mhrs_core.client import VARSAYILAN_BASE_URL
+from mhrs_core.saat import SanalSaat
+
+from tests.yardimci import SIMDI
+
+STUB = "http://127.0.0.1:8765"
+
+
+def _cache(tmp_path, saat=None, **kw):
+    kw.setdefault("path", str(tmp_path / "referans.json"))
+    return RefCache(ttl=100, max_age=1000, kaynak=VARSAYILAN_BASE_URL, saat=saat or SanalSaat(SIMDI), **kw)
+
+
+class _Getirici:
+    def __init__(self, *degerler):
+        self.degerler = list(degerler)
+        self.cagri = 0
+
+    def __call__(self):
+        self.cagri += 1
+        return self.degerler.pop(0)
+
+
+def _diskteki(c: RefCache) -> dict:
+    with open(c.path, encoding="utf-8") as f:
+        return {k.split("|", 1)[1]: v for k, (_, v) in json.load(f).items()}
+
+
+def test_ttl_dolana_kadar_mhrsye_gidilmez(tmp_path):
+    saat = SanalSaat(SIMDI)
+    c = _cache(tmp_path, saat)
+    getir = _Getirici([1])
+    assert c.get_or_fetch("ilce", getir) == [1]
+    saat.ilerlet(99)
+    assert c.get_or_fetch("ilce", getir) == [1]
+    assert getir.cagri == 1
+    assert c.stats() == {"hit": 1, "stale": 0, "miss": 1, "boyut": 1}
+
+
+def test_cok_eski_kayit_kullanilmaz(tmp_path):
+    saat = SanalSaat(SIMDI)
+    c = _cache(tmp_path, saat)
+    c.put("ilce", "eski")
+    saat.ilerlet(1000)
+    assert c.get_or_fetch("ilce", _Getirici("yeni")) == "yeni"
+    assert c.stats()["miss"] == 1
+
+
+def test_lru_en_az_kullanilani_atar(tmp_path):
+    c = _cache(tmp_path, max_entries=2)
+    c.put("a", 1)
+    c.put("b", 2)
+    c.get_or_fetch("a", _Getirici())     # a en son kullanılan olur
+    c.put("c", 3)
+    assert _diskteki(c) == {"a": 1, "c": 3}
+    # Diskten yüklenirken de sınır uygulanır, en yeniler kalır
+    kucuk = _cache(tmp_path, max_entries=1)
+    assert kucuk.get_or_fetch("c", _Getirici()) == 3
+    assert kucuk.stats()["boyut"] == 1
+
+
+def test_eskimis_kayit_hemen_doner_arka_planda_bir_kez_yenilenir(tmp_path):
+    saat = SanalSaat(SIMDI)
+    c = _cache(tmp_path, saat)
+    cagri = []
+
+    async def getir():
+        cagri.append(saat.gecen())
+        await asyncio.sleep(5)
+        return "yeni"
+
+    async def ana():
+        c.put("ilce", "eski")
+        saat.ilerlet(100)
+        assert await c.aget_or_fetch("ilce", getir) == "eski"
+        assert await c.aget_or_fetch("ilce", getir) == "eski"
+        # Yenileme görevinin dosya yazımı dahil bitmesini bekle
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+        assert await c.aget_or_fetch("ilce", getir) == "yeni"
+
+    saat.calistir(ana())
+    assert len(cagri) == 1
+    assert c.stats()["stale"] == 2
+    assert _diskteki(c) == {"ilce": "yeni"}
+
+
+def test_async_yazim_event_loop_disinda_yapilir(tmp_path, monkeypatch):
+    c = _cache(tmp_path)
+    yazan = []
+    kaydet = c._save
+
+    def _save(*args):
+        yazan.append(threading.current_thread())
+        kaydet(*args)
+    monkeypatch.setattr(c, "_save", _save)
+
+    async def getir():
+        return [1]
+
+    assert SanalSaat(SIMDI).calistir(c.aget_or_fetch("ilce", getir)) == [1]
+    assert yazan and threading.main_thread() not in yazan
+    assert _diskteki(c) == {"ilce": [1]}
+
+
+def test_gec_biten_eski_yazim_yenisini_ezmez(tmp_path):
+    c = _cache(tmp_path)
+    eski = c._ekle("ilce", "eski")
+    c._save(*c._ekle("ilce", "yeni"))
+    c._save(*eski)
+    assert _diskteki(c) == {"ilce": "yeni"}
+
+
+def test_kaynaklar_ayri_dosya_ve_anahtar_kullanir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_PATH", str(tmp_path / "referans.json"))
+    assert kaynak_yolu(VARSAYILAN_BASE_URL + "/") == str(tmp_path / "referans.json")
+    assert kaynak_yolu(STUB) == str(tmp_path / "referans-127_0_0_1_8765.json")
+
+    c = RefCache(kaynak=VARSAYILAN_BASE_URL, saat=SanalSaat(SIMDI))
+    c.put("ilce", "gercek")
+    c.kaynak_ayarla(STUB)
+    assert c.path == kaynak_yolu(STUB)
+    # Sahte sunucunun cevabı gerçeğin yerine dönmez
+    assert c.get_or_fetch("ilce", _Getirici("sahte")) == "sahte"
+    c.kaynak_ayarla(VARSAYILAN_BASE_URL)
+    assert c.get_or_fetch("ilce", _Getirici()) == "gercek"
+
+    # Dosya verilmişse kaynak değişse de aynı dosya kullanılır; anahtarlar yine ayrıdır
+    ortak = _cache(tmp_path)
+    ortak.put("ilce", "gercek")
+    ortak.kaynak_ayarla(STUB)
+    assert ortak.get_or_fetch("ilce", _Getirici("sahte")) == "sahte"
+    assert ortak.path == str(tmp_path / "referans.json")
+    assert ortak.stats()["boyut"] == 2
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+import pytest
+
+from mhrs_core import api
+from mhrs_core.client import MhrsClient
+from mhrs_core.stub import MhrsStub
+
+
+@pytest.fixture
+def stub_adresi():
+    """Ayrı bir thread'in loop'unda gerçek soketle dinleyen sahte MHRS."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    sunucu = asyncio.run_coroutine_threadsafe(MhrsStub(baslangic_bos=0).baslat(port=0), loop).result(5)
+    yield f"http://127.0.0.1:{sunucu.sockets[0].getsockname()[1]}"
+    loop.call_soon_threadsafe(sunucu.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_istekler_tek_keep_alive_baglantisini_paylasir(stub_adresi):
+    istemci = MhrsClient(stub_adresi)
+    res = istemci.post("login", api.LOGIN_PATH, api.login_payload("12345678901", "s"), headers=api.LOGIN_HEADERS)
+    token = api.jwt_from_login(res.json())
+    for _ in range(2):
+        assert istemci.get("ilce", api.ilce_path(34), headers=api.headers(token)).status_code == 200
+    istatistik = istemci.pool_stats()
+    istemci.close()
+
+    assert istatistik == {"istekler": {"login": 1, "ilce": 2}, "yeni_baglanti": 1, "yeniden_kullanim": 2, "bosta": 1}
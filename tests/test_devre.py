@@ -0,0 +1,121 @@
+import pytest
+
+from mhrs_core.devre import (
+    ACIK_TAVAN, ANAHTAR_ACIK_TABAN, ANAHTAR_ESIK, BASARI, DENEME_ZAMAN_ASIMI, GENEL_ESIK, OTURUM, RET, SUNUCU,
+    YARIM_ACIK_BEKLEME, DevreKesici, siniflandir,
+)
+from mhrs_core.saat import SanalSaat
+
+A = ("34", "3401", "165", "-1", "-1")
+B = ("34", "3402", "165", "-1", "-1")
+
+
+@pytest.mark.parametrize("kod, uyari, sinif", [
+    (200, None, BASARI),
+    (200, "RND4034", RET),
+    (401, "RND4034", OTURUM),
+    (400, None, RET),
+    (429, None, SUNUCU),
+    (503, None, SUNUCU),
+    (None, None, SUNUCU),
+])
+def test_siniflandir(kod, uyari, sinif):
+    assert siniflandir(kod, uyari) == sinif
+
+
+def _ac(kesici, anahtar=A):
+    for _ in range(ANAHTAR_ESIK):
+        kesici.kaydet(anahtar, SUNUCU)
+
+
+def test_anahtar_devresi_esikte_acilir_digerlerini_etkilemez():
+    kesici = DevreKesici(saat=SanalSaat())
+    for _ in range(ANAHTAR_ESIK - 1):
+        kesici.kaydet(A, SUNUCU)
+    assert kesici.izin(A) == 0
+    kesici.kaydet(A, SUNUCU)
+    assert kesici.durum(A) == "acik"
+    assert 0.8 * ANAHTAR_ACIK_TABAN <= kesici.izin(A) <= 1.2 * ANAHTAR_ACIK_TABAN
+    assert kesici.izin(B) == 0
+    assert kesici.engellenen == 1
+
+
+def test_basari_hata_serisini_sifirlar():
+    kesici = DevreKesici(saat=SanalSaat())
+    for _ in range(ANAHTAR_ESIK - 1):
+        kesici.kaydet(A, SUNUCU)
+    kesici.kaydet(A, BASARI)
+    assert A not in kesici.anahtarlar
+    kesici.kaydet(A, SUNUCU)
+    assert kesici.izin(A) == 0
+
+
+def test_genel_devre_tum_anahtarlardaki_hatalarla_acilir():
+    kesici = DevreKesici(saat=SanalSaat())
+    for i in range(GENEL_ESIK):
+        kesici.kaydet(("34", str(i), "165", "-1", "-1"), SUNUCU)
+    assert kesici.genel.durum == "acik"
+    assert kesici.izin(B) > 0
+    assert kesici.durum(B) == "acik"
+
+
+def test_yarim_acikta_tek_deneme_basariyla_kapanir():
+    saat = SanalSaat()
+    kesici = DevreKesici(saat=saat)
+    _ac(kesici)
+    saat.ilerlet(kesici.izin(A))
+    assert kesici.izin(A) == 0
+    assert kesici.durum(A) == "yarim_acik"
+    assert kesici.izin(A) == YARIM_ACIK_BEKLEME     # deneme sürerken ikinci sorgu geçmez
+    kesici.kaydet(A, BASARI)
+    assert kesici.durum(A) == "kapali"
+    assert kesici.izin(A) == 0
+
+
+def test_yarim_acikta_hata_daha_uzun_acar():
+    saat = SanalSaat()
+    kesici = DevreKesici(saat=saat)
+    _ac(kesici)
+    saat.ilerlet(kesici.izin(A))
+    kesici.izin(A)
+    kesici.kaydet(A, SUNUCU)
+    assert kesici.durum(A) == "acik"
+    assert kesici.anahtarlar[A].acilma == 2
+    assert 0.8 * 2 * ANAHTAR_ACIK_TABAN <= kesici.izin(A) <= 1.2 * 2 * ANAHTAR_ACIK_TABAN
+
+
+def test_acik_kalma_suresi_tavani_gecmez():
+    saat = SanalSaat()
+    kesici = DevreKesici(saat=saat)
+    _ac(kesici)
+    for _ in range(10):
+        saat.ilerlet(kesici.izin(A))
+        kesici.izin(A)
+        kesici.kaydet(A, SUNUCU)
+    assert kesici.izin(A) <= 1.2 * ACIK_TAVAN
+
+
+def test_sonucu_gelmeyen_deneme_zaman_asiminda_dusar():
+    saat = SanalSaat()
+    kesici = DevreKesici(saat=saat)
+    _ac(kesici)
+    saat.ilerlet(kesici.izin(A))
+    assert kesici.izin(A) == 0
+    saat.ilerlet(DENEME_ZAMAN_ASIMI + 1)
+    assert kesici.izin(A) == 0
+
+
+def test_oturum_hatasi_sayilmaz_deneme_hakkini_geri_verir():
+    saat = SanalSaat()
+    kesici = DevreKesici(saat=saat)
+    for _ in range(GENEL_ESIK):
+        kesici.kaydet(A, OTURUM)
+    assert kesici.durum(A) == "kapali"
+    assert kesici.genel.hata == 0
+
+    _ac(kesici)
+    saat.ilerlet(kesici.izin(A))
+    assert kesici.izin(A) == 0
+    kesici.kaydet(A, OTURUM)
+    assert kesici.durum(A) == "yarim_acik"
+    assert kesici.izin(A) == 0
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+
+from mhrs_core.filtre import filtre_aciklama, filtre_birlesimi, filtre_coz, filtre_derle
+from mhrs_core.slots import bos_slotlar
+
+from tests.yardimci import SIMDI, agac, kayit, slot
+
+PAZARTESI = SIMDI.replace(hour=0) + timedelta(days=7)
+CUMARTESI = PAZARTESI + timedelta(days=5)
+
+
+def test_filtre_coz():
+    assert filtre_coz("gün: hafta içi; saat: 09-12; hariç: Ahmet Yılmaz, Ayşe") == {
+        "gunler": [0, 1, 2, 3, 4], "saat": [9, 12], "haric_hekimler": ["Ahmet Yılmaz", "Ayşe"],
+    }
+    assert filtre_coz("gün: pzt-çar, cuma")["gunler"] == [0, 1, 2, 4]
+    assert filtre_coz("-") is None
+    assert filtre_coz("") is None
+
+
+@pytest.mark.parametrize("metin", ["gün: yarın", "saat: 12-09", "renk: mavi", "gün", "hariç: ,"])
+def test_filtre_coz_gecersiz(metin):
+    with pytest.raises(ValueError):
+        filtre_coz(metin)
+
+
+def test_filtre_aciklama():
+    assert filtre_aciklama(None) == "Filtre yok"
+    assert filtre_aciklama(filtre_coz("gün: hafta sonu; saat: 9-12")) == "Gün: Cmt,Paz | Saat: 09:00-12:00"
+
+
+def test_derleme_onbellekten_gelir():
+    assert filtre_derle(None) is None
+    assert filtre_derle({"saat": [9, 12]}) is filtre_derle({"saat": [9, 12]})
+
+
+def test_derlenmis_filtre():
+    f = filtre_derle(filtre_coz("gün: hafta içi; saat: 09-12; hariç: ayşe"))
+    assert f(slot(1, PAZARTESI.replace(hour=9)))
+    assert not f(slot(2, PAZARTESI.replace(hour=12)))              # bitiş hariç
+    assert not f(slot(3, CUMARTESI.replace(hour=10)))
+    assert not f(slot(4, PAZARTESI.replace(hour=10), hekim_adi="AYŞE KAYA"))
+
+
+def test_cozumlemede_uygulanir():
+    data = agac(
+        kayit(1, PAZARTESI.replace(hour=9)),
+        kayit(2, PAZARTESI.replace(hour=14)),
+        kayit(3, PAZARTESI.replace(hour=10), hekim_id=2, ad="Ayşe", soyad="Kaya"),
+        kayit(4, CUMARTESI.replace(hour=9)),
+    )
+    f = filtre_derle(filtre_coz("gün: hafta içi; saat: 09-12; hariç: Ayşe"))
+    assert [s.id for s in bos_slotlar(data, "Dahiliye", now=SIMDI, filtre=f)] == [1]
+
+
+def test_birlesim_her_abonenin_slotunu_gecirir():
+    sabah = filtre_derle({"saat": [8, 12]})
+    aksam = filtre_derle({"saat": [14, 17]})
+    ortak = filtre_birlesimi([sabah, aksam])
+    assert ortak(slot(1, PAZARTESI.replace(hour=9)))
+    assert ortak(slot(2, PAZARTESI.replace(hour=15)))
+    assert not ortak(slot(3, PAZARTESI.replace(hour=13)))
+
+
+def test_birlesim_filtresiz_abone_varsa_yok():
+    assert filtre_birlesimi([filtre_derle({"saat": [8, 12]}), None]) is None
+    assert filtre_birlesimi([]) is None
+    tek = filtre_derle({"gunler": [0]})
+    assert filtre_birlesimi([tek]) is tek
@@ -0,0 +1,184 @@
+import asyncio
+
+from mhrs_core.giden import (
+    BUDAMA_MIN, DUSUK, GONDERIM_DENEME_MAX, SOHBET_KUYRUK_MAX, YUKSEK, GidenKutusu,
+)
+from mhrs_core.saat import SanalSaat
+
+
+class _Flood(Exception):
+    def __init__(self, sure):
+        self.sure = sure
+
+
+class _Engellendi(Exception):
+    pass
+
+
+class _Gonderici:
+    """Gönderimleri (zaman, sohbet, metin) olarak kaydeder; `hatalar` sırayla fırlatılır."""
+
+    def __init__(self, *hatalar):
+        self.hatalar = list(hatalar)
+        self.giden = []
+        self.deneme = 0
+
+    async def __call__(self, chat_id, metin, **kwargs):
+        self.deneme += 1
+        if self.hatalar:
+            hata = self.hatalar.pop(0)
+            if hata is not None:
+                raise hata
+        self.giden.append((round(asyncio.get_running_loop().time(), 3), chat_id, metin))
+
+
+def _kutu(gonderici, **kw):
+    return GidenKutusu(
+        gonderici,
+        bekleme_suresi=lambda e: e.sure if isinstance(e, _Flood) else None,
+        kalici_mi=lambda e: isinstance(e, _Engellendi),
+        **kw,
+    )
+
+
+def _bosalt(kutu, ekle, sure=600):
+    """Kuyruğu doldurup dağıtıcıyı sanal zamanda sonuna kadar çalıştırır."""
+    async def ana():
+        ekle(kutu)
+        await kutu.start()
+        await kutu.stop(sure)
+    SanalSaat().calistir(ana())
+
+
+def test_oncelik_sirasi_ve_sohbet_araligi():
+    g = _Gonderici()
+
+    def ekle(k):
+        k.ekle(1, "normal")
+        k.ekle(1, "durum", oncelik=DUSUK)
+        k.ekle(1, "randevu", oncelik=YUKSEK)
+    _bosalt(_kutu(g), ekle)
+    assert g.giden == [(0, 1, "randevu"), (1, 1, "normal"), (2, 1, "durum")]
+
+
+def test_farkli_sohbetler_birbirini_beklemez():
+    g = _Gonderici()
+
+    def ekle(k):
+        k.ekle(1, "a")
+        k.ekle(2, "b")
+    _bosalt(_kutu(g), ekle)
+    assert g.giden == [(0, 1, "a"), (0, 2, "b")]
+
+
+def test_ayni_anahtarli_bekleyenin_yerine_yenisi_gecer():
+    g = _Gonderici()
+    kutu = _kutu(g)
+
+    def ekle(k):
+        k.ekle(1, "oturum düştü", anahtar="oturum")
+        k.ekle(1, "başka")
+        k.ekle(1, "oturum yenilendi", anahtar="oturum")
+    _bosalt(kutu, ekle)
+    assert [m for _, _, m in g.giden] == ["başka", "oturum yenilendi"]
+    assert kutu.sayilar["birlestirildi"] == 1
+
+
+def test_dusuk_oncelikliler_tek_mesajda_gider():
+    g = _Gonderici()
+    kutu = _kutu(g)
+
+    def ekle(k):
+        for metin in ("bir", "iki", "üç"):
+            k.ekle(1, metin, oncelik=DUSUK)
+    _bosalt(kutu, ekle)
+    assert g.giden == [(0, 1, "bir\niki\nüç")]
+    assert kutu.sayilar["birlestirildi"] == 2
+
+
+def test_flood_kontrolunde_mesaj_kaybolmaz_her_yer_bekler():
+    g = _Gonderici(_Flood(30))
+    kutu = _kutu(g)
+
+    async def ana():
+        await kutu.start()
+        kutu.ekle(1, "a")
+        await asyncio.sleep(1)
+        kutu.ekle(2, "b")
+        await kutu.stop(600)
+
+    SanalSaat().calistir(ana())
+    assert g.giden == [(30, 1, "a"), (30, 2, "b")]
+    assert kutu.sayilar["tekrar"] == 1
+
+
+def test_kalici_hatada_denenmeden_duser():
+    g = _Gonderici(_Engellendi())
+    kutu = _kutu(g)
+    _bosalt(kutu, lambda k: k.ekle(1, "a"))
+    assert g.giden == []
+    assert g.deneme == 1
+    assert kutu.sayilar["dusuruldu"] == 1
+
+
+def test_gecici_hata_sinirli_denenir():
+    g = _Gonderici(*[RuntimeError("ağ")] * GONDERIM_DENEME_MAX)
+    kutu = _kutu(g)
+    _bosalt(kutu, lambda k: k.ekle(1, "a"))
+    assert g.deneme == GONDERIM_DENEME_MAX
+    assert kutu.sayilar["tekrar"] == GONDERIM_DENEME_MAX - 1
+    assert kutu.sayilar["dusuruldu"] == 1
+    assert len(kutu) == 0
+
+
+def test_kuyruk_tasarsa_en_dusuk_oncelikli_en_eski_duser():
+    g = _Gonderici()
+    kutu = _kutu(g, sohbet_araligi=0)
+
+    def ekle(k):
+        k.ekle(1, "eski durum", oncelik=DUSUK)
+        k.ekle(1, "yeni durum", oncelik=DUSUK)
+        for i in range(SOHBET_KUYRUK_MAX - 1):
+            k.ekle(1, str(i))
+    _bosalt(kutu, ekle)
+    gidenler = [m for _, _, m in g.giden]
+    assert "eski durum" not in gidenler
+    assert gidenler[-1] == "yeni durum"
+    assert len(gidenler) == SOHBET_KUYRUK_MAX
+    assert kutu.sayilar["dusuruldu"] == 1
+
+
+def test_suresi_gecen_sohbet_beklemeleri_budanir():
+    g = _Gonderici()
+    kutu = _kutu(g, hiz=1000, burst=1000)
+    sohbet = 3 * BUDAMA_MIN
+
+    async def ana():
+        await kutu.start()
+        for i in range(sohbet):
+            kutu.ekle(i, "x")
+            if i % 500 == 0:
+                await asyncio.sleep(2)
+        await asyncio.sleep(5)
+        kutu.ekle(-1, "y")
+        await kutu.stop()
+
+    SanalSaat().calistir(ana())
+    assert kutu.sayilar["gonderildi"] == sohbet + 1
+    assert len(kutu._uygun) < BUDAMA_MIN
+
+
+def test_uyandirildigi_turda_durdurulabilir():
+    g = _Gonderici()
+    kutu = _kutu(g)
+
+    async def ana():
+        await kutu.start()
+        kutu.ekle(1, "a")
+        kutu.ekle(1, "b")
+        await asyncio.sleep(0.5)    # dağıtıcı sohbet aralığını bekliyor
+        kutu.ekle(2, "c")           # dağıtıcıyı uyandırır
+        await asyncio.wait_for(kutu.stop(0), timeout=5)
+
+    SanalSaat().calistir(ana())
+    assert kutu._gorev is None
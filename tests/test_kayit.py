@@ -0,0 +1,42 @@
+from mhrs_core.kayit import TakipKaydi
+
+from tests.yardimci import takip
+
+A, B = ("34", "3401"), ("34", "3402")
+
+
+def test_ayni_icerikli_takipler_ayri_numara_alir():
+    kayitlar = TakipKaydi()
+    t = takip()
+    ilk = kayitlar.ekle(1, "a", A, t)
+    ikinci = kayitlar.ekle(1, "a", A, dict(t))
+    assert ilk.no != ikinci.no
+    assert kayitlar.sil(ilk.no) == ilk
+    assert ilk.no not in kayitlar and ikinci.no in kayitlar
+    assert kayitlar.sil(ilk.no) is None
+
+
+def test_indeksler_eklenme_sirasini_korur_ve_bosalinca_silinir():
+    kayitlar = TakipKaydi()
+    k1 = kayitlar.ekle(1, "a", A, takip())
+    k2 = kayitlar.ekle(2, "b", A, takip())
+    k3 = kayitlar.ekle(1, "a", B, takip())
+    assert kayitlar.kullanici(1) == [k1, k3]
+    assert kayitlar.anahtar(A) == [k1, k2]
+
+    kayitlar.sil(k1.no)
+    assert kayitlar.kullanici(1) == [k3]
+    assert kayitlar.anahtar(A) == [k2]
+    kayitlar.sil(k3.no)
+    assert not kayitlar.kullanici_var_mi(1) and not kayitlar.anahtar_var_mi(B)
+    assert kayitlar.kullanici(1) == [] and kayitlar.anahtar(B) == []
+    assert list(kayitlar) == [k2] and len(kayitlar) == 1
+
+
+def test_gezerken_silmek_guvenlidir():
+    kayitlar = TakipKaydi()
+    for i in range(3):
+        kayitlar.ekle(i, str(i), A, takip())
+    for k in kayitlar:
+        kayitlar.sil(k.no)
+    assert len(kayitlar) == 0 and not kayitlar.anahtar_var_mi(A)
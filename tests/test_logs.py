@@ -0,0 +1,103 @@
+import gzip
+import logging
+import os
+import queue
+import time
+
+from mhrs_core.logs import LOG_MESAJ_MAX, TEKRAR_PENCERESI, _DonenDosyaHandler, _KuyrukHandler
+
+
+def _kayit(mesaj: str, seviye: int = logging.INFO, ad: str = "user_logger", zaman: float | None = None
+           ) -> logging.LogRecord:
+    record = logging.LogRecord(ad, seviye, __file__, 0, mesaj, None, None)
+    if zaman is not None:
+        record.created = zaman
+    return record
+
+
+def _kuyruktakiler(h: _KuyrukHandler) -> list:
+    mesajlar = []
+    while not h.queue.empty():
+        mesajlar.append(h.queue.get_nowait().getMessage())
+    return mesajlar
+
+
+def test_kuyruk_doluysa_kayit_beklemeden_duser():
+    h = _KuyrukHandler(queue.Queue(2))
+    for i in range(5):
+        h.emit(_kayit(str(i)))
+    assert _kuyruktakiler(h) == ["0", "1"]
+    assert h.dusurulen == 3
+
+
+def test_tekrarlayan_uyari_bastirilir_ve_sayisi_yazilir():
+    h = _KuyrukHandler(queue.Queue())
+    for i in range(3):
+        h.emit(_kayit("MHRS UYARI", logging.WARNING, zaman=1000 + i))
+    h.emit(_kayit("bilgi"))
+    h.emit(_kayit("bilgi"))     # INFO bastırılmaz
+    assert _kuyruktakiler(h) == ["MHRS UYARI", "bilgi", "bilgi"]
+    assert h.tekrar.bastirilan == 2
+
+    h.emit(_kayit("MHRS UYARI", logging.WARNING, zaman=1000 + TEKRAR_PENCERESI))
+    assert _kuyruktakiler(h) == [f"MHRS UYARI (önceki {TEKRAR_PENCERESI} sn'de 2 kez tekrarlandı)"]
+
+    # Kapanışta yazılmamış tekrarlar sayısıyla boşaltılır
+    h.emit(_kayit("MHRS UYARI", logging.WARNING, zaman=1001 + TEKRAR_PENCERESI))
+    h.bosalt()
+    assert _kuyruktakiler(h) == ["MHRS UYARI (1 kez tekrarlandı)"]
+
+
+def test_uzun_mesaj_kisaltilir_olay_satiri_kisaltilmaz():
+    h = _KuyrukHandler(queue.Queue())
+    uzun = "x" * (LOG_MESAJ_MAX + 500)
+    h.emit(_kayit(uzun, ad="http_logger"))
+    h.emit(_kayit(uzun, ad="olay_logger"))
+    kisa, olay = _kuyruktakiler(h)
+    assert kisa.startswith("x" * LOG_MESAJ_MAX) and kisa.endswith("(+500 karakter)")
+    assert olay == uzun
+
+
+def _arsivler(dizin) -> list:
+    return sorted(f for f in os.listdir(dizin) if f.endswith(".gz"))
+
+
+def test_boyut_asilinca_doner_gzipler_ve_eski_arsivleri_siler(tmp_path):
+    yol = str(tmp_path / "kullanici.log")
+    h = _DonenDosyaHandler(yol, max_bayt=100, saklama=2)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    satirlar = [f"satır {i:02d} " + "x" * 40 for i in range(12)]
+    for satir in satirlar:
+        h.emit(_kayit(satir))
+    h.close()
+
+    arsivler = _arsivler(tmp_path)
+    assert len(arsivler) == 2
+    gun = time.strftime("%Y-%m-%d")
+    assert all(a.startswith(f"kullanici.log.{gun}") for a in arsivler)
+    arsivlenen = []
+    for a in arsivler:
+        with gzip.open(tmp_path / a, "rt", encoding="utf-8") as f:
+            arsivlenen += f.read().splitlines()
+    with open(yol, encoding="utf-8") as f:
+        acik = f.read().splitlines()
+    # Eski arşivler silindi; kalanlar ve açık dosya son satırları tutar
+    assert len(arsivlenen) + len(acik) < len(satirlar)
+    assert acik[-1] == satirlar[-1]
+    assert set(arsivlenen + acik) <= set(satirlar)
+
+
+def test_gece_yarisi_doner(tmp_path):
+    yol = str(tmp_path / "http.log")
+    h = _DonenDosyaHandler(yol)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    h.emit(_kayit("dün"))
+    h.rolloverAt = time.time() - 1     # gün bitti
+    h.emit(_kayit("bugün"))
+    h.close()
+
+    [arsiv] = _arsivler(tmp_path)
+    with gzip.open(tmp_path / arsiv, "rt", encoding="utf-8") as f:
+        assert f.read() == "dün\n"
+    with open(yol, encoding="utf-8") as f:
+        assert f.read() == "bugün\n"
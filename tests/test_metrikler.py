@@ -0,0 +1,70 @@
+import asyncio
+
+from mhrs_core.metrikler import MetrikKaydi, metrik_sunucusu_baslat
+
+
+def test_prometheus_metin_formati():
+    kayit = MetrikKaydi()
+    istek = kayit.sayac("istek_toplam", "İstekler", ("uc_nokta", "durum"))
+    istek.artir("slot", 200)
+    istek.artir("slot", 200)
+    istek.artir("login", "hata")
+    kayit.gosterge("aktif", "Aktif takipler", oku=lambda: 3)
+    kayit.gosterge("kulvar", "Kulvar doluluğu", ("kulvar",), oku=lambda: {"sorgu": 2, 'a"b': 0})
+    sure = kayit.histogram("sure_saniye", "Süre", ("uc_nokta",), kovalar=(0.1, 1.0))
+    for deger in (0.05, 0.5, 5.0):
+        sure.gozlem(deger, "slot")
+
+    assert kayit.metin() == "\n".join([
+        "# HELP istek_toplam İstekler",
+        "# TYPE istek_toplam counter",
+        'istek_toplam{uc_nokta="login",durum="hata"} 1',
+        'istek_toplam{uc_nokta="slot",durum="200"} 2',
+        "# HELP aktif Aktif takipler",
+        "# TYPE aktif gauge",
+        "aktif 3",
+        "# HELP kulvar Kulvar doluluğu",
+        "# TYPE kulvar gauge",
+        'kulvar{kulvar="a\\"b"} 0',
+        'kulvar{kulvar="sorgu"} 2',
+        "# HELP sure_saniye Süre",
+        "# TYPE sure_saniye histogram",
+        'sure_saniye_bucket{uc_nokta="slot",le="0.1"} 1',
+        'sure_saniye_bucket{uc_nokta="slot",le="1.0"} 2',
+        'sure_saniye_bucket{uc_nokta="slot",le="+Inf"} 3',
+        'sure_saniye_sum{uc_nokta="slot"} 5.55',
+        'sure_saniye_count{uc_nokta="slot"} 3',
+    ]) + "\n"
+
+
+def test_okunamayan_gosterge_kazimayi_bozmaz():
+    kayit = MetrikKaydi()
+    kayit.gosterge("bozuk", "Patlar", oku=lambda: 1 / 0)
+    kayit.sayac("saglam", "Sağlam").artir()
+    assert kayit.metin().splitlines()[-1] == "saglam 1"
+
+
+async def _getir(port: int, yol: str) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {yol} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+    cevap = await reader.read()
+    writer.close()
+    return cevap
+
+
+def test_metrics_ucu_yalnizca_metrics_yolunu_sunar():
+    async def ana():
+        sunucu = await metrik_sunucusu_baslat(0)
+        port = sunucu.sockets[0].getsockname()[1]
+        try:
+            return await _getir(port, "/metrics?x=1"), await _getir(port, "/")
+        finally:
+            sunucu.close()
+            await sunucu.wait_closed()
+
+    metrik, bulunamadi = asyncio.run(ana())
+    basliklar, govde = metrik.split(b"\r\n\r\n", 1)
+    assert basliklar.startswith(b"HTTP/1.1 200 OK")
+    assert b"Content-Type: text/plain; version=0.0.4" in basliklar
+    assert b"# TYPE mhrs_http_istek_toplam counter" in govde
+    assert bulunamadi.startswith(b"HTTP/1.1 404")
@@ -0,0 +1,172 @@
+import asyncio
+
+from mhrs_core import api
+from mhrs_core.oturum import (
+    OTURUM_YENILEME_PAYI, RELOGIN_FAIL_BREAK, RELOGIN_MAX_RETRY, RELOGIN_WAIT_MAX, RELOGIN_WAIT_MIN,
+    OturumYoneticisi,
+)
+from mhrs_core.saat import SanalSaat
+from mhrs_core.scheduler import Scheduler
+from mhrs_core.stub import MhrsStub, StubHttp
+
+from tests.yardimci import SIMDI, jwt, takip
+
+TC = "12345678901"
+GUN = 86400
+LOGIN_SURESI = 1.0
+
+
+def _kur(tohum=1, **stub):
+    """Sanal saat, sahte MHRS ve login'i LOGIN_SURESI sn süren bir yönetici kurucusu."""
+    saat = SanalSaat(SIMDI, tohum=tohum)
+    mhrs = MhrsStub(saat=saat, tohum=tohum, baslangic_bos=0, **stub)
+    http = StubHttp(mhrs)
+
+    async def login(tc, sifre):
+        await asyncio.sleep(LOGIN_SURESI)
+        return await api.mhrs_login_get_token(http, tc, sifre)
+
+    def yonetici(zamanlayici, **kw):
+        return OturumYoneticisi(login, zamanlayici, saat=saat, **kw)
+    return saat, mhrs, yonetici
+
+
+def test_ayni_anda_401_alanlar_tek_login_paylasir():
+    saat, mhrs, yonetici = _kur()
+
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        oturumlar = yonetici(z)
+        # exp'i ileride ama MHRS'nin düşürdüğü token; proaktif yenileme devreye girmez
+        eski = jwt(saat.zaman() + GUN)
+        a, b = takip(tc=TC, sifre="s", token=eski), takip(ilce_id=3402, tc=TC, sifre="s", token=eski)
+        oturumlar.kaydet(1, 1, "a", a)
+        oturumlar.kaydet(2, 2, "b", b)
+
+        sonuclar = await asyncio.gather(*(oturumlar.yenile(t, eski) for t in (a, b, a)))
+        await z.stop()
+        return oturumlar, sonuclar, a, b
+
+    oturumlar, sonuclar, a, b = saat.calistir(ana())
+    yeni = sonuclar[0]
+    assert yeni and sonuclar == [yeni] * 3
+    assert (a["token"], b["token"]) == (yeni, yeni)
+    assert mhrs.stats()["istekler"] == {"login": 1}
+    assert (oturumlar.login_sayisi, oturumlar.ortak_bekleyen) == (1, 2)
+    assert not oturumlar.gecersiz_mi(a)
+
+
+def test_yenilenmis_eski_token_icin_login_yapilmaz():
+    saat, mhrs, yonetici = _kur()
+
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        oturumlar = yonetici(z)
+        # exp'i ileride ama MHRS'nin düşürdüğü token; proaktif yenileme devreye girmez
+        eski = jwt(saat.zaman() + GUN)
+        a = takip(tc=TC, sifre="s", token=eski)
+        oturumlar.kaydet(1, 1, "a", a)
+        yeni = await oturumlar.yenile(a, eski)
+
+        # Aynı eski tokenle geç gelen 401 yeni tokeni hemen alır
+        bas = saat.gecen()
+        assert await oturumlar.yenile(a, eski) == yeni
+        assert saat.gecen() == bas
+        await z.stop()
+        return oturumlar
+
+    oturumlar = saat.calistir(ana())
+    assert oturumlar.login_sayisi == 1
+    assert mhrs.stats()["istekler"] == {"login": 1}
+
+
+def test_basarisiz_login_sonrasi_beklenir_ve_mola_verilir():
+    saat, mhrs, yonetici = _kur()
+
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        oturumlar = yonetici(z)
+        a = takip(tc=TC[:3], sifre="yanlis", token=jwt(saat.zaman() + GUN))
+        oturumlar.kaydet(1, 1, "a", a)
+
+        assert await oturumlar.yenile(a, a["token"]) is None
+        bekleme = oturumlar.bekleme_kalan(a)
+        assert RELOGIN_WAIT_MIN <= bekleme <= RELOGIN_WAIT_MAX
+        # Bekleme sürerken yeni 401'ler login denemez
+        assert await oturumlar.yenile(a, a["token"]) is None
+        assert oturumlar.login_sayisi == 1
+
+        # Kalan denemeler zamanlayıcıdan yapılır, sonra uzun mola
+        await asyncio.sleep(RELOGIN_MAX_RETRY * (RELOGIN_WAIT_MAX + LOGIN_SURESI))
+        assert oturumlar.login_sayisi == RELOGIN_MAX_RETRY
+        [durum] = oturumlar.durum().values()
+        assert (durum["durum"], durum["deneme"]) == ("mola", 0)
+        assert RELOGIN_FAIL_BREAK - RELOGIN_MAX_RETRY * RELOGIN_WAIT_MAX < oturumlar.bekleme_kalan(a) <= RELOGIN_FAIL_BREAK
+        assert await oturumlar.yenile(a, a["token"]) is None
+
+        await asyncio.sleep(oturumlar.bekleme_kalan(a) + LOGIN_SURESI)
+        assert oturumlar.login_sayisi == RELOGIN_MAX_RETRY + 1
+        await z.stop()
+
+    saat.calistir(ana())
+    assert mhrs.stats()["istekler"] == {"login": RELOGIN_MAX_RETRY + 1}
+
+
+def test_token_suresi_dolmadan_yenilenir_ve_tum_takiplere_dagitilir():
+    saat, mhrs, yonetici = _kur(token_omru=2 * 3600)
+    guncellenen = []
+
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        oturumlar = yonetici(z, guncellendi=lambda t: guncellenen.append(t["ilce_id"]))
+        eski = jwt(saat.zaman() + 3600)
+        a, b = takip(tc=TC, sifre="s", token=eski), takip(ilce_id=3402, tc=TC, sifre="s", token=eski)
+        oturumlar.kaydet(1, 1, "a", a)
+        oturumlar.kaydet(2, 2, "b", b)
+        assert z.kalan(("oturum", TC)) == 3600 - OTURUM_YENILEME_PAYI
+
+        await asyncio.sleep(3600 - OTURUM_YENILEME_PAYI - 1)
+        assert oturumlar.login_sayisi == 0
+        await asyncio.sleep(2 + LOGIN_SURESI)
+        assert oturumlar.login_sayisi == 1
+        yeni = oturumlar.hesaplar[TC]["token"]
+        assert yeni != eski and (a["token"], b["token"]) == (yeni, yeni)
+        assert sorted(guncellenen) == [3401, 3402]
+        # Yeni tokenin exp'ine göre yeniden planlanır
+        exp = oturumlar.hesaplar[TC]["exp"]
+        assert exp > saat.zaman() + 3600
+        assert z.kalan(("oturum", TC)) == exp - saat.zaman() - OTURUM_YENILEME_PAYI
+        await z.stop()
+
+    saat.calistir(ana())
+    assert mhrs.stats()["istekler"] == {"login": 1}
+
+
+def test_hesabin_son_takibi_birakilinca_yenileme_iptal_edilir():
+    saat, mhrs, yonetici = _kur()
+
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        oturumlar = yonetici(z)
+        eski = jwt(saat.zaman() + 3600)
+        a, b = takip(tc=TC, sifre="s", token=eski), takip(ilce_id=3402, tc=TC, sifre="s", token=eski)
+        oturumlar.kaydet(1, 1, "a", a)
+        oturumlar.kaydet(2, 2, "b", b)
+
+        oturumlar.birak(1, a)
+        assert ("oturum", TC) in z
+        oturumlar.birak(2, b)
+        assert ("oturum", TC) not in z
+        assert oturumlar.hesaplar == {}
+
+        await asyncio.sleep(2 * 3600)
+        await z.stop()
+        return oturumlar
+
+    assert saat.calistir(ana()).login_sayisi == 0
+    assert mhrs.stats()["istekler"] == {}
@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+from mhrs_core import takip as takip_modulu
+from mhrs_core.profil import Profilci
+from mhrs_core.saat import SanalSaat
+from mhrs_core.stub import MhrsStub, StubHttp
+from mhrs_core.takip import Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI
+
+
+def _servis(saat):
+    return TakipServisi(Bildirici(), http=StubHttp(MhrsStub(saat=saat, baslangic_bos=0)), saat=saat)
+
+
+def test_kapaliyken_hicbir_sey_sarmalanmaz(monkeypatch):
+    monkeypatch.setattr(takip_modulu, "profil", Profilci())
+    servis = _servis(SanalSaat(SIMDI))
+    assert servis.randevu_sorgula.__func__ is TakipServisi.randevu_sorgula
+    assert servis.randevu_al.__func__ is TakipServisi.randevu_al
+
+
+def test_acikken_sureler_olculur_ornekler_dokulur(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    profilci = Profilci()
+    profilci.ac(ornekleme=2, aralik=0)
+    monkeypatch.setattr(takip_modulu, "profil", profilci)
+    servis = _servis(SanalSaat(SIMDI))
+
+    async def ornek_isi():
+        await asyncio.sleep(1)
+        return "bitti"
+    sarili = profilci.sarmala("ornek", ornek_isi)
+
+    async def ana():
+        for _ in range(4):
+            assert await sarili() == "bitti"
+        await servis.randevu_sorgula(("34", "3401", "165", "-1", "-1"))
+
+    SanalSaat(SIMDI).calistir(ana())
+    toplamlar = profilci._sure.toplamlar()
+    assert toplamlar[("ornek",)][1] == 4
+    assert toplamlar[("randevu_sorgula",)][1] == 1
+
+    ozet_yolu = profilci.dok("test")
+    assert os.path.exists(ozet_yolu.removesuffix(".txt") + ".pstats")
+    with open(ozet_yolu, encoding="utf-8") as f:
+        ozet = f.read()
+    assert "Sebep: test | örnekleme: 1/2" in ozet
+    assert "ornek            adet=4" in ozet
+    assert "ornek_isi" in ozet     # örneklenen çağrı cProfile'a girdi
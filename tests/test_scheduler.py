@@ -0,0 +1,166 @@
+import asyncio
+
+from mhrs_core.saat import SanalSaat
+from mhrs_core.scheduler import ERROR_DELAY, Scheduler, TokenBucket
+
+
+def _calistir(coro):
+    return SanalSaat().calistir(coro)
+
+
+def test_token_bucket_burst_sonra_hiz():
+    async def ana():
+        loop = asyncio.get_running_loop()
+        kova = TokenBucket(rate=2, burst=3)
+        zamanlar = []
+        for _ in range(6):
+            await kova.acquire()
+            zamanlar.append(round(loop.time(), 3))
+        return zamanlar
+
+    assert _calistir(ana()) == [0, 0, 0, 0.5, 1.0, 1.5]
+
+
+def test_token_bucket_burstten_fazla_birikmez():
+    async def ana():
+        loop = asyncio.get_running_loop()
+        kova = TokenBucket(rate=1, burst=2)
+        await kova.acquire()
+        await asyncio.sleep(60)
+        bas = loop.time()
+        for _ in range(3):
+            await kova.acquire()
+        return round(loop.time() - bas, 3)
+
+    assert _calistir(ana()) == 1.0
+
+
+def _kaydeden(kayit, ad, gecikmeler=()):
+    """Çalıştığı anı kaydeder; sıradaki gecikmeyi döner, bitince None."""
+    kalan = list(gecikmeler)
+
+    async def is_():
+        kayit.append((ad, round(asyncio.get_running_loop().time(), 3)))
+        return kalan.pop(0) if kalan else None
+    return is_
+
+
+def test_isler_zamanina_gore_calisir():
+    async def ana():
+        z = Scheduler(workers=2)
+        await z.start()
+        kayit = []
+        z.schedule("c", _kaydeden(kayit, "c"), delay=3)
+        z.schedule("a", _kaydeden(kayit, "a"), delay=1)
+        z.schedule("b", _kaydeden(kayit, "b"), delay=2)
+        await z.join()
+        await z.stop()
+        return kayit
+
+    assert _calistir(ana()) == [("a", 1), ("b", 2), ("c", 3)]
+
+
+def test_donen_gecikmeyle_tekrarlanir():
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        kayit = []
+        z.schedule("a", _kaydeden(kayit, "a", [10, 5]))
+        await z.join()
+        await z.stop()
+        return kayit, len(z)
+
+    assert _calistir(ana()) == ([("a", 0), ("a", 10), ("a", 15)], 0)
+
+
+def test_yeniden_planlama_eski_zamani_gecersiz_kilar():
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        kayit = []
+        z.schedule("a", _kaydeden(kayit, "eski"), delay=10)
+        z.schedule("a", _kaydeden(kayit, "yeni"), delay=1)
+        await asyncio.sleep(20)
+        await z.stop()
+        return kayit
+
+    assert _calistir(ana()) == [("yeni", 1)]
+
+
+def test_iptal_edilen_is_calismaz():
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        kayit = []
+        z.schedule("a", _kaydeden(kayit, "a"), delay=5)
+        assert "a" in z
+        z.cancel("a")
+        await z.join()
+        await asyncio.sleep(10)
+        await z.stop()
+        return kayit
+
+    assert _calistir(ana()) == []
+
+
+def test_hata_veren_is_ertelenir():
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        zamanlar = []
+
+        async def is_():
+            zamanlar.append(asyncio.get_running_loop().time())
+            if len(zamanlar) == 1:
+                raise RuntimeError("patladı")
+        z.schedule("a", is_)
+        await z.join()
+        await z.stop()
+        return zamanlar
+
+    assert _calistir(ana()) == [0, ERROR_DELAY]
+
+
+def test_calisan_is_iki_kez_dagitilmaz():
+    async def ana():
+        z = Scheduler(workers=4)
+        await z.start()
+        cagri = {"a": 0, "b": 0}
+        ayni_anda = {"a": 0, "b": 0}
+        en_cok = {"a": 0, "b": 0}
+
+        def is_(ad):
+            async def f():
+                cagri[ad] += 1
+                ayni_anda[ad] += 1
+                en_cok[ad] = max(en_cok[ad], ayni_anda[ad])
+                await asyncio.sleep(3)
+                ayni_anda[ad] -= 1
+                return 100
+            return f
+
+        z.schedule("a", is_("a"))
+        z.schedule("b", is_("b"), delay=0.1)
+        await asyncio.sleep(0.2)
+        z.schedule("a", is_("a"))       # çalışırken yeniden planlanır
+        z.schedule("b", is_("b"), delay=1)
+        await asyncio.sleep(6)
+        await z.stop()
+        return cagri, en_cok
+
+    assert _calistir(ana()) == ({"a": 1, "b": 1}, {"a": 1, "b": 1})
+
+
+def test_uyandirildigi_turda_durdurulabilir():
+    async def ana():
+        z = Scheduler()
+        await z.start()
+        kayit = []
+        z.schedule("a", _kaydeden(kayit, "a"), delay=100)
+        await asyncio.sleep(1)
+        z.schedule("b", _kaydeden(kayit, "b"), delay=5)  # dağıtıcıyı uyandırır
+        await asyncio.wait_for(z.stop(), timeout=1)
+        await asyncio.sleep(200)
+        return kayit
+
+    assert _calistir(ana()) == []
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+
+from mhrs_core import api
+from mhrs_core.saat import SanalSaat
+from mhrs_core.secim import en_iyi_slotlar, siralama_olustur
+from mhrs_core.stub import StubCevap
+from mhrs_core.takip import RANDEVU_MAX_DENEME, Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI, agac, jwt, kayit, slot, takip
+
+GUN = SIMDI.replace(hour=0) + timedelta(days=1)
+
+
+def _idler(slotlar, siralama):
+    return [s.id for s in en_iyi_slotlar(slotlar, siralama)]
+
+
+def test_en_erken():
+    slotlar = [slot(1, GUN.replace(hour=11)), slot(2, GUN.replace(hour=9)), slot(3, GUN.replace(hour=10))]
+    assert _idler(slotlar, None) == [2, 3, 1]
+    assert _idler(slotlar, {"tip": "erken"}) == [2, 3, 1]
+
+
+def test_esitlikte_cevap_sirasi_korunur():
+    slotlar = [slot(i, GUN.replace(hour=9)) for i in (5, 3, 4)]
+    assert _idler(slotlar, None) == [5, 3, 4]
+
+
+def test_tercih_edilen_hekim_once():
+    slotlar = [
+        slot(1, GUN.replace(hour=9), hekim_adi="Ahmet Yılmaz"),
+        slot(2, GUN.replace(hour=11), hekim_adi="İLKER Demir"),
+        slot(3, GUN.replace(hour=10), hekim_adi="ilker Şahin"),
+    ]
+    assert _idler(slotlar, siralama_olustur("2", "ılker")) == [3, 2, 1]
+
+
+def test_tercih_edilen_kurum_once():
+    slotlar = [
+        slot(1, GUN.replace(hour=9), kurum_adi="Devlet Hastanesi"),
+        slot(2, GUN.replace(hour=10), kurum_adi="Eğitim ve Araştırma Hastanesi"),
+    ]
+    assert _idler(slotlar, siralama_olustur("3", "eğitim")) == [2, 1]
+
+
+def test_saat_araligina_uzakliga_gore():
+    slotlar = [
+        slot(1, GUN.replace(hour=8)),
+        slot(2, GUN.replace(hour=16)),
+        slot(3, GUN.replace(hour=14, minute=30)),
+        slot(4, GUN.replace(hour=13)),
+        slot(5, (GUN + timedelta(days=1)).replace(hour=13, minute=45)),
+    ]
+    # [13, 15): aralıktakiler tarihe göre, sonra aralığa en yakın olan
+    assert _idler(slotlar, siralama_olustur("4", "13-15")) == [4, 3, 5, 2, 1]
+
+
+def test_tembel_uretir():
+    sirali = en_iyi_slotlar([slot(1, GUN.replace(hour=10)), slot(2, GUN.replace(hour=9))], None)
+    assert next(sirali).id == 2
+    assert next(sirali).id == 1
+    with pytest.raises(StopIteration):
+        next(sirali)
+
+
+@pytest.mark.parametrize("tip, deger", [("9", ""), ("2", " "), ("4", "15-13")])
+def test_siralama_olustur_gecersiz(tip, deger):
+    with pytest.raises(ValueError):
+        siralama_olustur(tip, deger)
+
+
+class _DoluHttp:
+    """Slot sorgusuna sabit ağacı döner; her randevu denemesi "slot dolu" ile başarısız olur."""
+
+    def __init__(self, data):
+        self.data = data
+        self.denenen = []
+
+    async def post(self, endpoint, path, payload, headers=None):
+        if endpoint == "slot":
+            return StubCevap(200, {"success": True, "data": self.data, "warnings": [], "errors": []})
+        self.denenen.append(payload["fkSlotId"])
+        return StubCevap(200, {"success": False, "errors": [{"kodu": "SLOT_DOLU", "mesaj": "dolu"}]})
+
+
+def test_alinamayan_turda_denenmeyen_adaylar_da_unutulur():
+    adaylar = [kayit(i, GUN.replace(hour=8 + i)) for i in range(1, 6)]
+    http = _DoluHttp(agac(*adaylar))
+    saat = SanalSaat(SIMDI)
+
+    async def ana():
+        servis = TakipServisi(Bildirici(), http=http, saat=saat)
+        t = takip(otomatik=True, token=jwt(saat.zaman() + 3600))
+        servis.takip_ekle(1, "kullanici", t)
+        anahtar = api.sorgu_anahtari(t)
+
+        assert await servis.randevu_sorgula(anahtar) == []
+        assert http.denenen == [1, 2, 3][:RANDEVU_MAX_DENEME]
+
+        # İlk üç aday başkasınca alındı; kalanlar hâlâ boş ve yeniden ele alınmalı
+        http.data = agac(*adaylar[3:])
+        http.denenen.clear()
+        await servis.randevu_sorgula(anahtar)
+        assert http.denenen == [4, 5]
+
+    saat.calistir(ana())
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from mhrs_core.saat import SanalSaat
+from mhrs_core.simulasyon import simule_et
+from mhrs_core.takip import WAIT_MAX, WAIT_MIN
+
+from tests.yardimci import SIMDI
+
+HAFTA = 7 * 86400
+
+
+def test_sanal_saat_beklemeleri_aninda_gecirir():
+    saat = SanalSaat(SIMDI, tohum=1)
+
+    async def ana():
+        bas = time.perf_counter()
+        await asyncio.gather(asyncio.sleep(HAFTA), asyncio.sleep(60))
+        return time.perf_counter() - bas
+
+    assert saat.calistir(ana()) < 1
+    assert saat.gecen() == HAFTA
+    assert saat.simdi() == SIMDI.replace(day=14)
+
+
+def _ozet(**kw) -> dict:
+    sonuc = simule_et(takip=60, anahtar=12, hesap=20, gun=0.25, **kw)
+    # Gerçek süreye bağlı alanlar ve parametreler (tohum dahil) hariç
+    return {k: v for k, v in sonuc.items() if k not in ("gercek_sure_sn", "hiz", "parametreler")}
+
+
+def test_ayni_tohum_ayni_sonucu_verir():
+    ilk = _ozet(tohum=3)
+    assert ilk == _ozet(tohum=3)
+    assert ilk != _ozet(tohum=4)
+
+    assert ilk["sanal_sure_sn"] == 0.25 * 86400
+    assert ilk["istekler"]["slot"] > 0
+    assert WAIT_MIN <= ilk["tur_araligi_sn"]["p50"] <= WAIT_MAX
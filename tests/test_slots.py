@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from mhrs_core.slots import SlotSnapshot, bos_slotlar
+
+from tests.yardimci import SIMDI, agac, kayit, slot
+
+GUN = SIMDI.replace(hour=0) + timedelta(days=1)
+
+
+def test_bos_slotlar_dolu_ve_gecmisi_atlar():
+    data = agac(
+        kayit(1, GUN.replace(hour=9)),
+        kayit(2, GUN.replace(hour=10), bos=False),
+        kayit(3, SIMDI - timedelta(hours=1)),
+        kayit(4, GUN.replace(hour=11), hekim_id=2, ad="Ayşe", soyad="Kaya"),
+    )
+    slotlar = list(bos_slotlar(data, "Dahiliye", now=SIMDI))
+    assert [s.id for s in slotlar] == [1, 4]
+    assert slotlar[1].hekim_adi == "Ayşe Kaya"
+    assert slotlar[0].kurum_adi == "Devlet Hastanesi"
+    assert slotlar[0].baslangic_zamani == "2030-01-08 09:00:00"
+
+
+def test_bos_slotlar_bos_cevap():
+    assert list(bos_slotlar([], "Dahiliye", now=SIMDI)) == []
+
+
+def test_snapshot_ilk_cevapta_hepsi_acilir():
+    snapshot = SlotSnapshot()
+    a, b = slot(1, GUN.replace(hour=9)), slot(2, GUN.replace(hour=10))
+    acilan, kapanan = snapshot.guncelle([a, b])
+    assert acilan == [a, b]
+    assert kapanan == []
+    assert len(snapshot) == 2
+
+
+def test_snapshot_yalnizca_degisimi_verir():
+    snapshot = SlotSnapshot()
+    a, b, c = slot(1, GUN.replace(hour=9)), slot(2, GUN.replace(hour=10)), slot(3, GUN.replace(hour=11))
+    snapshot.guncelle([a, b])
+    acilan, kapanan = snapshot.guncelle([b, c])
+    assert acilan == [c]
+    assert kapanan == [1]
+    assert 1 not in snapshot and 3 in snapshot
+
+
+def test_snapshot_degisim_yoksa_bos():
+    snapshot = SlotSnapshot()
+    a = slot(1, GUN.replace(hour=9))
+    snapshot.guncelle([a])
+    assert snapshot.guncelle([a]) == ([], [])
+
+
+def test_snapshot_unut_slotu_yeniden_acar():
+    snapshot = SlotSnapshot()
+    a, b = slot(1, GUN.replace(hour=9)), slot(2, GUN.replace(hour=10))
+    snapshot.guncelle([a, b])
+    snapshot.unut(1)
+    snapshot.unut(99)   # olmayan slot sessizce geçilir
+    acilan, kapanan = snapshot.guncelle([a, b])
+    assert acilan == [a]
+    assert kapanan == []
@@ -0,0 +1,167 @@
+import base64
+import os
+import sqlite3
+import stat
+
+import pytest
+
+from mhrs_core import api
+from mhrs_core.saat import SanalSaat
+from mhrs_core.store import TakipStore
+from mhrs_core.stub import MhrsStub, StubHttp
+from mhrs_core.takip import Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI, jwt, takip
+
+
+class _Sifreleyici:
+    """Fernet yerine geçen tersinir dönüşüm; düz metni veritabanından gizler."""
+
+    def __init__(self, anahtar: bytes = b"k"):
+        self.anahtar = anahtar
+
+    def encrypt(self, veri: bytes) -> bytes:
+        return base64.b64encode(self.anahtar + veri[::-1])
+
+    def decrypt(self, veri: bytes) -> bytes:
+        ham = base64.b64decode(veri)
+        if not ham.startswith(self.anahtar):
+            raise ValueError("yanlış anahtar")
+        return ham[len(self.anahtar):][::-1]
+
+
+class _Kaydeden(Bildirici):
+    def __init__(self):
+        self.olaylar = []
+
+    async def geri_yuklenemedi(self, user_id):
+        self.olaylar.append(("geri_yuklenemedi", user_id))
+
+
+def _ham_veri(path) -> str:
+    with sqlite3.connect(path) as db:
+        return "\n".join(v for (v,) in db.execute("SELECT veri FROM takipler"))
+
+
+@pytest.fixture
+def db_yolu(tmp_path):
+    return str(tmp_path / "data" / "takipler.db")
+
+
+def test_dosyalar_yalnizca_sahibine_acik(db_yolu):
+    store = TakipStore(db_yolu)
+    store.ekle(1, "a", ("34",), takip())
+    for yol in (db_yolu, db_yolu + "-wal", db_yolu + "-shm"):
+        assert stat.S_IMODE(os.stat(yol).st_mode) == 0o600
+    store.close()
+
+
+def test_sifreleyici_yoksa_giris_bilgileri_yazilmaz(db_yolu):
+    store = TakipStore(db_yolu)
+    t = takip(tc="12345678901", sifre="gizli-sifre", token="gizli-token")
+    takip_id = store.ekle(1, "a", api.sorgu_anahtari(t), t)
+    store.close()
+
+    ham = _ham_veri(db_yolu)
+    for deger in ("12345678901", "gizli-sifre", "gizli-token"):
+        assert deger not in ham
+    [(okunan_id, uid, uname, okunan)] = TakipStore(db_yolu).hepsi()
+    assert (okunan_id, uid, uname) == (takip_id, 1, "a")
+    assert "sifre" not in okunan and "token" not in okunan and "tc" not in okunan
+    assert okunan["klinik_adi"] == "Dahiliye"
+
+
+def test_giris_bilgileri_sifreli_gidip_gelir(db_yolu):
+    store = TakipStore(db_yolu, sifreleyici=_Sifreleyici())
+    t = takip(tc="12345678901", sifre="gizli-sifre", token="eski-token")
+    takip_id = store.ekle(1, "a", api.sorgu_anahtari(t), t)
+    store.guncelle(takip_id, {**t, "token": "yeni-token"})
+    store.close()
+
+    ham = _ham_veri(db_yolu)
+    for deger in ("12345678901", "gizli-sifre", "yeni-token"):
+        assert deger not in ham
+    [(_, _, _, okunan)] = TakipStore(db_yolu, sifreleyici=_Sifreleyici()).hepsi()
+    assert (okunan["tc"], okunan["sifre"], okunan["token"]) == ("12345678901", "gizli-sifre", "yeni-token")
+    assert okunan["id"] == takip_id
+
+    # Anahtar değişmişse bilgiler yok sayılır
+    [(_, _, _, okunan)] = TakipStore(db_yolu, sifreleyici=_Sifreleyici(b"baska")).hepsi()
+    assert "sifre" not in okunan
+
+
+def test_indeksli_sorgular_ve_silme(db_yolu):
+    store = TakipStore(db_yolu)
+    a, b = takip(), takip(ilce_id=3402)
+    store.ekle(1, "a", api.sorgu_anahtari(a), a)
+    ikinci = store.ekle(1, "a", api.sorgu_anahtari(b), b)
+    store.ekle(2, "b", api.sorgu_anahtari(a), a)
+
+    assert [uid for _, uid, _, _ in store.anahtar_takipleri(api.sorgu_anahtari(a))] == [1, 2]
+    assert len(list(store.kullanici_takipleri(1))) == 2
+    store.sil(ikinci)
+    assert len(list(store.kullanici_takipleri(1))) == 1
+    store.kullanici_sil(1)
+    assert [uid for _, uid, _, _ in store.hepsi()] == [2]
+    store.close()
+
+
+def test_hepsi_sayfa_sayfa_okur(db_yolu):
+    store = TakipStore(db_yolu)
+    for i in range(7):
+        store.ekle(i, str(i), ("34",), takip())
+    okunan = []
+    for takip_id, uid, _, _ in store.hepsi(parti=3):
+        okunan.append(uid)
+        store.sil(takip_id)     # okurken silmek sayfalamayı bozmaz
+    assert okunan == list(range(7))
+    assert list(store.hepsi()) == []
+    store.close()
+
+
+def test_yeniden_baslatmada_takipler_devam_eder(db_yolu):
+    saat = SanalSaat(SIMDI, tohum=1)
+    http = StubHttp(MhrsStub(saat=saat, tohum=1, baslangic_bos=0))
+    token = jwt(saat.zaman() + 86400)
+
+    async def ana():
+        ilk = TakipServisi(Bildirici(), store=TakipStore(db_yolu, sifreleyici=_Sifreleyici()), http=http, saat=saat)
+        a, b = takip(token=token), takip(ilce_id=3402, tc="12345678901", sifre="s", token=token)
+        ilk.takip_ekle(1, "a", a)
+        ilk.takip_ekle(2, "b", b)
+        ilk.store.close()
+
+        bildirici = _Kaydeden()
+        servis = TakipServisi(bildirici, store=TakipStore(db_yolu, sifreleyici=_Sifreleyici()), http=http, saat=saat)
+        assert await servis.geri_yukle() == 2
+        assert bildirici.olaylar == []
+        assert [(k.user_id, k.takip["token"]) for k in servis.takipler] == [(1, token), (2, token)]
+        for t in (a, b):
+            assert api.sorgu_anahtari(t) in servis.zamanlayici
+        assert list(servis.oturumlar.hesaplar) == ["12345678901"]
+        # Yüklenen takipler store'da kalır; ikinci bir yeniden başlatmada yine gelir
+        assert len(list(servis.store.hepsi())) == 2
+        servis.store.close()
+
+    saat.calistir(ana())
+
+
+def test_giris_bilgisi_saklanmayan_takip_bildirilip_silinir(db_yolu):
+    saat = SanalSaat(SIMDI, tohum=1)
+    http = StubHttp(MhrsStub(saat=saat, tohum=1, baslangic_bos=0))
+
+    async def ana():
+        ilk = TakipServisi(Bildirici(), store=TakipStore(db_yolu), http=http, saat=saat)
+        ilk.takip_ekle(1, "a", takip(token=jwt(saat.zaman() + 86400)))
+        ilk.takip_ekle(1, "a", takip(ilce_id=3402, token=jwt(saat.zaman() + 86400)))
+        ilk.store.close()
+
+        bildirici = _Kaydeden()
+        servis = TakipServisi(bildirici, store=TakipStore(db_yolu), http=http, saat=saat)
+        assert await servis.geri_yukle() == 0
+        assert bildirici.olaylar == [("geri_yuklenemedi", 1)]
+        assert len(servis.takipler) == 0
+        assert list(servis.store.hepsi()) == []
+        servis.store.close()
+
+    saat.calistir(ana())
@@ -0,0 +1,78 @@
+import json
+
+from mhrs_core import api
+from mhrs_core.saat import SanalSaat
+from mhrs_core.slots import bos_slotlar
+from mhrs_core.stub import MhrsStub, StubHttp
+
+from tests.yardimci import SIMDI, takip
+
+
+def _bos(cevap) -> list:
+    return list(bos_slotlar(cevap.json()["data"], "Dahiliye", now=SIMDI))
+
+
+async def _giris(http: StubHttp) -> str:
+    return await api.mhrs_login_get_token(http, "12345678901", "s")
+
+
+def test_rota_tablosu_uc_noktalari_ayirir():
+    saat = SanalSaat(SIMDI, tohum=1)
+    mhrs = MhrsStub(saat=saat, tohum=1)
+    http = StubHttp(mhrs)
+
+    async def ana():
+        token = await _giris(http)
+        h = api.headers(token)
+        cevaplar = {
+            "hasta_bilgisi": await http.get("hasta_bilgisi", api.HASTA_BILGISI_PATH, h),
+            "ilce": await http.get("ilce", api.ilce_path(34) + "?x=1", h),
+            "klinik": await http.get("klinik", api.klinik_path(34, 3401), h),
+            "kurum": await http.get("kurum", api.kurum_path(34, 3401, 165), h),
+            "hekim": await http.get("hekim", api.hekim_path(10, 165), h),
+            "slot": await http.post("slot", api.SLOT_PATH, api.slot_payload(takip(), SIMDI, 15), h),
+        }
+        # Yanlış metot ya da bilinmeyen yol 404; token'sız istek 401
+        yanlis = [
+            await http.post("ilce", api.ilce_path(34), {}, h),
+            await http.get("x", "/api/yok", h),
+        ]
+        tokensiz = await http.get("ilce", api.ilce_path(34))
+        durum = await http.get("durum", "/stub/durum")
+        return cevaplar, yanlis, tokensiz, durum
+
+    cevaplar, yanlis, tokensiz, durum = saat.calistir(ana())
+    assert {ad: c.status_code for ad, c in cevaplar.items()} == dict.fromkeys(cevaplar, 200)
+    assert cevaplar["klinik"].json()["data"] and cevaplar["hekim"].json()["data"]
+    assert len(_bos(cevaplar["slot"])) == 2
+    assert [c.status_code for c in yanlis] == [404, 404]
+    assert tokensiz.status_code == 401
+    assert durum.status_code == 200
+    # 404 dönenler sayılmaz; 401 alan ilçe isteği sayılır
+    assert durum.json()["istekler"] == {
+        "login": 1, "hasta_bilgisi": 1, "ilce": 2, "klinik": 1, "kurum": 1, "hekim": 1, "slot": 1, "durum": 1,
+    }
+
+
+def test_kayitli_fiksturler_sunulur_ve_alinan_slot_dolu_doner(tmp_path):
+    saat = SanalSaat(SIMDI, tohum=1)
+    MhrsStub(saat=saat, tohum=1).fiksturleri_yaz(str(tmp_path))
+    with open(tmp_path / "ilce.json", encoding="utf-8") as f:
+        kayitli_ilce = json.load(f)
+    http = StubHttp(MhrsStub(fikstur=str(tmp_path), saat=saat, tohum=2))
+
+    async def ana():
+        h = api.headers(await _giris(http))
+        ilce = (await http.get("ilce", api.ilce_path(6), h)).json()
+        slotlar = _bos(await http.post("slot", api.SLOT_PATH, {}, h))
+        alindi = (await http.post("randevu_ekle", api.RANDEVU_EKLE_PATH, api.randevu_ekle_payload(slotlar[0]), h)).json()
+        tekrar = (await http.post("randevu_ekle", api.RANDEVU_EKLE_PATH, api.randevu_ekle_payload(slotlar[0]), h)).json()
+        kalan = _bos(await http.post("slot", api.SLOT_PATH, {}, h))
+        return ilce, slotlar, alindi, tekrar, kalan
+
+    ilce, slotlar, alindi, tekrar, kalan = saat.calistir(ana())
+    assert ilce == kayitli_ilce
+    assert len(slotlar) == 5
+    assert alindi["success"] is True
+    assert tekrar["errors"][0]["kodu"] == "SLOT_DOLU"
+    assert [s.id for s in kalan] == [s.id for s in slotlar[1:]]
@@ -0,0 +1,140 @@
+import asyncio
+
+from mhrs_core import api
+from mhrs_core.saat import SanalSaat
+from mhrs_core.store import TakipStore
+from mhrs_core.stub import MhrsStub, StubHttp
+from mhrs_core.takip import Bildirici, TakipServisi
+
+from tests.yardimci import SIMDI, jwt, takip
+
+GUN = 86400
+
+
+class _Kaydeden(Bildirici):
+    def __init__(self):
+        self.olaylar = []
+
+    async def token_gecersiz(self, user_id, yenilenebilir: bool):
+        self.olaylar.append(("gecersiz", user_id, yenilenebilir))
+
+    async def randevu_bulundu(self, user_id, slot):
+        self.olaylar.append(("bulundu", user_id))
+
+
+def _kur(saat, bildirici, **stub):
+    mhrs = MhrsStub(saat=saat, tohum=1, baslangic_bos=2, **stub)
+    return mhrs, TakipServisi(bildirici, http=StubHttp(mhrs), saat=saat)
+
+
+def test_401_alan_abone_digerlerinin_sorgusunu_dusurmez():
+    """Hesabı girilemeyen abone 401 alınca sorgu aynı anahtardaki geçerli tokenle tekrarlanır."""
+    saat = SanalSaat(SIMDI, tohum=1)
+    bildirici = _Kaydeden()
+    mhrs, servis = _kur(saat, bildirici)
+
+    async def ana():
+        a = takip(tc="123", sifre="yanlis", token=jwt(saat.zaman() - 10))
+        servis.takip_ekle(1, "a", a)
+        servis.takip_ekle(2, "b", takip(token=jwt(saat.zaman() + 30 * GUN)))
+        bulunan = await servis.randevu_sorgula(api.sorgu_anahtari(a))
+        return [k.no for k in bulunan]
+
+    assert saat.calistir(ana()) == [2]
+    assert bildirici.olaylar == [("gecersiz", 1, True), ("bulundu", 2)]
+    assert mhrs.stats()["istekler"] == {"slot": 2, "login": 1}
+
+
+def test_yenilenemeyen_tokenin_takipleri_biter():
+    saat = SanalSaat(SIMDI, tohum=1)
+    bildirici = _Kaydeden()
+    mhrs, servis = _kur(saat, bildirici)
+
+    async def ana():
+        a = takip(token=jwt(saat.zaman() - 10))
+        servis.takip_ekle(1, "a", a)
+        servis.takip_ekle(1, "a", takip(ilce_id=3402, token=a["token"]))
+        servis.takip_ekle(2, "b", takip(token=jwt(saat.zaman() + 30 * GUN)))
+        anahtar = api.sorgu_anahtari(a)
+        assert [k.no for k in await servis.randevu_sorgula(anahtar)] == [3]
+        assert bildirici.olaylar == [("gecersiz", 1, False), ("bulundu", 2)]
+        assert [k.no for k in servis.takipler] == [3]
+        assert api.sorgu_anahtari(takip(ilce_id=3402)) not in servis.zamanlayici
+
+        # Ölü token bir daha denenmez, 401 bildirimi tekrarlanmaz
+        mhrs.slot_ac(anahtar)
+        assert [k.no for k in await servis.randevu_sorgula(anahtar)] == [3]
+        assert bildirici.olaylar[2:] == [("bulundu", 2)]
+        assert mhrs.stats()["istekler"] == {"slot": 3}
+
+    saat.calistir(ana())
+
+
+def test_tek_tasiyici_401_alirsa_takip_store_dan_silinir_ve_tarama_biter(tmp_path):
+    saat = SanalSaat(SIMDI, tohum=1)
+    bildirici = _Kaydeden()
+    mhrs = MhrsStub(saat=saat, tohum=1, baslangic_bos=2)
+    store = TakipStore(str(tmp_path / "takipler.db"))
+    servis = TakipServisi(bildirici, store=store, http=StubHttp(mhrs), saat=saat)
+
+    async def ana():
+        await servis.start()
+        servis.takip_ekle(1, "a", takip(token=jwt(saat.zaman() - 10)))
+        # PC modu gibi: takip bitince join() döner
+        await asyncio.wait_for(servis.join(), timeout=GUN)
+        await servis.stop()
+
+    saat.calistir(ana())
+    assert bildirici.olaylar == [("gecersiz", 1, False)]
+    assert mhrs.stats()["istekler"] == {"slot": 1}
+    assert servis.durum() == []
+    assert list(store.hepsi()) == []
+    store.close()
+
+
+def test_hesap_login_beklerken_anahtar_sorgulanmaya_devam_eder():
+    saat = SanalSaat(SIMDI, tohum=1)
+    bildirici = _Kaydeden()
+    mhrs, servis = _kur(saat, bildirici)
+
+    async def ana():
+        a = takip(tc="123", sifre="yanlis", token=jwt(saat.zaman() - 10))
+        servis.takip_ekle(1, "a", a)
+        servis.takip_ekle(2, "b", takip(token=jwt(saat.zaman() + 30 * GUN)))
+        anahtar = api.sorgu_anahtari(a)
+        await servis.randevu_sorgula(anahtar)
+        bekleme = servis.oturumlar.bekleme_kalan(a)
+        assert bekleme > 0
+
+        # A'nın hesabı beklerken sorgu B'nin tokeniyle sürer, A denenmez
+        mhrs.slot_ac(anahtar)
+        assert [k.no for k in await servis.randevu_sorgula(anahtar)] == [2]
+        assert mhrs.stats()["istekler"] == {"slot": 3, "login": 1}
+        assert servis.sorgu_abonelikleri[anahtar]["mola"] == 0
+
+        # Bekleme dolunca A yeniden taşıyıcı olur ve login tekrar denenir
+        saat.ilerlet(bekleme + 1)
+        await servis.randevu_sorgula(anahtar)
+        assert mhrs.stats()["istekler"] == {"slot": 5, "login": 2}
+
+    saat.calistir(ana())
+
+
+def test_tum_abonelerin_hesabi_beklerken_anahtar_dinlenir():
+    saat = SanalSaat(SIMDI, tohum=1)
+    mhrs, servis = _kur(saat, _Kaydeden())
+
+    async def ana():
+        a = takip(tc="123", sifre="yanlis", token=jwt(saat.zaman() - 10))
+        servis.takip_ekle(1, "a", a)
+        anahtar = api.sorgu_anahtari(a)
+        await servis.randevu_sorgula(anahtar)
+        bekleme = servis.oturumlar.bekleme_kalan(a)
+
+        assert await servis.randevu_sorgula(anahtar) == []
+        assert mhrs.stats()["istekler"] == {"slot": 1, "login": 1}
+        abonelik = servis.sorgu_abonelikleri[anahtar]
+        assert abonelik["mola"] == bekleme + 1
+        assert abonelik["mola_durumu"] == "oturum_bekleniyor"
+
+    saat.calistir(ana())
@@ -0,0 +1,51 @@
+"""Testlerin ortak kurucuları: slot kayıtları, slot ağaçları, takip sözlükleri, JWT."""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from mhrs_core.slots import Slot
+from mhrs_core.stub import slot_agaci
+
+SIMDI = datetime(2030, 1, 7, 7, 0)   # Pazartesi
+
+
+def slot(id: int, baslangic: datetime, hekim_adi: str = "Ahmet Yılmaz", kurum_adi: str = "Devlet Hastanesi") -> Slot:
+    bitis = baslangic + timedelta(minutes=15)
+    return Slot(
+        id, None, baslangic, bitis, baslangic.isoformat(), bitis.isoformat(),
+        1, hekim_adi, 10, kurum_adi, 5000, "1. Poliklinik", "Dahiliye",
+    )
+
+
+def kayit(id: int, baslangic: datetime, hekim_id: int = 1, ad: str = "Ahmet", soyad: str = "Yılmaz",
+          bos: bool = True) -> dict:
+    """stub.slot_agaci'nin beklediği slot kaydı."""
+    return {
+        "hekim": {"mhrsHekimId": hekim_id, "ad": ad, "soyad": soyad},
+        "kurum": {"mhrsKurumId": 10, "kurumAdi": "Devlet Hastanesi"},
+        "muayene_yeri": {"id": 5000, "adi": "1. Poliklinik"},
+        "id": id, "cetvel_id": hekim_id * 10, "baslangic": baslangic, "bos": bos,
+    }
+
+
+def agac(*kayitlar) -> list:
+    return slot_agaci(kayitlar)
+
+
+def jwt(exp: float) -> str:
+    def b64(veri: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(veri).encode()).decode().rstrip("=")
+    return f"{b64({'alg': 'none'})}.{b64({'sub': 'test', 'exp': int(exp)})}.imza"
+
+
+def takip(bas: datetime = SIMDI, **alanlar) -> dict:
+    t = {
+        "il_id": "34", "ilce_id": 3401, "klinik_id": 165, "klinik_adi": "Dahiliye",
+        "kurum_id": -1, "kurum_adi": "Farketmez", "hekim_id": -1, "hekim_adi": "Farketmez",
+        "otomatik": False, "token": None,
+        "baslangic_tarihi": bas.strftime("%d.%m.%Y"),
+        "bitis_tarihi": (bas + timedelta(days=15)).strftime("%d.%m.%Y"),
+        "siralama": {"tip": "erken"}, "filtre": None,
+    }
+    t.update(alanlar)
+    return t